@@ -74,11 +74,28 @@ To use the EC2 cloud module, set up the cloud configuration at
       # Default is disabled
       termination_protection: False
 
+      # Regions to list the nodes from, queried concurrently. Defaults to the
+      # location of the provider
+      locations:
+        - us-east-1
+        - eu-west-1
+
+      # Number of instances per DescribeInstances page. Set it to 0 for the
+      # EC2 compatible APIs which do not support the pagination
+      describe_page_size: 1000
+
+      # Seconds during which the listed nodes are used by show_instance and
+      # destroy instead of a new query. Set it to 0 to disable the cache
+      node_cache_ttl: 30
+
 :depends: requests
 """
 
 import base64
 import binascii
+import concurrent.futures
+import contextvars
+import copy
 import datetime
 import decimal
 import hashlib
@@ -92,7 +109,7 @@ import time
 import urllib.parse
 import uuid
 import xml.etree.ElementTree as ET
-from functools import cmp_to_key
+from functools import cmp_to_key, lru_cache
 
 import salt.config as config
 import salt.crypt
@@ -142,6 +159,10 @@ DEFAULT_LOCATION = "us-east-1"
 
 DEFAULT_EC2_API_VERSION = "2016-11-15"
 
+DEFAULT_DESCRIBE_PAGE_SIZE = 1000
+DEFAULT_NODE_CACHE_TTL = 30
+DEFAULT_QUERY_WORKERS = 4
+
 EC2_RETRY_CODES = [
     "RequestLimitExceeded",
     "InsufficientInstanceCapacity",
@@ -272,6 +293,18 @@ def sign(key, msg):
     return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
 
 
+@lru_cache(maxsize=32)
+def _signing_key(key, datestamp, region, service):
+    """
+    Derive the AWS v4 signing key, which only changes with the date, the
+    region and the service of the requests
+    """
+    kDate = sign(("AWS4" + key).encode("utf-8"), datestamp)
+    kRegion = sign(kDate, region)
+    kService = sign(kRegion, service)
+    return sign(kService, "aws4_request")
+
+
 def query(
     params=None,
     setname=None,
@@ -374,10 +407,7 @@ def query(
             + salt.utils.hashutils.sha256_digest(canonical_request)
         )
 
-        kDate = sign(("AWS4" + provider["key"]).encode("utf-8"), datestamp)
-        kRegion = sign(kDate, region)
-        kService = sign(kRegion, service)
-        signing_key = sign(kService, "aws4_request")
+        signing_key = _signing_key(provider["key"], datestamp, region, service)
 
         signature = hmac.new(
             signing_key, (string_to_sign).encode("utf-8"), hashlib.sha256
@@ -1109,6 +1139,26 @@ def get_location(vm_=None):
     )
 
 
+def _get_locations():
+    """
+    Return the EC2 regions to list the nodes from, in this order:
+        - CLI parameter
+        - Cloud provider ``locations`` setting
+        - The location of the provider
+    """
+    if __opts__.get("location"):
+        return [__opts__["location"]]
+
+    locations = config.get_cloud_config_value(
+        "locations", get_configured_provider(), __opts__, search_global=False
+    )
+    if not locations:
+        return [get_location()]
+    if isinstance(locations, str):
+        locations = locations.split(",")
+    return [location.strip() for location in locations]
+
+
 def avail_locations(call=None):
     """
     List all available locations
@@ -3328,6 +3378,7 @@ def rename(name, kwargs, call=None):
     set_tags(name, {"Name": kwargs["newname"]}, call="action")
 
     salt.utils.cloud.rename_key(__opts__["pki_dir"], name, kwargs["newname"])
+    _clear_node_cache()
 
 
 def destroy(name, call=None):
@@ -3345,7 +3396,7 @@ def destroy(name, call=None):
             "The destroy action must be called with -d, --destroy, -a or --action."
         )
 
-    node_metadata = _get_node(name)
+    node_metadata = _get_node(name, use_cache=True)
     instance_id = node_metadata["instanceId"]
     sir_id = node_metadata.get("spotInstanceRequestId")
     protected = show_term_protect(
@@ -3393,6 +3444,7 @@ def destroy(name, call=None):
 
     log.info(result)
     ret.update(result[0])
+    _clear_node_cache()
 
     # If this instance is part of a spot instance request, we
     # need to cancel it as well
@@ -3505,12 +3557,12 @@ def show_instance(name=None, instance_id=None, call=None, kwargs=None):
             "The show_instance function requires either a name or an instance_id"
         )
 
-    node = _get_node(name=name, instance_id=instance_id)
+    node = _get_node(name=name, instance_id=instance_id, use_cache=True)
     __utils__["cloud.cache_node"](node, _get_active_provider_name(), __opts__)
     return node
 
 
-def _get_node(name=None, instance_id=None, location=None):
+def _get_node(name=None, instance_id=None, location=None, use_cache=False):
     if location is None:
         location = get_location()
 
@@ -3519,6 +3571,11 @@ def _get_node(name=None, instance_id=None, location=None):
     if str(name).startswith("i-") and (len(name) == 10 or len(name) == 19):
         instance_id = name
 
+    if use_cache:
+        node = _get_cached_node(location, name=name, instance_id=instance_id)
+        if node:
+            return node
+
     if instance_id:
         params["InstanceId.1"] = instance_id
     else:
@@ -3548,6 +3605,124 @@ def _get_node(name=None, instance_id=None, location=None):
     return {}
 
 
+def _node_cache_ttl():
+    return config.get_cloud_config_value(
+        "node_cache_ttl",
+        get_configured_provider(),
+        __opts__,
+        default=DEFAULT_NODE_CACHE_TTL,
+        search_global=False,
+    )
+
+
+def _set_node_cache(location, nodes):
+    """
+    Keep the nodes listed in a location for the ``node_cache_ttl`` seconds
+    """
+    if _node_cache_ttl():
+        __context__.setdefault("ec2.nodes", {})[location] = (
+            time.time(),
+            copy.deepcopy(nodes),
+        )
+
+
+def _get_cached_node(location, name=None, instance_id=None):
+    """
+    Return a node of a location from the node cache, or None if the node is not
+    in the cache or if the cache expired
+    """
+    timestamp, nodes = __context__.get("ec2.nodes", {}).get(location, (0, {}))
+    if time.time() - timestamp > _node_cache_ttl():
+        return None
+
+    if instance_id:
+        for node in nodes.values():
+            if node.get("instanceId") == instance_id:
+                return copy.deepcopy(node)
+        return None
+    return copy.deepcopy(nodes.get(name))
+
+
+def _clear_node_cache():
+    __context__.pop("ec2.nodes", None)
+
+
+def _describe_instances(location, provider):
+    """
+    Return the reservations of a location, following the ``nextToken`` of the
+    paginated DescribeInstances responses
+    """
+    params = {"Action": "DescribeInstances"}
+    page_size = config.get_cloud_config_value(
+        "describe_page_size",
+        get_configured_provider(),
+        __opts__,
+        default=DEFAULT_DESCRIBE_PAGE_SIZE,
+        search_global=False,
+    )
+    if page_size:
+        params["MaxResults"] = page_size
+
+    reservations = []
+    while True:
+        result = aws.query(
+            params,
+            location=location,
+            provider=provider,
+            opts=__opts__,
+            sigver="4",
+            return_root=True,
+        )
+        if "error" in result:
+            raise SaltCloudSystemExit(
+                "An error occurred while listing nodes: {}".format(
+                    result["error"]["Errors"]["Error"]["Message"]
+                )
+            )
+
+        next_token = None
+        for item in result:
+            if "nextToken" in item:
+                next_token = item["nextToken"]
+            elif item.get("item"):
+                # The reservationSet, with one or several reservations
+                if isinstance(item["item"], list):
+                    reservations.extend(item["item"])
+                else:
+                    reservations.append(item["item"])
+
+        if not next_token:
+            return reservations
+        params["NextToken"] = next_token
+
+
+def _query_locations(func, locations):
+    """
+    Call ``func`` for each location, concurrently when there are several
+    locations, and return the results in the order of the locations
+    """
+    if len(locations) == 1:
+        return [func(locations[0])]
+
+    workers = config.get_cloud_config_value(
+        "query_workers",
+        get_configured_provider(),
+        __opts__,
+        default=DEFAULT_QUERY_WORKERS,
+        search_global=False,
+    )
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(locations)))
+    ) as executor:
+        # Each thread runs in a copy of the context, so that the loader
+        # dunders are available
+        futures = [
+            executor.submit(contextvars.copy_context().run, func, location)
+            for location in locations
+        ]
+        return [future.result() for future in futures]
+
+
 def list_nodes_full(location=None, call=None):
     """
     Return a list of the VMs that are on the provider
@@ -3557,7 +3732,7 @@ def list_nodes_full(location=None, call=None):
             "The list_nodes_full function must be called with -f or --function."
         )
 
-    return _list_nodes_full(location or get_location())
+    return _list_nodes_full(location)
 
 
 def _extract_name_tag(item):
@@ -3615,25 +3790,24 @@ def _extract_instance_info(instances):
 
 def _list_nodes_full(location=None):
     """
-    Return a list of the VMs that in this location
+    Return a list of the VMs that in this location, or in all the configured
+    locations
     """
     provider = _get_active_provider_name() or "ec2"
     if ":" in provider:
         comps = provider.split(":")
         provider = comps[0]
 
-    params = {"Action": "DescribeInstances"}
-    instances = aws.query(
-        params, location=location, provider=provider, opts=__opts__, sigver="4"
+    locations = [location] if location else _get_locations()
+    results = _query_locations(
+        lambda region: _describe_instances(region, provider), locations
     )
-    if "error" in instances:
-        raise SaltCloudSystemExit(
-            "An error occurred while listing nodes: {}".format(
-                instances["error"]["Errors"]["Error"]["Message"]
-            )
-        )
 
-    ret = _extract_instance_info(instances)
+    ret = {}
+    for location, instances in zip(locations, results):
+        nodes = _extract_instance_info(instances)
+        _set_node_cache(location, nodes)
+        ret.update(nodes)
 
     __utils__["cloud.cache_node_list"](ret, provider, __opts__)
     return ret
@@ -3651,22 +3825,13 @@ def list_nodes_min(location=None, call=None):
         )
 
     ret = {}
-    params = {"Action": "DescribeInstances"}
-    instances = aws.query(
-        params,
-        location=get_location(),
-        provider=get_provider(),
-        opts=__opts__,
-        sigver="4",
+    provider = get_provider()
+    locations = [location] if location else _get_locations()
+    results = _query_locations(
+        lambda region: _describe_instances(region, provider), locations
     )
-    if "error" in instances:
-        raise SaltCloudSystemExit(
-            "An error occurred while listing nodes: {}".format(
-                instances["error"]["Errors"]["Error"]["Message"]
-            )
-        )
 
-    for instance in instances:
+    for instance in [item for instances in results for item in instances]:
         if isinstance(instance["instancesSet"]["item"], list):
             items = instance["instancesSet"]["item"]
         else:
@@ -3690,7 +3855,7 @@ def list_nodes(call=None):
         )
 
     ret = {}
-    nodes = list_nodes_full(get_location())
+    nodes = list_nodes_full()
     if "error" in nodes:
         raise SaltCloudSystemExit(
             "An error occurred while listing nodes: {}".format(
@@ -3715,7 +3880,7 @@ def list_nodes_select(call=None):
     Return a list of the VMs that are on the provider, with select fields
     """
     return salt.utils.cloud.list_nodes_select(
-        list_nodes_full(get_location()),
+        list_nodes_full(),
         __opts__["query.selection"],
         call,
     )
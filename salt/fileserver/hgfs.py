@@ -30,6 +30,20 @@ will set the desired branch method. Possible values are: ``branches``,
     environment, and allowing for a ``base`` environment to be specified when
     using an :conf_master:`hgfs_branch_method` of ``bookmarks``.
 
+.. versionchanged:: 3008.0
+    A mercurial command server is kept running for each remote instead of
+    being started for every request, and the branches, bookmarks, tags and
+    manifests of the remotes are resolved once per :py:func:`update` cycle.
+
+    The ``hgfs_export`` master config parameter (or ``export`` per-remote
+    parameter) was added. When set to ``True``, the tree of each ref is
+    materialized in the cache directory with a single ``hg archive``, and files
+    are served from there instead of being read one at a time with ``hg cat``:
+
+    .. code-block:: yaml
+
+        hgfs_export: True
+
 
 :depends:   - mercurial
             - python bindings for mercurial (``python-hglib``)
@@ -43,6 +57,9 @@ import hashlib
 import logging
 import os
 import shutil
+import stat
+import tempfile
+import time
 from datetime import datetime
 
 import salt.fileserver
@@ -58,7 +75,7 @@ from salt.exceptions import FileserverConfigError
 from salt.utils.event import tagify
 
 VALID_BRANCH_METHODS = ("branches", "bookmarks", "mixed")
-PER_REMOTE_OVERRIDES = ("base", "branch_method", "mountpoint", "root")
+PER_REMOTE_OVERRIDES = ("base", "branch_method", "export", "mountpoint", "root")
 
 
 # pylint: disable=import-error
@@ -77,6 +94,13 @@ log = logging.getLogger(__name__)
 __virtualname__ = "hgfs"
 __virtual_aliases__ = ("hg",)
 
+# Long-lived command servers, keyed on the hash of the remote
+_CLIENTS = {}
+# Refs and manifests of the remotes, resolved once per update cycle
+_REFS = {}
+# Nodes for which the hashes of the exported files were last reconciled
+_EXPORTED = {}
+
 
 def __virtual__():
     """
@@ -117,16 +141,6 @@ def _all_branches(repo):
     return branches
 
 
-def _get_branch(repo, name):
-    """
-    Find the requested branch in the specified repo
-    """
-    try:
-        return [x for x in _all_branches(repo) if x[0] == name][0]
-    except IndexError:
-        return False
-
-
 def _all_bookmarks(repo):
     """
     Returns all bookmarks for the specified repo
@@ -142,16 +156,6 @@ def _all_bookmarks(repo):
     return bookmarks
 
 
-def _get_bookmark(repo, name):
-    """
-    Find the requested bookmark in the specified repo
-    """
-    try:
-        return [x for x in _all_bookmarks(repo) if x[0] == name][0]
-    except IndexError:
-        return False
-
-
 def _all_tags(repo):
     """
     Returns all tags for the specified repo
@@ -173,16 +177,6 @@ def _all_tags(repo):
     ]
 
 
-def _get_tag(repo, name):
-    """
-    Find the requested tag in the specified repo
-    """
-    try:
-        return [x for x in _all_tags(repo) if x[0] == name][0]
-    except IndexError:
-        return False
-
-
 def _get_ref(repo, name):
     """
     Return ref tuple if ref is in the repo.
@@ -191,15 +185,18 @@ def _get_ref(repo, name):
         name = repo["base"]
     if name == repo["base"] or name in envs():
         if repo["branch_method"] == "branches":
-            return _get_branch(repo["repo"], name) or _get_tag(repo["repo"], name)
+            kinds = ("branches", "tags")
         elif repo["branch_method"] == "bookmarks":
-            return _get_bookmark(repo["repo"], name) or _get_tag(repo["repo"], name)
+            kinds = ("bookmarks", "tags")
         elif repo["branch_method"] == "mixed":
-            return (
-                _get_branch(repo["repo"], name)
-                or _get_bookmark(repo["repo"], name)
-                or _get_tag(repo["repo"], name)
-            )
+            kinds = ("branches", "bookmarks", "tags")
+        else:
+            return False
+        refs = _get_refs(repo)
+        for kind in kinds:
+            for ref in refs[kind]:
+                if ref[0] == name:
+                    return ref
     return False
 
 
@@ -222,6 +219,142 @@ def _get_manifest(repo, ref):
     return manifest
 
 
+def _get_client(repo):
+    """
+    Return the long-lived command server of the remote, starting a new one if
+    it is not running in this process
+    """
+    pid = os.getpid()
+    client, owner = _CLIENTS.get(repo["hash"], (None, None))
+    if (
+        client is not None
+        and owner == pid
+        and client.server is not None
+        and client.server.poll() is None
+    ):
+        return client
+    # Do not include .hg_archival.txt in the exported trees
+    client = hglib.open(repo["cachedir"], configs=["ui.archivemeta=False"])
+    _CLIENTS[repo["hash"]] = (client, pid)
+    return client
+
+
+def _close_client(repo_hash):
+    """
+    Stop the command server of the remote, if it was started by this process
+    """
+    client, owner = _CLIENTS.pop(repo_hash, (None, None))
+    _REFS.pop(repo_hash, None)
+    if client is not None and owner == os.getpid():
+        try:
+            client.close()
+        except Exception as exc:  # pylint: disable=broad-except
+            log.debug("Unable to stop the hgfs command server: %s", exc)
+
+
+def _get_refs(repo):
+    """
+    Return the branches, bookmarks, tags and the manifests already read for
+    the remote. They are resolved again once :py:func:`update` pulled it.
+    """
+    try:
+        stamp = os.stat(repo["stampfile"]).st_mtime_ns
+    except OSError:
+        stamp = None
+    refs = _REFS.get(repo["hash"])
+    if refs is None or refs["stamp"] != stamp:
+        client = _get_client(repo)
+        new_refs = {
+            "stamp": stamp,
+            "branches": _all_branches(client),
+            "bookmarks": _all_bookmarks(client),
+            "tags": _all_tags(client),
+        }
+        nodes = {
+            ref[2]
+            for kind in ("branches", "bookmarks", "tags")
+            for ref in new_refs[kind]
+        }
+        # Manifests do not change for a given node, keep the ones still used
+        new_refs["manifests"] = {
+            node: manifest
+            for node, manifest in (refs or {}).get("manifests", {}).items()
+            if node in nodes
+        }
+        refs = _REFS[repo["hash"]] = new_refs
+    return refs
+
+
+def _get_repo_manifest(repo, ref):
+    """
+    Get manifest for ref, reading it only once per update cycle
+    """
+    manifests = _get_refs(repo)["manifests"]
+    if ref[2] not in manifests:
+        manifests[ref[2]] = _get_manifest(_get_client(repo), ref=ref)
+    return manifests[ref[2]]
+
+
+def _export_dir(repo_hash):
+    """
+    Return the directory holding the exported trees of the remote
+    """
+    return os.path.join(__opts__["cachedir"], "hgfs", "export", repo_hash)
+
+
+def _export(repo, ref):
+    """
+    Materialize the tree of the ref with a single ``hg archive`` and return
+    its path, or None if it could not be exported
+    """
+    export_dir = os.path.join(_export_dir(repo["hash"]), ref[2])
+    if os.path.isdir(export_dir):
+        return export_dir
+    parent = os.path.dirname(export_dir)
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f".{ref[2]}.", dir=parent)
+    try:
+        tree = os.path.join(tmp_dir, "tree")
+        _get_client(repo).archive(
+            salt.utils.stringutils.to_bytes(tree),
+            rev=salt.utils.stringutils.to_bytes(ref[2]),
+            type=b"files",
+        )
+        os.rename(tree, export_dir)
+    except hglib.error.CommandError as exc:
+        log.error(
+            "Unable to export %s from hgfs remote %s: %s", ref[0], repo["url"], exc
+        )
+        return None
+    except OSError:
+        # Another process exported it first
+        if not os.path.isdir(export_dir):
+            return None
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return export_dir
+
+
+def _reap_exports(repo):
+    """
+    Remove the exported trees of the remote which are no longer referenced
+    """
+    export_dir = _export_dir(repo["hash"])
+    try:
+        exported = os.listdir(export_dir)
+    except OSError:
+        return
+    keep = set()
+    if salt.utils.data.is_true(repo["export"]):
+        refs = _get_refs(repo)
+        keep.update(
+            ref[2] for kind in ("branches", "bookmarks", "tags") for ref in refs[kind]
+        )
+    for item in exported:
+        if item not in keep and not item.startswith("."):
+            shutil.rmtree(os.path.join(export_dir, item), ignore_errors=True)
+
+
 def _failhard():
     """
     Fatal fileserver configuration issue, raise an exception
@@ -237,9 +370,10 @@ def init():
     new_remote = False
     repos = []
 
-    per_remote_defaults = {}
+    per_remote_defaults = {"export": str(__opts__.get("hgfs_export", False))}
     for param in PER_REMOTE_OVERRIDES:
-        per_remote_defaults[param] = str(__opts__[f"hgfs_{param}"])
+        if param not in per_remote_defaults:
+            per_remote_defaults[param] = str(__opts__[f"hgfs_{param}"])
 
     for remote in __opts__["hgfs_remotes"]:
         repo_conf = copy.deepcopy(per_remote_defaults)
@@ -319,10 +453,22 @@ def init():
             client = hglib.init(rp_)
             client.close()
             new_remote = True
-        repo = None
-        try:
+        repo_conf.update(
+            {
+                "url": repo_url,
+                "hash": repo_hash,
+                "cachedir": rp_,
+                "lockfile": os.path.join(
+                    __opts__["cachedir"], "hgfs", f"{repo_hash}.update.lk"
+                ),
+                "stampfile": os.path.join(
+                    __opts__["cachedir"], "hgfs", f"{repo_hash}.update.stamp"
+                ),
+            }
+        )
+        if repo_hash not in _CLIENTS:
             try:
-                repo = hglib.open(rp_)
+                repo = _get_client(repo_conf)
             except hglib.error.ServerError:
                 log.error(
                     "Cache path %s (corresponding remote: %s) exists but is not "
@@ -357,22 +503,14 @@ def init():
                     hgconfig.write(
                         salt.utils.stringutils.to_str(f"default = {repo_url}\n")
                     )
+                # The command server does not reload the hgrc, start a new one
+                # the next time it is needed
+                _close_client(repo_hash)
 
-            repo_conf.update(
-                {
-                    "repo": repo,
-                    "url": repo_url,
-                    "hash": repo_hash,
-                    "cachedir": rp_,
-                    "lockfile": os.path.join(
-                        __opts__["cachedir"], "hgfs", f"{repo_hash}.update.lk"
-                    ),
-                }
-            )
-            repos.append(repo_conf)
-        finally:
-            if repo:
-                repo.close()
+        # The command servers are shared, hand out a client which is not
+        # connected for the callers opening and closing their own
+        repo_conf["repo"] = hglib.client.hgclient(rp_, None, None, connect=False)
+        repos.append(repo_conf)
 
     if new_remote:
         remote_map = os.path.join(__opts__["cachedir"], "hgfs/remote_map.txt")
@@ -412,11 +550,15 @@ def _clear_old_remotes():
             pass
     to_remove = []
     for item in cachedir_ls:
-        if item in ("hash", "refs"):
+        if item in ("export", "hash", "refs"):
             continue
         path = os.path.join(bp_, item)
         if os.path.isdir(path):
+            _close_client(item)
             to_remove.append(path)
+            export_dir = _export_dir(item)
+            if os.path.isdir(export_dir):
+                to_remove.append(export_dir)
     failed = []
     if to_remove:
         for rdir in to_remove:
@@ -439,6 +581,10 @@ def clear_cache():
     fsb_cachedir = os.path.join(__opts__["cachedir"], "hgfs")
     list_cachedir = os.path.join(__opts__["cachedir"], "file_lists/hgfs")
     errors = []
+    for repo_hash in list(_CLIENTS):
+        _close_client(repo_hash)
+    _REFS.clear()
+    _EXPORTED.clear()
     for rdir in (fsb_cachedir, list_cachedir):
         if os.path.exists(rdir):
             try:
@@ -572,43 +718,46 @@ def update():
     # second init()
     data["changed"], repos = _clear_old_remotes()
     for repo in repos:
+        if os.path.exists(repo["lockfile"]):
+            log.warning(
+                "Update lockfile is present for hgfs remote %s, skipping. "
+                "If this warning persists, it is possible that the update "
+                "process was interrupted. Removing %s or running "
+                "'salt-run fileserver.clear_lock hgfs' will allow updates "
+                "to continue for this remote.",
+                repo["url"],
+                repo["lockfile"],
+            )
+            continue
+        _, errors = lock(repo)
+        if errors:
+            log.error(
+                "Unable to set update lock for hgfs remote %s, skipping.",
+                repo["url"],
+            )
+            continue
+        log.debug("hgfs is fetching from %s", repo["url"])
+        client = _get_client(repo)
+        curtip = client.tip()
         try:
-            if os.path.exists(repo["lockfile"]):
-                log.warning(
-                    "Update lockfile is present for hgfs remote %s, skipping. "
-                    "If this warning persists, it is possible that the update "
-                    "process was interrupted. Removing %s or running "
-                    "'salt-run fileserver.clear_lock hgfs' will allow updates "
-                    "to continue for this remote.",
-                    repo["url"],
-                    repo["lockfile"],
-                )
-                continue
-            _, errors = lock(repo)
-            if errors:
-                log.error(
-                    "Unable to set update lock for hgfs remote %s, skipping.",
-                    repo["url"],
-                )
-                continue
-            log.debug("hgfs is fetching from %s", repo["url"])
-            repo["repo"].open()
-            curtip = repo["repo"].tip()
-            try:
-                repo["repo"].pull()
-            except Exception as exc:  # pylint: disable=broad-except
-                log.error(
-                    "Exception %s caught while updating hgfs remote %s",
-                    exc,
-                    repo["url"],
-                    exc_info_on_loglevel=logging.DEBUG,
-                )
-            else:
-                newtip = repo["repo"].tip()
-                if curtip[1] != newtip[1]:
-                    data["changed"] = True
-        finally:
-            repo["repo"].close()
+            client.pull()
+        except Exception as exc:  # pylint: disable=broad-except
+            log.error(
+                "Exception %s caught while updating hgfs remote %s",
+                exc,
+                repo["url"],
+                exc_info_on_loglevel=logging.DEBUG,
+            )
+            _close_client(repo["hash"])
+        else:
+            newtip = client.tip()
+            if curtip[1] != newtip[1]:
+                data["changed"] = True
+            # Have every process resolve the refs of the remote again
+            with salt.utils.files.fopen(repo["stampfile"], "w") as fp_:
+                fp_.write(str(time.time_ns()))
+            _REFS.pop(repo["hash"], None)
+            _reap_exports(repo)
         clear_lock(repo)
 
     env_cache = os.path.join(__opts__["cachedir"], "hgfs/envs.p")
@@ -663,23 +812,20 @@ def envs(ignore_cache=False):
     ret = set()
 
     for repo in init():
-        try:
-            repo["repo"].open()
-            if repo["branch_method"] in ("branches", "mixed"):
-                for branch in _all_branches(repo["repo"]):
-                    branch_name = branch[0]
-                    if branch_name == repo["base"]:
-                        branch_name = "base"
-                    ret.add(branch_name)
-            if repo["branch_method"] in ("bookmarks", "mixed"):
-                for bookmark in _all_bookmarks(repo["repo"]):
-                    bookmark_name = bookmark[0]
-                    if bookmark_name == repo["base"]:
-                        bookmark_name = "base"
-                    ret.add(bookmark_name)
-            ret.update([x[0] for x in _all_tags(repo["repo"])])
-        finally:
-            repo["repo"].close()
+        refs = _get_refs(repo)
+        if repo["branch_method"] in ("branches", "mixed"):
+            for branch in refs["branches"]:
+                branch_name = branch[0]
+                if branch_name == repo["base"]:
+                    branch_name = "base"
+                ret.add(branch_name)
+        if repo["branch_method"] in ("bookmarks", "mixed"):
+            for bookmark in refs["bookmarks"]:
+                bookmark_name = bookmark[0]
+                if bookmark_name == repo["base"]:
+                    bookmark_name = "base"
+                ret.add(bookmark_name)
+        ret.update([x[0] for x in refs["tags"]])
     return [x for x in sorted(ret) if _env_is_exposed(x)]
 
 
@@ -718,72 +864,110 @@ def find_file(path, tgt_env="base", **kwargs):  # pylint: disable=W0613
             os.makedirs(hashdir)
 
     for repo in init():
-        try:
-            if repo["mountpoint"] and not path.startswith(
-                repo["mountpoint"] + os.path.sep
-            ):
-                continue
-            repo_path = path[len(repo["mountpoint"]) :].lstrip(os.path.sep)
-            if repo["root"]:
-                repo_path = os.path.join(repo["root"], repo_path)
-
-            repo["repo"].open()
-            ref = _get_ref(repo, tgt_env)
-            if not ref:
-                # Branch or tag not found in repo, try the next
-                repo["repo"].close()
+        if repo["mountpoint"] and not path.startswith(repo["mountpoint"] + os.path.sep):
+            continue
+        repo_path = path[len(repo["mountpoint"]) :].lstrip(os.path.sep)
+        if repo["root"]:
+            repo_path = os.path.join(repo["root"], repo_path)
+
+        ref = _get_ref(repo, tgt_env)
+        if not ref:
+            # Branch or tag not found in repo, try the next
+            continue
+        export_dir = None
+        if salt.utils.data.is_true(repo["export"]):
+            export_dir = _export(repo, ref)
+        if export_dir is not None:
+            export_dest = os.path.normpath(os.path.join(export_dir, repo_path))
+            if not export_dest.startswith(export_dir + os.sep):
                 continue
-            salt.fileserver.wait_lock(lk_fn, dest)
-            if os.path.isfile(blobshadest) and os.path.isfile(dest):
-                with salt.utils.files.fopen(blobshadest, "r") as fp_:
-                    sha = fp_.read()
-                    if sha == ref[2]:
-                        fnd["rel"] = path
-                        fnd["path"] = dest
-                        repo["repo"].close()
-                        return fnd
             try:
-                repo["repo"].cat(
-                    [salt.utils.stringutils.to_bytes(f"path:{repo_path}")],
-                    rev=ref[2],
-                    output=dest,
-                )
-            except hglib.error.CommandError:
-                repo["repo"].close()
+                fstat = os.lstat(export_dest)
+            except OSError:
                 continue
-            with salt.utils.files.fopen(lk_fn, "w"):
-                pass
-            for filename in glob.glob(hashes_glob):
+            real_dest = os.path.join(
+                os.path.realpath(export_dir), os.path.relpath(export_dest, export_dir)
+            )
+            if os.path.realpath(export_dest) != real_dest:
+                # hg archive writes the symlinks of the repo as symlinks, do
+                # not follow them and read the link with hg cat instead
+                export_dir = None
+            elif not stat.S_ISREG(fstat.st_mode):
+                continue
+        if export_dir is not None:
+            if _EXPORTED.get((tgt_env, path)) != ref[2]:
+                # The ref moved since the hashes were computed, drop them
+                nodedest = os.path.join(
+                    __opts__["cachedir"],
+                    "hgfs/hash",
+                    tgt_env,
+                    f"{path}.hash.export_node",
+                )
                 try:
-                    os.remove(filename)
-                except Exception:  # pylint: disable=broad-except
-                    pass
-            with salt.utils.files.fopen(blobshadest, "w+") as fp_:
-                fp_.write(salt.utils.stringutils.to_str(ref[2]))
-            try:
-                os.remove(lk_fn)
-            except OSError:
-                pass
+                    with salt.utils.files.fopen(nodedest, "r") as fp_:
+                        node = fp_.read()
+                except OSError:
+                    node = None
+                if node != ref[2]:
+                    for filename in glob.glob(hashes_glob):
+                        try:
+                            os.remove(filename)
+                        except Exception:  # pylint: disable=broad-except
+                            pass
+                    with salt.utils.files.fopen(nodedest, "w+") as fp_:
+                        fp_.write(salt.utils.stringutils.to_str(ref[2]))
+                _EXPORTED[(tgt_env, path)] = ref[2]
             fnd["rel"] = path
-            fnd["path"] = dest
+            fnd["path"] = export_dest
+            fnd["stat"] = list(fstat)
+            return fnd
+        salt.fileserver.wait_lock(lk_fn, dest)
+        if os.path.isfile(blobshadest) and os.path.isfile(dest):
+            with salt.utils.files.fopen(blobshadest, "r") as fp_:
+                sha = fp_.read()
+                if sha == ref[2]:
+                    fnd["rel"] = path
+                    fnd["path"] = dest
+                    return fnd
+        try:
+            _get_client(repo).cat(
+                [salt.utils.stringutils.to_bytes(f"path:{repo_path}")],
+                rev=ref[2],
+                output=dest,
+            )
+        except hglib.error.CommandError:
+            continue
+        with salt.utils.files.fopen(lk_fn, "w"):
+            pass
+        for filename in glob.glob(hashes_glob):
             try:
-                # Converting the stat result to a list, the elements of the
-                # list correspond to the following stat_result params:
-                # 0 => st_mode=33188
-                # 1 => st_ino=10227377
-                # 2 => st_dev=65026
-                # 3 => st_nlink=1
-                # 4 => st_uid=1000
-                # 5 => st_gid=1000
-                # 6 => st_size=1056233
-                # 7 => st_atime=1468284229
-                # 8 => st_mtime=1456338235
-                # 9 => st_ctime=1456338235
-                fnd["stat"] = list(os.stat(dest))
+                os.remove(filename)
             except Exception:  # pylint: disable=broad-except
                 pass
-        finally:
-            repo["repo"].close()
+        with salt.utils.files.fopen(blobshadest, "w+") as fp_:
+            fp_.write(salt.utils.stringutils.to_str(ref[2]))
+        try:
+            os.remove(lk_fn)
+        except OSError:
+            pass
+        fnd["rel"] = path
+        fnd["path"] = dest
+        try:
+            # Converting the stat result to a list, the elements of the
+            # list correspond to the following stat_result params:
+            # 0 => st_mode=33188
+            # 1 => st_ino=10227377
+            # 2 => st_dev=65026
+            # 3 => st_nlink=1
+            # 4 => st_uid=1000
+            # 5 => st_gid=1000
+            # 6 => st_size=1056233
+            # 7 => st_atime=1468284229
+            # 8 => st_mtime=1456338235
+            # 9 => st_ctime=1456338235
+            fnd["stat"] = list(os.stat(dest))
+        except Exception:  # pylint: disable=broad-except
+            pass
         return fnd
     return fnd
 
@@ -898,18 +1082,14 @@ def _get_file_list(load):
         return []
     ret = set()
     for repo in init():
-        try:
-            repo["repo"].open()
-            ref = _get_ref(repo, load["saltenv"])
-            if ref:
-                manifest = _get_manifest(repo["repo"], ref=ref)
-                for tup in manifest:
-                    relpath = os.path.relpath(tup[4], repo["root"])
-                    # Don't add files outside the hgfs_root
-                    if not relpath.startswith("../"):
-                        ret.add(os.path.join(repo["mountpoint"], relpath))
-        finally:
-            repo["repo"].close()
+        ref = _get_ref(repo, load["saltenv"])
+        if ref:
+            manifest = _get_repo_manifest(repo, ref)
+            for tup in manifest:
+                relpath = os.path.relpath(tup[4], repo["root"])
+                # Don't add files outside the hgfs_root
+                if not relpath.startswith("../"):
+                    ret.add(os.path.join(repo["mountpoint"], relpath))
     return sorted(ret)
 
 
@@ -940,24 +1120,20 @@ def _get_dir_list(load):
         return []
     ret = set()
     for repo in init():
-        try:
-            repo["repo"].open()
-            ref = _get_ref(repo, load["saltenv"])
-            if ref:
-                manifest = _get_manifest(repo["repo"], ref=ref)
-                for tup in manifest:
-                    filepath = tup[4]
-                    split = filepath.rsplit("/", 1)
-                    while len(split) > 1:
-                        relpath = os.path.relpath(split[0], repo["root"])
-                        # Don't add '.'
-                        if relpath != ".":
-                            # Don't add files outside the hgfs_root
-                            if not relpath.startswith("../"):
-                                ret.add(os.path.join(repo["mountpoint"], relpath))
-                        split = split[0].rsplit("/", 1)
-        finally:
-            repo["repo"].close()
+        ref = _get_ref(repo, load["saltenv"])
+        if ref:
+            manifest = _get_repo_manifest(repo, ref)
+            for tup in manifest:
+                filepath = tup[4]
+                split = filepath.rsplit("/", 1)
+                while len(split) > 1:
+                    relpath = os.path.relpath(split[0], repo["root"])
+                    # Don't add '.'
+                    if relpath != ".":
+                        # Don't add files outside the hgfs_root
+                        if not relpath.startswith("../"):
+                            ret.add(os.path.join(repo["mountpoint"], relpath))
+                    split = split[0].rsplit("/", 1)
     if repo["mountpoint"]:
         ret.add(repo["mountpoint"])
     return sorted(ret)
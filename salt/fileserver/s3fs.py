@@ -85,6 +85,13 @@ structure::
     .. code-block:: yaml
 
         s3.s3_sync_on_update: False
+
+    Files are downloaded by a pool of worker threads during the sync. The size
+    of the pool can be set in the master config:
+
+    .. code-block:: yaml
+
+        s3.sync_workers: 8
 """
 
 
@@ -94,6 +101,7 @@ import os
 import pickle
 import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 
 import salt.fileserver as fs
 import salt.modules
@@ -104,6 +112,14 @@ import salt.utils.versions
 
 log = logging.getLogger(__name__)
 
+# The last buckets cache file that was loaded, the stat it was loaded with and
+# a path index built from it, so that the file is only unpickled when it changes
+_METADATA = {}
+
+# Hashes of the files in the local cache, keyed by path and hash type, along
+# with the mtime and size they were computed for
+_HASHES = {}
+
 
 def envs():
     """
@@ -127,19 +143,24 @@ def update():
     if __opts__.get("s3.s3_sync_on_update", True):
         # sync the buckets to the local cache
         log.info("Syncing local cache from S3...")
+        jobs = []
         for saltenv, env_meta in metadata.items():
             for bucket_files in _find_files(env_meta):
                 for bucket, files in bucket_files.items():
                     for file_path in files:
-                        cached_file_path = _get_cached_file_name(
-                            bucket, saltenv, file_path
-                        )
-                        log.info("%s - %s : %s", bucket, saltenv, file_path)
+                        jobs.append((saltenv, bucket, file_path))
 
-                        # load the file from S3 if it's not in the cache or it's old
-                        _get_file_from_s3(
-                            metadata, saltenv, bucket, file_path, cached_file_path
-                        )
+        def _sync(saltenv, bucket, file_path):
+            cached_file_path = _get_cached_file_name(bucket, saltenv, file_path)
+            log.info("%s - %s : %s", bucket, saltenv, file_path)
+
+            # load the file from S3 if it's not in the cache or it's old
+            _get_file_from_s3(metadata, saltenv, bucket, file_path, cached_file_path)
+
+        workers = max(1, int(__opts__.get("s3.sync_workers", 8)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for future in [pool.submit(_sync, *job) for job in jobs]:
+                future.result()
 
         log.info("Sync local cache from S3 completed.")
 
@@ -160,21 +181,14 @@ def find_file(path, saltenv="base", **kwargs):
     if not metadata or saltenv not in metadata:
         return fnd
 
-    env_files = _find_files(metadata[saltenv])
-
     if not _is_env_per_bucket():
         path = os.path.join(saltenv, path)
 
-    # look for the files and check if they're ignored globally
-    for bucket in env_files:
-        for bucket_name, files in bucket.items():
-            if path in files and not fs.is_file_ignored(__opts__, path):
-                fnd["bucket"] = bucket_name
-                fnd["path"] = path
-                break
-        else:
-            continue  # only executes if we didn't break
-        break
+    # look for the file and check if it's ignored globally
+    bucket_name = _get_file_index(metadata)[saltenv]["paths"].get(path)
+    if bucket_name is not None and not fs.is_file_ignored(__opts__, path):
+        fnd["bucket"] = bucket_name
+        fnd["path"] = path
 
     if not fnd["path"] or not fnd["bucket"]:
         return fnd
@@ -208,7 +222,7 @@ def file_hash(load, fnd):
     )
 
     if os.path.isfile(cached_file_path):
-        ret["hsum"] = salt.utils.hashutils.get_hash(cached_file_path)
+        ret["hsum"] = _get_cached_file_hash(cached_file_path)
         ret["hash_type"] = "md5"
 
     return ret
@@ -356,18 +370,103 @@ def _init():
     # check mtime of the buckets files cache
     metadata = None
     try:
-        if os.path.getmtime(cache_file) > exp:
-            metadata = _read_buckets_cache_file(cache_file)
+        cache_stat = os.stat(cache_file)
+        if cache_stat.st_mtime > exp:
+            metadata = _load_buckets_cache_file(cache_file, cache_stat)
     except OSError:
         pass
 
     if metadata is None:
         # bucket files cache expired or does not exist
         metadata = _refresh_buckets_cache_file(cache_file)
+        try:
+            _remember_metadata(metadata, cache_file, os.stat(cache_file))
+        except OSError:
+            pass
 
     return metadata
 
 
+def _stat_key(cache_file, cache_stat):
+    return (cache_file, cache_stat.st_mtime_ns, cache_stat.st_size)
+
+
+def _remember_metadata(metadata, cache_file, cache_stat):
+    """
+    Keep the metadata read from or written to the buckets cache file in memory
+    """
+    _METADATA.clear()
+    _METADATA.update(
+        key=_stat_key(cache_file, cache_stat), metadata=metadata, index=None
+    )
+
+
+def _load_buckets_cache_file(cache_file, cache_stat):
+    """
+    Return the contents of the buckets cache file, only reading it from disk
+    if it changed since it was last loaded
+    """
+    if _METADATA.get("key") == _stat_key(cache_file, cache_stat):
+        return _METADATA["metadata"]
+    metadata = _read_buckets_cache_file(cache_file)
+    if metadata is not None:
+        _remember_metadata(metadata, cache_file, cache_stat)
+    return metadata
+
+
+def _build_file_index(metadata):
+    """
+    Index the bucket cache metadata by saltenv. For each saltenv, ``paths``
+    maps a file path to the first bucket holding it and ``meta`` maps a
+    ``(bucket, key)`` tuple to the metadata of that key.
+    """
+    index = {}
+    for saltenv, env_meta in metadata.items():
+        paths = {}
+        meta = {}
+        for bucket_dict in env_meta:
+            for bucket_name, data in bucket_dict.items():
+                for item_meta in data:
+                    if "Key" not in item_meta:
+                        continue
+                    key = item_meta["Key"]
+                    if "ETag" in item_meta:
+                        # Get rid of quotes surrounding md5
+                        item_meta["ETag"] = item_meta["ETag"].strip('"')
+                    meta[(bucket_name, key)] = item_meta
+                    if not key.endswith("/"):
+                        paths.setdefault(key, bucket_name)
+        index[saltenv] = {"paths": paths, "meta": meta}
+    return index
+
+
+def _get_file_index(metadata):
+    """
+    Return the path index for the given metadata, reusing the index built for
+    the last loaded buckets cache file when possible
+    """
+    if _METADATA.get("metadata") is metadata:
+        if _METADATA["index"] is None:
+            _METADATA["index"] = _build_file_index(metadata)
+        return _METADATA["index"]
+    return _build_file_index(metadata)
+
+
+def _get_cached_file_hash(cached_file_path, form="sha256"):
+    """
+    Return the hash of a file in the local cache, only hashing it again if its
+    mtime or size changed since it was last hashed
+    """
+    cached_file_stat = os.stat(cached_file_path)
+    stamp = (cached_file_stat.st_mtime_ns, cached_file_stat.st_size)
+    cached = _HASHES.get((cached_file_path, form))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    hsum = salt.utils.hashutils.get_hash(cached_file_path, form)
+    _HASHES[(cached_file_path, form)] = (stamp, hsum)
+    return hsum
+
+
 def _get_cache_dir():
     """
     Return the path to the s3cache dir
@@ -385,8 +484,7 @@ def _get_cached_file_name(bucket_name, saltenv, path):
     file_path = os.path.join(_get_cache_dir(), saltenv, bucket_name, path)
 
     # make sure bucket and saltenv directories exist
-    if not os.path.exists(os.path.dirname(file_path)):
-        os.makedirs(os.path.dirname(file_path))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
     return file_path
 
@@ -667,21 +765,9 @@ def _find_file_meta(metadata, bucket_name, saltenv, path):
     """
     Looks for a file's metadata in the S3 bucket cache file
     """
-    env_meta = metadata[saltenv] if saltenv in metadata else {}
-    bucket_meta = {}
-    for bucket in env_meta:
-        if bucket_name in bucket:
-            bucket_meta = bucket[bucket_name]
-    files_meta = list(list(filter((lambda k: "Key" in k), bucket_meta)))
-
-    for item_meta in files_meta:
-        if "Key" in item_meta and item_meta["Key"] == path:
-            try:
-                # Get rid of quotes surrounding md5
-                item_meta["ETag"] = item_meta["ETag"].strip('"')
-            except KeyError:
-                pass
-            return item_meta
+    if saltenv not in metadata:
+        return None
+    return _get_file_index(metadata)[saltenv]["meta"].get((bucket_name, path))
 
 
 def _get_buckets():
@@ -716,7 +802,7 @@ def _get_file_from_s3(metadata, saltenv, bucket_name, path, cached_file_path):
 
             if file_etag.find("-") == -1:
                 file_md5 = file_etag
-                cached_md5 = salt.utils.hashutils.get_hash(cached_file_path, "md5")
+                cached_md5 = _get_cached_file_hash(cached_file_path, "md5")
 
                 # hashes match we have a cache hit
                 if cached_md5 == file_md5:
@@ -56,6 +56,45 @@
     be valid GELF, any real-world feedback on its usefulness, and
     correctness, will be appreciated.
 
+    Asynchronous Sending
+    ....................
+
+    By default every log record is sent to fluentd synchronously by the thread
+    that logged it, so a slow or unreachable fluentd slows down that thread.
+    Setting ``async`` makes the handler put the records on a bounded queue
+    instead. A background thread then sends them to fluentd in batches, using
+    the ``PackedForward`` mode of the forward protocol.
+
+    .. code-block:: yaml
+
+        fluent_handler:
+          host: localhost
+          port: 24224
+          async: True
+          queue_size: 10000
+          batch_size: 500
+          flush_interval: 1
+          compressed: False
+          require_ack: False
+
+    ``queue_size``
+        Maximum number of records waiting to be sent. When the queue is full,
+        the oldest records are dropped to make room for new ones.
+
+    ``batch_size``
+        Maximum number of records sent in one ``PackedForward`` message.
+
+    ``flush_interval``
+        Maximum number of seconds a record waits in the queue before it is
+        sent.
+
+    ``compressed``
+        Gzip the records, using ``CompressedPackedForward``.
+
+    ``require_ack``
+        Ask fluentd to acknowledge each batch. A batch that is not
+        acknowledged is put back on the queue and sent again.
+
     Log Level
     .........
 
@@ -72,12 +111,17 @@
 
 """
 
+import base64
+import collections
 import datetime
+import gzip
 import logging
 import logging.handlers
+import os
 import socket
 import threading
 import time
+import uuid
 
 import salt.utils.msgpack
 import salt.utils.network
@@ -158,7 +202,19 @@ def setup_handlers():
             formatter = MessageFormatter(
                 payload_type=payload_type, version=version, tags=tags
             )
-            fluent_handler = FluentHandler(tag, host=host, port=port)
+            async_kwargs = {}
+            if __opts__["fluent_handler"].get("async", False):
+                for key in (
+                    "queue_size",
+                    "batch_size",
+                    "flush_interval",
+                    "compressed",
+                    "require_ack",
+                ):
+                    if key in __opts__["fluent_handler"]:
+                        async_kwargs[key] = __opts__["fluent_handler"][key]
+                async_kwargs["asynchronous"] = True
+            fluent_handler = FluentHandler(tag, host=host, port=port, **async_kwargs)
             fluent_handler.setFormatter(formatter)
             fluent_handler.setLevel(
                 LOG_LEVELS[
@@ -430,12 +486,26 @@ class FluentHandler(logging.Handler):
     Logging Handler for fluent.
     """
 
-    def __init__(self, tag, host="localhost", port=24224, timeout=3.0, verbose=False):
+    def __init__(
+        self,
+        tag,
+        host="localhost",
+        port=24224,
+        timeout=3.0,
+        verbose=False,
+        asynchronous=False,
+        **kwargs
+    ):
 
         self.tag = tag
-        self.sender = FluentSender(
-            tag, host=host, port=port, timeout=timeout, verbose=verbose
-        )
+        if asynchronous:
+            self.sender = AsyncFluentSender(
+                tag, host=host, port=port, timeout=timeout, verbose=verbose, **kwargs
+            )
+        else:
+            self.sender = FluentSender(
+                tag, host=host, port=port, timeout=timeout, verbose=verbose
+            )
         logging.Handler.__init__(self)
 
     def emit(self, record):
@@ -445,7 +515,7 @@ class FluentHandler(logging.Handler):
     def close(self):
         self.acquire()
         try:
-            self.sender._close()
+            self.sender.close()
             logging.Handler.close(self)
         finally:
             self.release()
@@ -541,7 +611,213 @@ class FluentSender:
                 sock.connect((self.host, self.port))
             self.socket = sock
 
+    def close(self):
+        self.lock.acquire()
+        try:
+            self._close()
+        finally:
+            self.lock.release()
+
     def _close(self):
         if self.socket:
             self.socket.close()
         self.socket = None
+
+
+class AsyncFluentSender(FluentSender):
+    """
+    Fluent sender which queues the records and sends them from a background
+    thread, in batches, using the ``PackedForward`` (or, when ``compressed`` is
+    set, ``CompressedPackedForward``) mode of the fluentd forward protocol.
+
+    When the queue is full the oldest records are dropped. The number of
+    queued, sent and dropped records is available from :py:meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        tag,
+        host="localhost",
+        port=24224,
+        bufmax=1 * 1024 * 1024,
+        timeout=3.0,
+        verbose=False,
+        queue_size=10000,
+        batch_size=500,
+        flush_interval=1.0,
+        compressed=False,
+        require_ack=False,
+    ):
+        self.queue_size = int(queue_size)
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.compressed = compressed
+        self.require_ack = require_ack
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._sent = 0
+        self._dropped = 0
+        self._stopped = False
+        self._flusher = None
+        self._pid = None
+        super().__init__(
+            tag, host=host, port=port, bufmax=bufmax, timeout=timeout, verbose=verbose
+        )
+
+    def emit_with_time(self, label, timestamp, data):
+        if label:
+            tag = ".".join((self.tag, label))
+        else:
+            tag = self.tag
+        if self.verbose:
+            print((tag, timestamp, data))
+        with self._cond:
+            self._enqueue([(tag, timestamp, data)])
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        self._start_flusher()
+
+    def stats(self):
+        """
+        Return the number of records waiting in the queue, sent to fluentd and
+        dropped because the queue was full
+        """
+        with self._cond:
+            return {
+                "queued": len(self._queue),
+                "sent": self._sent,
+                "dropped": self._dropped,
+            }
+
+    def flush(self):
+        """
+        Send everything in the queue right away, from the calling thread
+        """
+        while self._flush_batch():
+            pass
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        flusher = self._flusher
+        if flusher is not None and self._pid == os.getpid():
+            flusher.join(self.timeout + self.flush_interval)
+        self.lock.acquire()
+        try:
+            self._close()
+        finally:
+            self.lock.release()
+
+    def _enqueue(self, records, front=False):
+        # Must be called with self._cond held
+        if front:
+            self._queue.extendleft(reversed(records))
+        else:
+            self._queue.extend(records)
+        # Drop the oldest records once the queue is full
+        while len(self._queue) > self.queue_size:
+            self._queue.popleft()
+            self._dropped += 1
+
+    def _start_flusher(self):
+        pid = os.getpid()
+        if self._pid == pid and self._flusher is not None:
+            return
+        with self._cond:
+            if self._pid == pid and self._flusher is not None:
+                return
+            if self._pid is not None:
+                # Forked, the socket and the flusher belong to the parent
+                self.socket = None
+            self._pid = pid
+            self._stopped = False
+            self._flusher = threading.Thread(
+                target=self._run, name="FluentSender", daemon=True
+            )
+            self._flusher.start()
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._cond:
+                if not self._stopped and (
+                    failed or len(self._queue) < self.batch_size
+                ):
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            failed = False
+            while True:
+                sent = self._flush_batch()
+                if sent is None:
+                    failed = True
+                    break
+                if not sent:
+                    break
+            if stopped:
+                return
+
+    def _flush_batch(self):
+        """
+        Send up to ``batch_size`` records. Returns the number of records sent,
+        or ``None`` if sending failed, in which case the records are put back
+        at the front of the queue.
+        """
+        with self._cond:
+            count = min(self.batch_size, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(count)]
+        if not batch:
+            return 0
+        self.lock.acquire()
+        try:
+            self._send_batch(batch)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._close()
+            with self._cond:
+                self._enqueue(batch, front=True)
+            if self.verbose:
+                print("Unable to send records to fluentd: {}".format(exc))
+            return None
+        finally:
+            self.lock.release()
+        with self._cond:
+            self._sent += len(batch)
+        return len(batch)
+
+    def _send_batch(self, batch):
+        # Group consecutive records with the same tag in one message
+        chunks = []
+        for tag, timestamp, data in batch:
+            entry = salt.utils.msgpack.packb((timestamp, data))
+            if chunks and chunks[-1][0] == tag:
+                chunks[-1][1].append(entry)
+            else:
+                chunks.append((tag, [entry]))
+
+        self._reconnect()
+        for tag, entries in chunks:
+            option = {"size": len(entries)}
+            entries = b"".join(entries)
+            if self.compressed:
+                entries = gzip.compress(entries)
+                option["compressed"] = "gzip"
+            if self.require_ack:
+                option["chunk"] = base64.b64encode(uuid.uuid4().bytes).decode()
+            self.socket.sendall(
+                salt.utils.msgpack.packb([tag, entries, option], use_bin_type=True)
+            )
+            if self.require_ack:
+                self._wait_ack(option["chunk"])
+
+    def _wait_ack(self, chunk):
+        unpacker = salt.utils.msgpack.Unpacker(raw=False)
+        while True:
+            data = self.socket.recv(4096)
+            if not data:
+                raise OSError("Connection closed while waiting for fluentd ack")
+            unpacker.feed(data)
+            for response in unpacker:
+                if isinstance(response, dict) and response.get("ack") == chunk:
+                    return
+                raise OSError("Unexpected response from fluentd: {}".format(response))
@@ -135,6 +135,44 @@
     The `high water mark`_ for the ZMQ socket setting. Only applicable for the
     ``logstash_zmq_handler``.
 
+    Queued Sending
+    ..............
+
+    By default each record is formatted and sent by the thread that logged it,
+    as its own UDP datagram or ZMQ message. Both configuration sections accept
+    a ``queue`` setting. When it is enabled, records are put on a bounded queue
+    and a background thread formats and sends them in batches:
+
+    .. code-block:: yaml
+
+        logstash_udp_handler:
+          host: 127.0.0.1
+          port: 9999
+          version: 1
+          queue: True
+          queue_size: 10000
+          batch_size: 100
+          flush_interval: 0.5
+
+    ``queue_size``
+        Maximum number of records waiting to be sent. When the queue is full,
+        the oldest records are dropped.
+
+    ``batch_size``
+        Maximum number of records sent together.
+
+    ``flush_interval``
+        Maximum number of seconds a record waits in the queue before it is
+        sent.
+
+    The UDP handler then sends newline separated records, packing as many as
+    fit in one datagram, so the `Logstash`_ UDP input must use the
+    ``json_lines`` codec. The ZMQ handler sends each batch as one multipart
+    message, one record per frame.
+
+    If the ``orjson`` library is installed, it is used to serialize the
+    records.
+
 
 
     .. admonition:: Inspiration
@@ -155,10 +193,12 @@
 """
 
 
+import copy
 import datetime
 import logging
 import logging.handlers
 import os
+import threading
 
 import salt.utils.json
 import salt.utils.network
@@ -171,11 +211,73 @@ try:
 except ImportError:
     pass
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 log = logging.getLogger(__name__)
 
 # Define the module's virtual name
 __virtualname__ = "logstash"
 
+# LogRecord attributes which are either already part of the message or not sent
+_SKIPPED_RECORD_ATTRS = frozenset(
+    (
+        "args",
+        "asctime",
+        "created",
+        "exc_info",
+        "exc_text",
+        "filename",
+        "funcName",
+        "id",
+        "levelname",
+        "levelno",
+        "lineno",
+        "module",
+        "msecs",
+        "message",
+        "msg",
+        "name",
+        "pathname",
+        "process",
+        "processName",
+        "relativeCreated",
+        "thread",
+        "threadName",
+    )
+)
+
+
+def _dumps(message_dict):
+    """
+    Serialize a message to JSON, with orjson when it's available and able to
+    handle the message
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(message_dict).decode()
+        except TypeError:
+            pass
+    return salt.utils.json.dumps(message_dict)
+
+
+def _queue_options(handler_opts):
+    """
+    Return the keyword arguments for QueuedLogstashHandler from the handler
+    configuration, or ``None`` if queueing is not enabled
+    """
+    if not handler_opts.get("queue", False):
+        return None
+    return {
+        key: handler_opts[key]
+        for key in ("queue_size", "batch_size", "flush_interval")
+        if key in handler_opts
+    }
+
 
 def __virtual__():
     if not any(
@@ -210,6 +312,9 @@ def setup_handlers():
             logstash_formatter = LogstashFormatter(msg_type=msg_type, version=version)
             udp_handler = DatagramLogstashHandler(host, port)
             udp_handler.setFormatter(logstash_formatter)
+            queue_opts = _queue_options(__opts__["logstash_udp_handler"])
+            if queue_opts is not None:
+                udp_handler = QueuedLogstashHandler(udp_handler, **queue_opts)
             udp_handler.setLevel(
                 LOG_LEVELS[
                     __opts__["logstash_udp_handler"].get(
@@ -241,6 +346,9 @@ def setup_handlers():
             logstash_formatter = LogstashFormatter(version=version)
             zmq_handler = ZMQLogstashHander(address, zmq_hwm=zmq_hwm)
             zmq_handler.setFormatter(logstash_formatter)
+            queue_opts = _queue_options(__opts__["logstash_zmq_handler"])
+            if queue_opts is not None:
+                zmq_handler = QueuedLogstashHandler(zmq_handler, **queue_opts)
             zmq_handler.setLevel(
                 LOG_LEVELS[
                     __opts__["logstash_zmq_handler"].get(
@@ -267,13 +375,27 @@ class LogstashFormatter(logging.Formatter):
         self.msg_type = msg_type
         self.version = version
         self.format = getattr(self, "format_v{}".format(version))
+        self._host = None
         super().__init__(fmt=None, datefmt=None)
 
+    @property
+    def host(self):
+        # The hostname doesn't change between records, only look it up once
+        if self._host is None:
+            self._host = salt.utils.network.get_fqhostname()
+        return self._host
+
     def formatTime(self, record, datefmt=None):
         return datetime.datetime.utcfromtimestamp(record.created).isoformat()[:-3] + "Z"
 
+    def _exc_text(self, record):
+        if record.exc_info:
+            return self.formatException(record.exc_info)
+        # Records queued by QueuedLogstashHandler carry the formatted exception
+        return record.exc_text
+
     def format_v0(self, record):
-        host = salt.utils.network.get_fqhostname()
+        host = self.host
         message_dict = {
             "@timestamp": self.formatTime(record),
             "@fields": {
@@ -294,55 +416,28 @@ class LogstashFormatter(logging.Formatter):
             "@type": self.msg_type,
         }
 
-        if record.exc_info:
-            message_dict["@fields"]["exc_info"] = self.formatException(record.exc_info)
+        exc_text = self._exc_text(record)
+        if exc_text:
+            message_dict["@fields"]["exc_info"] = exc_text
 
         # Add any extra attributes to the message field
+        fields = message_dict["@fields"]
         for key, value in record.__dict__.items():
-            if key in (
-                "args",
-                "asctime",
-                "created",
-                "exc_info",
-                "exc_text",
-                "filename",
-                "funcName",
-                "id",
-                "levelname",
-                "levelno",
-                "lineno",
-                "module",
-                "msecs",
-                "msecs",
-                "message",
-                "msg",
-                "name",
-                "pathname",
-                "process",
-                "processName",
-                "relativeCreated",
-                "thread",
-                "threadName",
-            ):
+            if key in _SKIPPED_RECORD_ATTRS:
                 # These are already handled above or not handled at all
                 continue
 
-            if value is None:
-                message_dict["@fields"][key] = value
-                continue
-
-            if isinstance(value, (str, bool, dict, float, int, list)):
-                message_dict["@fields"][key] = value
-                continue
-
-            message_dict["@fields"][key] = repr(value)
-        return salt.utils.json.dumps(message_dict)
+            if value is None or isinstance(value, (str, bool, dict, float, int, list)):
+                fields[key] = value
+            else:
+                fields[key] = repr(value)
+        return _dumps(message_dict)
 
     def format_v1(self, record):
         message_dict = {
             "@version": 1,
             "@timestamp": self.formatTime(record),
-            "host": salt.utils.network.get_fqhostname(),
+            "host": self.host,
             "levelname": record.levelname,
             "logger": record.name,
             "lineno": record.lineno,
@@ -356,49 +451,21 @@ class LogstashFormatter(logging.Formatter):
             "type": self.msg_type,
         }
 
-        if record.exc_info:
-            message_dict["exc_info"] = self.formatException(record.exc_info)
+        exc_text = self._exc_text(record)
+        if exc_text:
+            message_dict["exc_info"] = exc_text
 
         # Add any extra attributes to the message field
         for key, value in record.__dict__.items():
-            if key in (
-                "args",
-                "asctime",
-                "created",
-                "exc_info",
-                "exc_text",
-                "filename",
-                "funcName",
-                "id",
-                "levelname",
-                "levelno",
-                "lineno",
-                "module",
-                "msecs",
-                "msecs",
-                "message",
-                "msg",
-                "name",
-                "pathname",
-                "process",
-                "processName",
-                "relativeCreated",
-                "thread",
-                "threadName",
-            ):
+            if key in _SKIPPED_RECORD_ATTRS:
                 # These are already handled above or not handled at all
                 continue
 
-            if value is None:
+            if value is None or isinstance(value, (str, bool, dict, float, int, list)):
                 message_dict[key] = value
-                continue
-
-            if isinstance(value, (str, bool, dict, float, int, list)):
-                message_dict[key] = value
-                continue
-
-            message_dict[key] = repr(value)
-        return salt.utils.json.dumps(message_dict)
+            else:
+                message_dict[key] = repr(value)
+        return _dumps(message_dict)
 
 
 class DatagramLogstashHandler(logging.handlers.DatagramHandler):
@@ -406,9 +473,29 @@ class DatagramLogstashHandler(logging.handlers.DatagramHandler):
     Logstash UDP logging handler.
     """
 
+    # Keep batched datagrams below the usual UDP input buffer size
+    max_datagram_size = 8192
+
     def makePickle(self, record):
         return salt.utils.stringutils.to_bytes(self.format(record))
 
+    def send_batch(self, frames):
+        """
+        Send the formatted records newline separated, as many per datagram as
+        fit in ``max_datagram_size``
+        """
+        datagram = []
+        size = 0
+        for frame in frames:
+            if datagram and size + len(frame) + 1 > self.max_datagram_size:
+                self.send(b"\n".join(datagram) + b"\n")
+                datagram = []
+                size = 0
+            datagram.append(frame)
+            size += len(frame) + 1
+        if datagram:
+            self.send(b"\n".join(datagram) + b"\n")
+
 
 class ZMQLogstashHander(logging.Handler):
     """
@@ -448,6 +535,12 @@ class ZMQLogstashHander(logging.Handler):
         formatted_object = salt.utils.stringutils.to_bytes(self.format(record))
         self.publisher.send(formatted_object)
 
+    def send_batch(self, frames):
+        """
+        Send the formatted records as one multipart message
+        """
+        self.publisher.send_multipart(frames)
+
     def close(self):
         if self._context is not None:
             # One second to send any queued messages
@@ -460,3 +553,150 @@ class ZMQLogstashHander(logging.Handler):
 
                 if self._context.closed is False:
                     self._context.term()
+
+
+class QueuedLogstashHandler(logging.Handler):
+    """
+    Logging handler which queues the records and has a background thread
+    format them and hand them, in batches, to the ``send_batch`` method of a
+    :py:class:`DatagramLogstashHandler` or :py:class:`ZMQLogstashHander`.
+    """
+
+    def __init__(
+        self,
+        handler,
+        level=logging.NOTSET,
+        queue_size=10000,
+        batch_size=100,
+        flush_interval=0.5,
+    ):
+        super().__init__(level=level)
+        self.handler = handler
+        self.queue_size = int(queue_size)
+        self.batch_size = int(batch_size)
+        self.flush_interval = float(flush_interval)
+        self.dropped = 0
+        self._queue = []
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._flush_requested = False
+        self._sending = False
+        self._worker = None
+        self._pid = None
+
+    def setFormatter(self, fmt):
+        self.handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        """
+        Copy the record, resolving everything that may not be valid anymore by
+        the time the background thread formats it
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.handler.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            record = self.prepare(record)
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+            return
+        with self._cond:
+            self._queue.append(record)
+            if len(self._queue) > self.queue_size:
+                # Drop the oldest records
+                overflow = len(self._queue) - self.queue_size
+                del self._queue[:overflow]
+                self.dropped += overflow
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        self._start_worker()
+
+    def flush(self):
+        """
+        Wait for the background thread to send everything in the queue
+        """
+        with self._cond:
+            if self._worker is None or self._pid != os.getpid():
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: not self._queue and not self._sending,
+                timeout=self.flush_interval + 5,
+            )
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._worker is not None and self._pid == os.getpid():
+            self._worker.join(self.flush_interval + 5)
+        self.handler.close()
+        super().close()
+
+    def _start_worker(self):
+        pid = os.getpid()
+        if self._pid == pid and self._worker is not None:
+            return
+        with self._cond:
+            if self._pid == pid and self._worker is not None:
+                return
+            # Also reached after a fork, the parent's thread isn't running here
+            self._pid = pid
+            self._stopped = False
+            self._worker = threading.Thread(
+                target=self._run, name="QueuedLogstashHandler", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self):
+        # Only this thread touches the sockets of the wrapped handler
+        while True:
+            with self._cond:
+                if (
+                    not self._stopped
+                    and not self._flush_requested
+                    and len(self._queue) < self.batch_size
+                ):
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            while self._send_batch():
+                pass
+            with self._cond:
+                self._flush_requested = False
+                self._cond.notify_all()
+            if stopped:
+                return
+
+    def _send_batch(self):
+        with self._cond:
+            batch = self._queue[: self.batch_size]
+            del self._queue[: self.batch_size]
+            self._sending = bool(batch)
+        if not batch:
+            return 0
+        frames = []
+        for record in batch:
+            try:
+                frames.append(
+                    salt.utils.stringutils.to_bytes(self.handler.format(record))
+                )
+            except Exception:  # pylint: disable=broad-except
+                self.handleError(record)
+        try:
+            self.handler.send_batch(frames)
+        except Exception:  # pylint: disable=broad-except
+            with self._cond:
+                self.dropped += len(frames)
+            self.handleError(batch[0])
+        finally:
+            with self._cond:
+                self._sending = False
+        return len(batch)
@@ -81,10 +81,20 @@ def __virtual__():
     return True
 
 
-def _get_instance(hosts=None, profile=None):
+def _get_instance(hosts=None, profile=None, cached=False):
     """
     Return the elasticsearch instance
+
+    With ``cached`` set, the client built for the same hosts and profile is
+    kept in ``__context__`` and reused, skipping the connection check after
+    the first call.
     """
+    if cached:
+        key = "elasticsearch.instance.{!r}.{!r}".format(hosts, profile)
+        if key not in __context__:
+            __context__[key] = _get_instance(hosts, profile)
+        return __context__[key]
+
     es = None
     proxies = None
     use_ssl = False
@@ -533,6 +543,37 @@ def document_create(
         )
 
 
+def document_bulk(body, index=None, doc_type=None, hosts=None, profile=None):
+    """
+    Send several index, create, update or delete actions in a single
+    ``_bulk`` request, reusing the client across calls
+
+    body
+        Newline delimited JSON actions as described in the Elasticsearch bulk API
+    index
+        Default index for actions which do not set ``_index``
+    doc_type
+        Default type for actions which do not set ``_type``
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt myminion elasticsearch.document_bulk '{"index": {"_index": "testindex"}}
+        {"foo": "bar"}
+        '
+    """
+    es = _get_instance(hosts, profile, cached=True)
+    try:
+        return es.bulk(body=body, index=index, doc_type=doc_type)
+    except elasticsearch.TransportError as e:
+        raise CommandExecutionError(
+            "Cannot send bulk request, server returned code {} with message {}".format(
+                e.status_code, e.error
+            )
+        )
+
+
 def document_delete(index, doc_type, id, hosts=None, profile=None):
     """
     Delete a document from an index
@@ -7,6 +7,7 @@ lxc >= 1.0 (even beta alpha) is required
 
 """
 
+import concurrent.futures
 import copy
 import datetime
 import difflib
@@ -2194,7 +2195,66 @@ def ls_(active=None, cache=True, path=None):
         return ret
 
 
-def list_(extra=False, limit=None, path=None):
+def _get_state_from_info(name, path=None):
+    """
+    Return the state of a container as reported by ``lxc-info``, lowercased
+    """
+    cmd = "lxc-info"
+    if path:
+        cmd += f" -P {shlex.quote(path)}"
+    cmd += f" -n {name}"
+    c_info = __salt__["cmd.run"](cmd, python_shell=False, output_loglevel="debug")
+    for line in c_info.splitlines():
+        stat = line.split(":")
+        if stat[0].lower() == "state":
+            return stat[1].strip().lower()
+    return None
+
+
+def _get_states(path=None, cache=True):
+    """
+    Return a dictionary mapping each container to its state, lowercased.
+
+    All the states are read from a single ``lxc-ls --fancy`` call. If this
+    fails (e.g. on a lxc-ls too old to support ``--fancy-format``), fall back
+    to calling ``lxc-info`` for each container.
+
+    The result is kept in ``__context__`` and is also used to seed the cache
+    of :mod:`lxc.state <salt.modules.lxc.state>`, so that the containers
+    states are only fetched once per run.
+    """
+    contextvar = f"lxc.states{path}"
+    if cache and contextvar in __context__:
+        return __context__[contextvar]
+
+    cmd = "lxc-ls --fancy --fancy-format name,state"
+    if path:
+        cmd += f" -P {shlex.quote(path)}"
+    result = __salt__["cmd.run_all"](cmd, python_shell=False, output_loglevel="debug")
+    states = {}
+    if result["retcode"] == 0:
+        # Skip the header, and the dashes line printed by some lxc versions
+        for line in result["stdout"].splitlines()[1:]:
+            comps = line.split()
+            if len(comps) < 2 or not comps[0].strip("-"):
+                continue
+            states[comps[0]] = comps[1].lower()
+    else:
+        log.debug(
+            "Unable to get the containers states using lxc-ls, falling back "
+            "to lxc-info: %s",
+            result["stderr"],
+        )
+        for container in ls_(cache=cache, path=path):
+            states[container] = _get_state_from_info(container, path=path)
+
+    __context__[contextvar] = states
+    for container, c_state in states.items():
+        __context__[f"lxc.state.{container}{path}"] = c_state
+    return states
+
+
+def list_(extra=False, limit=None, path=None, workers=None):
     """
     List containers classified by state
 
@@ -2216,15 +2276,22 @@ def list_(extra=False, limit=None, path=None):
 
         .. versionadded:: 2015.5.0
 
+    workers
+        When ``extra`` is ``True``, the number of containers to get the info
+        of concurrently. By default, the containers are handled one at a time.
+
+        .. versionadded:: 3008.0
+
     CLI Examples:
 
     .. code-block:: bash
 
         salt '*' lxc.list
         salt '*' lxc.list extra=True
+        salt '*' lxc.list extra=True workers=8
         salt '*' lxc.list limit=running
     """
-    ctnrs = ls_(path=path)
+    states = _get_states(path=path, cache=False)
 
     if extra:
         stopped = {}
@@ -2237,39 +2304,26 @@ def list_(extra=False, limit=None, path=None):
 
     ret = {"running": running, "stopped": stopped, "frozen": frozen}
 
-    for container in ctnrs:
-        cmd = "lxc-info"
-        if path:
-            cmd += f" -P {shlex.quote(path)}"
-        cmd += f" -n {container}"
-        c_info = __salt__["cmd.run"](cmd, python_shell=False, output_loglevel="debug")
-        c_state = None
-        for line in c_info.splitlines():
-            stat = line.split(":")
-            if stat[0] in ("State", "state"):
-                c_state = stat[1].strip()
-                break
+    selected = [
+        (container, c_state)
+        for container, c_state in states.items()
+        if c_state in ret and (limit is None or c_state == limit)
+    ]
 
-        if not c_state or (limit is not None and c_state.lower() != limit):
-            continue
-
-        if extra:
-            infos = info(container, path=path)
-            method = "update"
-            value = {container: infos}
+    if extra:
+        names = [container for container, _ in selected]
+        if workers and int(workers) > 1 and len(names) > 1:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=int(workers)
+            ) as executor:
+                infos = list(executor.map(lambda name: info(name, path=path), names))
         else:
-            method = "append"
-            value = container
-
-        if c_state == "STOPPED":
-            getattr(stopped, method)(value)
-            continue
-        if c_state == "FROZEN":
-            getattr(frozen, method)(value)
-            continue
-        if c_state == "RUNNING":
-            getattr(running, method)(value)
-            continue
+            infos = [info(name, path=path) for name in names]
+        for (container, c_state), c_info in zip(selected, infos):
+            ret[c_state][container] = c_info
+    else:
+        for container, c_state in selected:
+            ret[c_state].append(container)
 
     if limit is not None:
         return ret.get(limit, {} if extra else [])
@@ -45,6 +45,39 @@ support.
 To use the SSH transport, on the minion setup an SSH agent with a key authorized on
 the remote libvirt machine.
 
+Connection caching
+------------------
+
+.. versionadded:: 3008.0
+
+By default every call opens a new libvirt connection and closes it when done.
+Processes running many calls, like a minion with ``multiprocessing: False``
+or beacons polling the domains, can keep the connections open instead:
+
+.. code-block:: yaml
+
+    virt:
+      connection:
+        cache: True
+
+The connections are then cached per process, URI and credentials, and checked
+to still be alive before being reused.
+
+Storage index caching
+---------------------
+
+.. versionadded:: 3008.0
+
+Reporting the disks of the domains requires an index of all the storage volumes
+of the running pools. It is built once per call, but can also be reused by the
+following calls of the same process for a number of seconds:
+
+.. code-block:: yaml
+
+    virt:
+      storage_index:
+        ttl: 60
+
 Per call connection setup
 -------------------------
 
@@ -121,6 +154,7 @@ YB      10**24
 
 import base64
 import collections
+import contextlib
 import copy
 import datetime
 import logging
@@ -184,6 +218,33 @@ VIRT_STATE_NAME_MAP = {
 }
 
 
+# Libvirt connections kept open when virt:connection:cache is set, keyed by
+# (pid, uri, username, password)
+_CONNECTIONS = {}
+
+# Storage indexes kept when virt:storage_index:ttl is set, keyed by (pid, uri)
+_STORAGE_INDEXES = {}
+
+# Groups of statistics returned by domain_stats
+DOMAIN_STATS_GROUPS = ("state", "cpu", "balloon", "vcpu", "net", "block")
+
+
+class _SharedConnection:
+    """
+    Wrapper around a cached libvirt connection, ignoring the ``close()`` calls
+    of the functions using it.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        return 0
+
+
 def __virtual__():
     if not HAS_LIBVIRT:
         return (False, "Unable to locate or import python libvirt library.")
@@ -253,6 +314,24 @@ def __get_conn(**kwargs):
     if not conn_str:
         conn_str = __salt__["config.get"]("virt:connection:uri", conn_str)
 
+    cache = __salt__["config.get"]("virt:connection:cache", False)
+    cache_key = (os.getpid(), conn_str, username, password)
+    if cache:
+        cached = _CONNECTIONS.pop(cache_key, None)
+        if cached is not None:
+            try:
+                alive = cached.isAlive()
+            except libvirt.libvirtError:
+                alive = False
+            if alive:
+                _CONNECTIONS[cache_key] = cached
+                return _SharedConnection(cached)
+            log.debug("Cached libvirt connection to %s is dead, reopening", conn_str)
+            try:
+                cached.close()
+            except libvirt.libvirtError:
+                pass
+
     try:
         auth_types = [
             libvirt.VIR_CRED_AUTHNAME,
@@ -269,6 +348,9 @@ def __get_conn(**kwargs):
             "Sorry, {} failed to open a connection to the hypervisor "
             "software at {}".format(__grains__["fqdn"], conn_str)
         )
+    if cache:
+        _CONNECTIONS[cache_key] = conn
+        return _SharedConnection(conn)
     return conn
 
 
@@ -284,9 +366,14 @@ def _get_domain(conn, *vms, **kwargs):
     lookup_vms = list()
 
     all_vms = []
+    # Keep the domains found by ID, no need to look them up again by name
+    active_doms = {}
     if kwargs.get("active", True):
         for id_ in conn.listDomainsID():
-            all_vms.append(conn.lookupByID(id_).name())
+            dom = conn.lookupByID(id_)
+            name = dom.name()
+            active_doms[name] = dom
+            all_vms.append(name)
 
     if kwargs.get("inactive", True):
         for id_ in conn.listDefinedDomains():
@@ -307,7 +394,8 @@ def _get_domain(conn, *vms, **kwargs):
         lookup_vms = list(all_vms)
 
     for name in lookup_vms:
-        ret.append(conn.lookupByName(name))
+        dom = active_doms.get(name)
+        ret.append(dom if dom is not None else conn.lookupByName(name))
 
     return len(ret) == 1 and not kwargs.get("iterable") and ret[0] or ret
 
@@ -370,7 +458,7 @@ def _parse_qemu_img_info(info):
     return disks[0]
 
 
-def _get_uuid(dom):
+def _get_uuid(dom, doc=None):
     """
     Return a uuid from the named vm
 
@@ -380,10 +468,12 @@ def _get_uuid(dom):
 
         salt '*' virt.get_uuid <domain>
     """
-    return ElementTree.fromstring(get_xml(dom)).find("uuid").text
+    if doc is None:
+        doc = ElementTree.fromstring(get_xml(dom))
+    return doc.find("uuid").text
 
 
-def _get_on_poweroff(dom):
+def _get_on_poweroff(dom, doc=None):
     """
     Return `on_poweroff` setting from the named vm
 
@@ -393,11 +483,13 @@ def _get_on_poweroff(dom):
 
         salt '*' virt.get_on_restart <domain>
     """
-    node = ElementTree.fromstring(get_xml(dom)).find("on_poweroff")
+    if doc is None:
+        doc = ElementTree.fromstring(get_xml(dom))
+    node = doc.find("on_poweroff")
     return node.text if node is not None else ""
 
 
-def _get_on_reboot(dom):
+def _get_on_reboot(dom, doc=None):
     """
     Return `on_reboot` setting from the named vm
 
@@ -407,11 +499,13 @@ def _get_on_reboot(dom):
 
         salt '*' virt.get_on_reboot <domain>
     """
-    node = ElementTree.fromstring(get_xml(dom)).find("on_reboot")
+    if doc is None:
+        doc = ElementTree.fromstring(get_xml(dom))
+    node = doc.find("on_reboot")
     return node.text if node is not None else ""
 
 
-def _get_on_crash(dom):
+def _get_on_crash(dom, doc=None):
     """
     Return `on_crash` setting from the named vm
 
@@ -421,17 +515,21 @@ def _get_on_crash(dom):
 
         salt '*' virt.get_on_crash <domain>
     """
-    node = ElementTree.fromstring(get_xml(dom)).find("on_crash")
+    if doc is None:
+        doc = ElementTree.fromstring(get_xml(dom))
+    node = doc.find("on_crash")
     return node.text if node is not None else ""
 
 
-def _get_nics(dom):
+def _get_nics(dom, inactive_doc=None):
     """
     Get domain network interfaces from a libvirt domain object.
     """
     nics = {}
     # Don't expose the active configuration since it may be changed by libvirt
-    doc = ElementTree.fromstring(dom.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE))
+    doc = inactive_doc
+    if doc is None:
+        doc = ElementTree.fromstring(dom.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE))
     for iface_node in doc.findall("devices/interface"):
         nic = {}
         nic["type"] = iface_node.get("type")
@@ -462,7 +560,7 @@ def _get_nics(dom):
     return nics
 
 
-def _get_graphics(dom):
+def _get_graphics(dom, doc=None):
     """
     Get domain graphics from a libvirt domain object.
     """
@@ -473,19 +571,21 @@ def _get_graphics(dom):
         "port": "None",
         "type": "None",
     }
-    doc = ElementTree.fromstring(dom.XMLDesc(0))
+    if doc is None:
+        doc = ElementTree.fromstring(dom.XMLDesc(0))
     for g_node in doc.findall("devices/graphics"):
         for key, value in g_node.attrib.items():
             out[key] = value
     return out
 
 
-def _get_loader(dom):
+def _get_loader(dom, doc=None):
     """
     Get domain loader from a libvirt domain object.
     """
     out = {"path": "None"}
-    doc = ElementTree.fromstring(dom.XMLDesc(0))
+    if doc is None:
+        doc = ElementTree.fromstring(dom.XMLDesc(0))
     for g_node in doc.findall("os/loader"):
         out["path"] = g_node.text
         for key, value in g_node.attrib.items():
@@ -493,14 +593,20 @@ def _get_loader(dom):
     return out
 
 
-def _get_disks(conn, dom):
+def _get_disks(conn, dom, doc=None, all_volumes=None):
     """
     Get domain disks from a libvirt domain object.
+
+    :param doc: the parsed XML definition of the domain, if already available
+    :param all_volumes: the storage index returned by ``_get_all_volumes_paths``,
+        to share it between several domains
     """
     disks = {}
-    doc = ElementTree.fromstring(dom.XMLDesc(0))
+    if doc is None:
+        doc = ElementTree.fromstring(dom.XMLDesc(0))
     # Get the path, pool, volume name of each volume we can
-    all_volumes = _get_all_volumes_paths(conn)
+    if all_volumes is None:
+        all_volumes = _get_all_volumes_paths(conn)
     for elem in doc.findall("devices/disk"):
         source = elem.find("source")
         if source is None:
@@ -514,13 +620,19 @@ def _get_disks(conn, dom):
         if "dev" in target.attrib:
             disk_type = elem.get("type")
 
-            def _get_disk_volume_data(pool_name, volume_name):
+            def _get_disk_volume_data(pool_name, volume_name, indexed=None):
                 qemu_target = "{}/{}".format(pool_name, volume_name)
-                pool = conn.storagePoolLookupByName(pool_name)
                 extra_properties = {}
                 try:
-                    vol = pool.storageVolLookupByName(volume_name)
-                    vol_info = vol.info()
+                    if indexed is not None:
+                        # The storage index already has the volume infos
+                        vol_info = indexed["info"]
+                        vol_desc = indexed["xml"]
+                    else:
+                        pool = conn.storagePoolLookupByName(pool_name)
+                        vol = pool.storageVolLookupByName(volume_name)
+                        vol_info = vol.info()
+                        vol_desc = None
                     extra_properties = {
                         "virtual size": vol_info[1],
                         "disk size": vol_info[2],
@@ -545,7 +657,8 @@ def _get_disks(conn, dom):
                     else:
                         # In some cases the backing chain is not displayed by the domain definition
                         # Try to see if we have some of it in the volume definition.
-                        vol_desc = ElementTree.fromstring(vol.XMLDesc())
+                        if vol_desc is None:
+                            vol_desc = ElementTree.fromstring(vol.XMLDesc())
                         backing_path = vol_desc.find("./backingStore/path")
                         backing_format = vol_desc.find("./backingStore/format")
                         if backing_path is not None:
@@ -574,7 +687,7 @@ def _get_disks(conn, dom):
                     # If the qemu_target is a known path, output a volume
                     volume = all_volumes[qemu_target]
                     qemu_target, extra_properties = _get_disk_volume_data(
-                        volume["pool"], volume["name"]
+                        volume["pool"], volume["name"], volume
                     )
                 elif elem.get("device", "disk") != "cdrom":
                     # Extract disk sizes, snapshots, backing files
@@ -608,7 +721,7 @@ def _get_disks(conn, dom):
                 if qemu_target in all_volumes.keys():
                     volume = all_volumes[qemu_target]
                     qemu_target, extra_properties = _get_disk_volume_data(
-                        volume["pool"], volume["name"]
+                        volume["pool"], volume["name"], volume
                     )
             elif disk_type == "network":
                 qemu_target = source.get("protocol")
@@ -4334,17 +4447,22 @@ def vm_info(vm_=None, **kwargs):
         Compute the infos of a domain
         """
         raw = dom.info()
+        # Parse the definitions only once for all the helpers
+        doc = ElementTree.fromstring(dom.XMLDesc(0))
+        inactive_doc = ElementTree.fromstring(
+            dom.XMLDesc(libvirt.VIR_DOMAIN_XML_INACTIVE)
+        )
         return {
             "cpu": raw[3],
             "cputime": int(raw[4]),
-            "disks": _get_disks(conn, dom),
-            "graphics": _get_graphics(dom),
-            "nics": _get_nics(dom),
-            "uuid": _get_uuid(dom),
-            "loader": _get_loader(dom),
-            "on_crash": _get_on_crash(dom),
-            "on_reboot": _get_on_reboot(dom),
-            "on_poweroff": _get_on_poweroff(dom),
+            "disks": _get_disks(conn, dom, doc=doc, all_volumes=all_volumes),
+            "graphics": _get_graphics(dom, doc=doc),
+            "nics": _get_nics(dom, inactive_doc=inactive_doc),
+            "uuid": _get_uuid(dom, doc=doc),
+            "loader": _get_loader(dom, doc=doc),
+            "on_crash": _get_on_crash(dom, doc=doc),
+            "on_reboot": _get_on_reboot(dom, doc=doc),
+            "on_poweroff": _get_on_poweroff(dom, doc=doc),
             "maxMem": int(raw[1]),
             "mem": int(raw[2]),
             "state": VIRT_STATE_NAME_MAP.get(raw[0], "unknown"),
@@ -4352,6 +4470,8 @@ def vm_info(vm_=None, **kwargs):
 
     info = {}
     conn = __get_conn(**kwargs)
+    # Shared by all the domains
+    all_volumes = _get_all_volumes_paths(conn)
     if vm_:
         info[vm_] = _info(conn, _get_domain(conn, vm_))
     else:
@@ -6034,6 +6154,100 @@ def vm_diskstats(vm_=None, **kwargs):
     return info
 
 
+def _parse_domain_stats(stats):
+    """
+    Turn the flat statistics of a domain returned by libvirt, like
+    ``net.0.rx.bytes``, into nested dictionaries. The statistics of the
+    numbered vcpus, interfaces and block devices are put in an ``items`` list.
+    """
+    ret = {}
+    for key, value in stats.items():
+        group, _, field = key.partition(".")
+        group_stats = ret.setdefault(group, {})
+        index, _, item_field = field.partition(".")
+        if index.isdigit() and item_field:
+            items = group_stats.setdefault("items", [])
+            index = int(index)
+            while len(items) <= index:
+                items.append({})
+            items[index][item_field.replace(".", "_")] = value
+        else:
+            group_stats[field.replace(".", "_")] = value
+    return ret
+
+
+def domain_stats(vm_=None, stats=None, **kwargs):
+    """
+    Return the state, cpu, balloon, vcpu, interface and block statistics of
+    all the domains, or the ones given, using one libvirt call.
+
+    .. versionadded:: 3008.0
+
+    :param vm_: domain name or list of domain names
+    :param stats: list of statistics groups to return, among ``state``,
+        ``cpu``, ``balloon``, ``vcpu``, ``net`` and ``block``. All of them are
+        returned by default.
+    :param connection: libvirt connection URI, overriding defaults
+    :param username: username to connect with, overriding defaults
+    :param password: password to connect with, overriding defaults
+
+    .. code-block:: python
+
+        {
+            'your-vm': {
+                'cpu': {'time': 15270000000, 'user': 960000000, 'system': 4410000000},
+                'balloon': {'current': 1048576, 'maximum': 1048576},
+                'vcpu': {'current': 1, 'maximum': 1, 'items': [{'state': 1}]},
+                'net': {'count': 1, 'items': [{'name': 'vnet0', 'rx_bytes': 2158}]},
+                ...
+            },
+            ...
+        }
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' virt.domain_stats
+        salt '*' virt.domain_stats vm01 stats='[cpu, net]'
+    """
+    stats_flags = {
+        "state": libvirt.VIR_DOMAIN_STATS_STATE,
+        "cpu": libvirt.VIR_DOMAIN_STATS_CPU_TOTAL,
+        "balloon": libvirt.VIR_DOMAIN_STATS_BALLOON,
+        "vcpu": libvirt.VIR_DOMAIN_STATS_VCPU,
+        "net": libvirt.VIR_DOMAIN_STATS_INTERFACE,
+        "block": libvirt.VIR_DOMAIN_STATS_BLOCK,
+    }
+    if isinstance(stats, str):
+        stats = [stats]
+    groups = stats or DOMAIN_STATS_GROUPS
+    unknown = [group for group in groups if group not in stats_flags]
+    if unknown:
+        raise SaltInvocationError(
+            "Unknown statistics groups: {}".format(", ".join(unknown))
+        )
+    flags = 0
+    for group in groups:
+        flags |= stats_flags[group]
+
+    conn = __get_conn(**kwargs)
+    try:
+        if vm_:
+            vms = [vm_] if isinstance(vm_, str) else vm_
+            doms = _get_domain(conn, *vms, iterable=True)
+            records = conn.domainListGetStats(doms, flags)
+        else:
+            records = conn.getAllDomainStats(flags)
+        return {
+            dom.name(): _parse_domain_stats(dom_stats) for dom, dom_stats in records
+        }
+    except libvirt.libvirtError as err:
+        raise CommandExecutionError(err.get_error_message())
+    finally:
+        conn.close()
+
+
 def _parse_snapshot_description(vm_snapshot, unix_time=False):
     """
     Parse XML doc and return a dict with the status values.
@@ -8612,54 +8826,101 @@ def _get_storage_vol(conn, pool, vol):
     return pool_obj.storageVolLookupByName(vol)
 
 
+@contextlib.contextmanager
+def _libvirt_errors_discarded():
+    """
+    Keep libvirt from logging the errors raised in the block, for instance when
+    getting the infos of volumes that have disappeared since the last pool
+    refresh.
+    """
+
+    def discarder(ctxt, error):  # pylint: disable=unused-argument
+        log.debug("Ignore libvirt error: %s", error[2])
+
+    libvirt.registerErrorHandler(discarder, None)
+    try:
+        yield
+    finally:
+        libvirt.registerErrorHandler(None, None)
+
+
+def _volume_info(vol):
+    """
+    Return the infos of a volume, or ``None`` if it isn't valid anymore
+    """
+    try:
+        return vol.info()
+    except libvirt.libvirtError:
+        return None
+
+
 def _is_valid_volume(vol):
     """
     Checks whether a volume is valid for further use since those may have disappeared since
     the last pool refresh.
     """
-    try:
-        # Getting info on an invalid volume raises error and libvirt logs an error
-        def discarder(ctxt, error):  # pylint: disable=unused-argument
-            log.debug("Ignore libvirt error: %s", error[2])
-
-        # Disable the libvirt error logging
-        libvirt.registerErrorHandler(discarder, None)
-        vol.info()
-        # Reenable the libvirt error logging
-        libvirt.registerErrorHandler(None, None)
-        return True
-    except libvirt.libvirtError as err:
-        return False
+    with _libvirt_errors_discarded():
+        return _volume_info(vol) is not None
+
+
+def _build_storage_index(conn):
+    """
+    Walk all the volumes of the running pools once and index them by path.
+    """
+    volumes = {}
+    with _libvirt_errors_discarded():
+        for pool in conn.listAllStoragePools():
+            if pool.info()[0] != libvirt.VIR_STORAGE_POOL_RUNNING:
+                continue
+            pool_name = pool.name()
+            for volume in pool.listAllVolumes():
+                vol_info = _volume_info(volume)
+                if vol_info is None:
+                    continue
+                vol_xml = ElementTree.fromstring(volume.XMLDesc())
+                volumes[volume.path()] = {
+                    "pool": pool_name,
+                    "name": volume.name(),
+                    "backing_stores": [
+                        path.text for path in vol_xml.findall(".//backingStore/path")
+                    ],
+                    "backing_for": [],
+                    "info": vol_info,
+                    "xml": vol_xml,
+                }
+
+    # Reverse edges of the backing chains
+    for path, volume in volumes.items():
+        for backing_path in volume["backing_stores"]:
+            if backing_path in volumes:
+                volumes[backing_path]["backing_for"].append(path)
+    return volumes
 
 
 def _get_all_volumes_paths(conn):
     """
     Extract the path, name, pool name and backing stores path of all volumes.
 
+    The returned index maps the path of each volume to a dictionary with the
+    ``pool`` and ``name`` of the volume, the paths of its ``backing_stores``,
+    the paths of the volumes using it as backing store in ``backing_for``, its
+    ``info`` and its parsed ``xml`` definition.
+
+    If ``virt:storage_index:ttl`` is set, the index is reused for that many
+    seconds.
+
     :param conn: libvirt connection to use
     """
-    pools = [
-        pool
-        for pool in conn.listAllStoragePools()
-        if pool.info()[0] == libvirt.VIR_STORAGE_POOL_RUNNING
-    ]
-    volumes = {}
-    for pool in pools:
-        pool_volumes = {
-            volume.path(): {
-                "pool": pool.name(),
-                "name": volume.name(),
-                "backing_stores": [
-                    path.text
-                    for path in ElementTree.fromstring(volume.XMLDesc()).findall(
-                        ".//backingStore/path"
-                    )
-                ],
-            }
-            for volume in pool.listAllVolumes()
-            if _is_valid_volume(volume)
-        }
-        volumes.update(pool_volumes)
+    ttl = __salt__["config.get"]("virt:storage_index:ttl", 0)
+    if not ttl:
+        return _build_storage_index(conn)
+
+    key = (os.getpid(), conn.getURI())
+    cached = _STORAGE_INDEXES.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    volumes = _build_storage_index(conn)
+    _STORAGE_INDEXES[key] = (time.monotonic() + ttl, volumes)
     return volumes
 
 
@@ -8710,9 +8971,13 @@ def volume_infos(pool=None, volume=None, **kwargs):
             :param vol: the libvirt storage volume object.
             """
             types = ["file", "block", "dir", "network", "netdir", "ploop"]
-            infos = vol.info()
-
-            vol_xml = ElementTree.fromstring(vol.XMLDesc())
+            indexed = backing_stores.get(vol.path())
+            if indexed is not None:
+                infos = indexed["info"]
+                vol_xml = indexed["xml"]
+            else:
+                infos = vol.info()
+                vol_xml = ElementTree.fromstring(vol.XMLDesc())
             backing_store_path = vol_xml.find("./backingStore/path")
             backing_store_format = vol_xml.find("./backingStore/format")
             backing_store = None
@@ -8729,11 +8994,14 @@ def volume_infos(pool=None, volume=None, **kwargs):
             # If we have a path, check its use.
             used_by = []
             if vol.path():
-                as_backing_store = {
-                    path
-                    for (path, volume) in backing_stores.items()
-                    if vol.path() in volume.get("backing_stores")
-                }
+                if indexed is not None:
+                    as_backing_store = set(indexed["backing_for"])
+                else:
+                    as_backing_store = {
+                        path
+                        for (path, volume) in backing_stores.items()
+                        if vol.path() in volume.get("backing_stores")
+                    }
                 used_by = [
                     vm_name
                     for (vm_name, vm_disks) in disks.items()
@@ -8751,6 +9019,19 @@ def volume_infos(pool=None, volume=None, **kwargs):
                 "format": format_node.get("type") if format_node is not None else None,
             }
 
+        def _is_listed_volume(vol):
+            """
+            Check the volume is valid, without querying libvirt again for the
+            volumes already in the storage index
+            """
+            with _libvirt_errors_discarded():
+                try:
+                    if vol.path() in backing_stores:
+                        return True
+                except libvirt.libvirtError:
+                    return False
+                return _volume_info(vol) is not None
+
         pools = [
             obj
             for obj in conn.listAllStoragePools()
@@ -8761,7 +9042,7 @@ def volume_infos(pool=None, volume=None, **kwargs):
             pool_obj.name(): {
                 vol.name(): _volume_extract_infos(vol)
                 for vol in pool_obj.listAllVolumes()
-                if (volume is None or vol.name() == volume) and _is_valid_volume(vol)
+                if (volume is None or vol.name() == volume) and _is_listed_volume(vol)
             }
             for pool_obj in pools
         }
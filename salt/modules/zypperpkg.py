@@ -24,11 +24,14 @@ import urllib.parse
 from xml.dom import minidom as dom
 from xml.parsers.expat import ExpatError
 
+import salt.utils.atomicfile
 import salt.utils.data
 import salt.utils.environment
 import salt.utils.event
 import salt.utils.files
 import salt.utils.functools
+import salt.utils.hashutils
+import salt.utils.json
 import salt.utils.path
 import salt.utils.pkg
 import salt.utils.pkg.rpm
@@ -49,6 +52,8 @@ LOCKS = f"{ZYPP_HOME}/locks"
 REPOS = f"{ZYPP_HOME}/repos.d"
 DEFAULT_PRIORITY = 99
 PKG_ARCH_SEPARATOR = "."
+RPMDB_PATHS = ("usr/lib/sysimage/rpm", "var/lib/rpm")
+RPMDB_FILES = ("rpmdb.sqlite", "rpmdb.sqlite-wal", "Packages.db", "Packages")
 
 # Define the module's virtual name
 __virtualname__ = "pkg"
@@ -684,7 +689,7 @@ def info_available(*names, **kwargs):
     while batch:
         pkg_info.extend(
             re.split(
-                r"Information for package*",
+                r"Information for (?:package|pattern|patch)\b",
                 __zypper__(root=root).nolock.call(
                     "info", "-t", "package", *batch[:batch_size]
                 ),
@@ -856,6 +861,118 @@ def _list_pkgs_from_context(versions_as_list, contextkey, attr):
     )
 
 
+def _list_rpmdb_pkgs(root=None):
+    """
+    List the packages installed in the rpm database with ``rpm -qa``
+    """
+    ret = {}
+    cmd = ["rpm"]
+    if root:
+        cmd.extend(["--root", root])
+    cmd.extend(
+        [
+            "-qa",
+            "--queryformat",
+            salt.utils.pkg.rpm.QUERYFORMAT.replace("%{REPOID}", "(none)") + "\n",
+        ]
+    )
+    output = __salt__["cmd.run"](cmd, python_shell=False, output_loglevel="trace")
+    for line in output.splitlines():
+        pkginfo = salt.utils.pkg.rpm.parse_pkginfo(line, osarch=__grains__["osarch"])
+        if pkginfo:
+            # see rpm version string rules available at https://goo.gl/UGKPNd
+            pkgver = pkginfo.version
+            epoch = None
+            release = None
+            if ":" in pkgver:
+                epoch, pkgver = pkgver.split(":", 1)
+            if "-" in pkgver:
+                pkgver, release = pkgver.split("-", 1)
+            all_attr = {
+                "epoch": epoch,
+                "version": pkgver,
+                "release": release,
+                "arch": pkginfo.arch,
+                "install_date": pkginfo.install_date,
+                "install_date_time_t": pkginfo.install_date_time_t,
+            }
+            __salt__["pkg_resource.add_pkg"](ret, pkginfo.name, all_attr)
+
+    _ret = {}
+    for pkgname in ret:
+        # Filter out GPG public keys packages
+        if pkgname.startswith("gpg-pubkey"):
+            continue
+        _ret[pkgname] = sorted(ret[pkgname], key=lambda d: d["version"])
+    return _ret
+
+
+def _rpmdb_signature(root=None):
+    """
+    Return a signature of the current state of the rpm database, made of the
+    inode, size and modification time of its files, or ``None`` if the
+    database cannot be found.
+    """
+    for dbpath in RPMDB_PATHS:
+        dbpath = os.path.realpath(os.path.join(root or "/", dbpath))
+        files = []
+        for name in RPMDB_FILES:
+            try:
+                stat = os.stat(os.path.join(dbpath, name))
+            except OSError:
+                continue
+            files.append([name, stat.st_ino, stat.st_size, stat.st_mtime_ns])
+        if files:
+            return {"path": dbpath, "files": files, "osarch": __grains__["osarch"]}
+    return None
+
+
+def _rpmdb_cache_file(root=None):
+    """
+    Return the path of the file caching the installed packages of the given
+    root, or ``None`` if this cache is disabled.
+    """
+    cachedir = __opts__.get("cachedir")
+    if not cachedir or not __opts__.get("zypper.list_pkgs_cache", True):
+        return None
+    return os.path.join(
+        cachedir,
+        "zypper",
+        "list_pkgs_{}.json".format(salt.utils.hashutils.sha256_digest(root or "/")),
+    )
+
+
+def _read_rpmdb_cache(cache_file, signature):
+    """
+    Return the installed packages cached on disk, if they were listed from the
+    rpm database in its current state.
+    """
+    if cache_file is None or signature is None:
+        return None
+    try:
+        with salt.utils.files.fopen(cache_file, "r") as fp_:
+            data = salt.utils.json.load(fp_)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("signature") != signature:
+        return None
+    return data.get("pkgs")
+
+
+def _write_rpmdb_cache(cache_file, signature, pkgs):
+    """
+    Cache on disk the installed packages listed from the rpm database
+    """
+    if cache_file is None or signature is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with salt.utils.atomicfile.atomic_open(cache_file, "w") as fp_:
+            salt.utils.json.dump({"signature": signature, "pkgs": pkgs}, fp_)
+    except OSError as exc:
+        log.debug("Unable to write the packages cache %s: %s", cache_file, exc)
+
+
 def list_pkgs(versions_as_list=False, root=None, includes=None, **kwargs):
     """
     List the packages currently installed as a dict. By default, the dict
@@ -894,6 +1011,14 @@ def list_pkgs(versions_as_list=False, root=None, includes=None, **kwargs):
     purge_desired:
         not supported
 
+    .. versionchanged:: 3008.0
+
+        The installed packages are cached in the minion's cache directory,
+        along with the state of the rpm database they were listed from. As long
+        as the rpm database does not change, the following jobs reuse this
+        cache instead of calling ``rpm -qa``. Set ``zypper.list_pkgs_cache`` to
+        ``False`` in the minion configuration to disable this cache.
+
     CLI Example:
 
     .. code-block:: bash
@@ -922,45 +1047,14 @@ def list_pkgs(versions_as_list=False, root=None, includes=None, **kwargs):
     if contextkey in __context__ and kwargs.get("use_context", True):
         return _list_pkgs_from_context(versions_as_list, contextkey, attr)
 
-    ret = {}
-    cmd = ["rpm"]
-    if root:
-        cmd.extend(["--root", root])
-    cmd.extend(
-        [
-            "-qa",
-            "--queryformat",
-            salt.utils.pkg.rpm.QUERYFORMAT.replace("%{REPOID}", "(none)") + "\n",
-        ]
-    )
-    output = __salt__["cmd.run"](cmd, python_shell=False, output_loglevel="trace")
-    for line in output.splitlines():
-        pkginfo = salt.utils.pkg.rpm.parse_pkginfo(line, osarch=__grains__["osarch"])
-        if pkginfo:
-            # see rpm version string rules available at https://goo.gl/UGKPNd
-            pkgver = pkginfo.version
-            epoch = None
-            release = None
-            if ":" in pkgver:
-                epoch, pkgver = pkgver.split(":", 1)
-            if "-" in pkgver:
-                pkgver, release = pkgver.split("-", 1)
-            all_attr = {
-                "epoch": epoch,
-                "version": pkgver,
-                "release": release,
-                "arch": pkginfo.arch,
-                "install_date": pkginfo.install_date,
-                "install_date_time_t": pkginfo.install_date_time_t,
-            }
-            __salt__["pkg_resource.add_pkg"](ret, pkginfo.name, all_attr)
-
-    _ret = {}
-    for pkgname in ret:
-        # Filter out GPG public keys packages
-        if pkgname.startswith("gpg-pubkey"):
-            continue
-        _ret[pkgname] = sorted(ret[pkgname], key=lambda d: d["version"])
+    _ret = None
+    cache_file = _rpmdb_cache_file(root=root)
+    signature = _rpmdb_signature(root=root) if cache_file else None
+    if kwargs.get("use_context", True):
+        _ret = _read_rpmdb_cache(cache_file, signature)
+    if _ret is None:
+        _ret = _list_rpmdb_pkgs(root=root)
+        _write_rpmdb_cache(cache_file, signature, _ret)
 
     for include in includes:
         if include == "product":
@@ -984,15 +1078,22 @@ def list_pkgs(versions_as_list=False, root=None, includes=None, **kwargs):
                 elements = list_installed_patches(root=root)
             else:
                 elements = []
+            # Get the details of all the elements with a single zypper call
+            infos = {}
+            if elements:
+                infos = info_available(
+                    *[f"{include}:{element}" for element in elements],
+                    refresh=False,
+                    root=root,
+                )
             for element in elements:
                 extended_name = f"{include}:{element}"
-                info = info_available(extended_name, refresh=False, root=root)
                 _ret[extended_name] = [
                     {
                         "epoch": None,
-                        "version": info[element]["version"],
+                        "version": infos[element]["version"],
                         "release": None,
-                        "arch": info[element]["arch"],
+                        "arch": infos[element]["arch"],
                         "install_date": None,
                         "install_date_time_t": None,
                     }
@@ -2746,6 +2847,11 @@ def search(criteria, refresh=False, **kwargs):
     root
         operate on a different root directory.
 
+    .. versionchanged:: 3008.0
+
+        ``criteria`` can be a list of search strings, to search for all of
+        them with a single zypper call.
+
     CLI Examples:
 
     .. code-block:: bash
@@ -2784,7 +2890,11 @@ def search(criteria, refresh=False, **kwargs):
         if opt in ALLOWED_SEARCH_OPTIONS:
             cmd.append(ALLOWED_SEARCH_OPTIONS.get(opt))
 
-    cmd.append(criteria)
+    if isinstance(criteria, (list, tuple)):
+        cmd.extend(criteria)
+        criteria = ", ".join(criteria)
+    else:
+        cmd.append(criteria)
     solvables = (
         __zypper__(root=root)
         .nolock.noraise.xml.call(*cmd)
@@ -3117,7 +3227,7 @@ def list_provides(root=None, **kwargs):
         cmd = ["rpm"]
         if root:
             cmd.extend(["--root", root])
-        cmd.extend(["-qa", "--queryformat", "%{PROVIDES}_|-%{NAME}\n"])
+        cmd.extend(["-qa", "--queryformat", "[%{PROVIDES}_|-%{NAME}\n]"])
         ret = dict()
         for line in __salt__["cmd.run"](
             cmd, output_loglevel="trace", python_shell=False
@@ -3135,6 +3245,96 @@ def list_provides(root=None, **kwargs):
     return ret
 
 
+def _find_provider(name, root=None):
+    """
+    Return the name of the package providing ``name``, and whether several
+    packages provide it.
+    """
+    try:
+        result = search(name, root=root, provides=True, match="exact")
+        if len(result) == 1:
+            return next(iter(result.keys())), False
+        elif len(result) > 1:
+            return name, True
+    except CommandExecutionError as exc:
+        # when search throws an exception stay with original name and version
+        log.debug("Search failed with: %s", exc)
+    return name, False
+
+
+def _resolve_capabilities(names, root=None):
+    """
+    Resolve the capabilities in ``names`` with as few zypper calls as possible.
+
+    All the names are first searched as package names with a single call. The
+    remaining ones are then searched as capabilities with a single call. If
+    all the packages found are installed, the index from :py:func:`list_provides`
+    tells which package provides which capability. Otherwise, each of these
+    capabilities is searched on its own.
+
+    Return a tuple with a dict mapping the resolved names to their package,
+    and the set of names provided by several packages.
+    """
+    resolved = {}
+    ambiguous = set()
+    lookup = []
+
+    names = sorted(set(names))
+    # Wildcards can't be matched back to the packages found, search them one
+    # by one
+    batch = []
+    for name in names:
+        if not any(char in name for char in "*?["):
+            batch.append(name)
+            continue
+        try:
+            search(name, root=root, match="exact")
+        except CommandExecutionError:
+            lookup.append(name)
+
+    if batch:
+        try:
+            found = {pkg.lower() for pkg in search(batch, root=root, match="exact")}
+        except CommandExecutionError:
+            found = set()
+        # zypper searches are case insensitive
+        batch = [name for name in batch if name.lower() not in found]
+
+    if len(batch) == 1:
+        lookup.extend(batch)
+    elif batch:
+        try:
+            providers = search(batch, root=root, provides=True, match="exact")
+        except CommandExecutionError as exc:
+            log.debug("Search failed with: %s", exc)
+            providers = {}
+        if providers and all(
+            attrs.get("kind", "package") == "package"
+            and attrs.get("status") == "installed"
+            for attrs in providers.values()
+        ):
+            index = {}
+            for provide, pkgs in list_provides(root=root).items():
+                index.setdefault(provide.lower(), set()).update(pkgs)
+            for name in batch:
+                pkgs = index.get(name.lower(), set()) & set(providers)
+                if len(pkgs) == 1:
+                    resolved[name] = next(iter(pkgs))
+                elif len(pkgs) > 1:
+                    ambiguous.add(name)
+        elif providers:
+            lookup.extend(batch)
+
+    for name in lookup:
+        pkg, is_ambiguous = _find_provider(name, root=root)
+        if is_ambiguous:
+            ambiguous.add(name)
+        elif pkg != name:
+            resolved[name] = pkg
+
+    return resolved, ambiguous
+
+
 def resolve_capabilities(pkgs, refresh=False, root=None, **kwargs):
     """
     .. versionadded:: 2018.3.0
@@ -3160,6 +3360,11 @@ def resolve_capabilities(pkgs, refresh=False, root=None, **kwargs):
         In case this option is set to False (Default) the input will
         be returned unchanged.
 
+        .. versionchanged:: 3008.0
+
+            All the names are searched with a couple of batched zypper
+            calls, instead of one or two calls per name.
+
     CLI Examples:
 
     .. code-block:: bash
@@ -3169,6 +3374,14 @@ def resolve_capabilities(pkgs, refresh=False, root=None, **kwargs):
     if refresh:
         refresh_db(root, **kwargs)
 
+    resolved = {}
+    ambiguous = set()
+    if kwargs.get("resolve_capabilities", False):
+        resolved, ambiguous = _resolve_capabilities(
+            [next(iter(pkg)) if isinstance(pkg, dict) else pkg for pkg in pkgs],
+            root=root,
+        )
+
     ret = list()
     for pkg in pkgs:
         if isinstance(pkg, dict):
@@ -3178,21 +3391,9 @@ def resolve_capabilities(pkgs, refresh=False, root=None, **kwargs):
             name = pkg
             version = None
 
-        if kwargs.get("resolve_capabilities", False):
-            try:
-                search(name, root=root, match="exact")
-            except CommandExecutionError:
-                # no package this such a name found
-                # search for a package which provides this name
-                try:
-                    result = search(name, root=root, provides=True, match="exact")
-                    if len(result) == 1:
-                        name = next(iter(result.keys()))
-                    elif len(result) > 1:
-                        log.warning("Found ambiguous match for capability '%s'.", pkg)
-                except CommandExecutionError as exc:
-                    # when search throws an exception stay with original name and version
-                    log.debug("Search failed with: %s", exc)
+        if name in ambiguous:
+            log.warning("Found ambiguous match for capability '%s'.", pkg)
+        name = resolved.get(name, name)
 
         if version:
             ret.append({name: version})
@@ -133,10 +133,23 @@ This behavior can be disabled by setting ``expand_keys`` to ``false``.
     ext_pillar:
       - consul: my_consul_config expand_keys=false
 
+The tree fetched from Consul can be shared between minions for a number of
+seconds by setting ``cache_ttl``. Minions whose ``root`` resolves to the same
+path then reuse a single fetch and parse. Once the TTL has passed the tree is
+fetched again, but it is only rebuilt if Consul reports a new
+``X-Consul-Index`` for it.
+
+.. code-block:: yaml
+
+    ext_pillar:
+      - consul: my_consul_config root=salt cache_ttl=60
+
 """
 
+import copy
 import logging
 import re
+import time
 
 import salt.utils.minions
 import salt.utils.yaml
@@ -158,6 +171,9 @@ __virtualname__ = "consul"
 # Set up logging
 log = logging.getLogger(__name__)
 
+# Trees fetched from consul, keyed by (profile, pillarenv, path, expand_keys)
+_TREE_CACHE = {}
+
 
 def __virtual__():
     """
@@ -200,6 +216,14 @@ def ext_pillar(minion_id, pillar, conf):  # pylint: disable=W0613
     else:
         opts["pillar_root"] = ""
 
+    cache_ttl_re = re.compile(r"cache_ttl=(\d+)")  # pylint: disable=W1401
+    match = cache_ttl_re.search(temp)
+    if match:
+        opts["cache_ttl"] = int(match.group(1))
+        temp = temp.replace(match.group(0), "")
+    else:
+        opts["cache_ttl"] = 0
+
     profile_re = re.compile(r"(?:profile=)?(\S+)")  # pylint: disable=W1401
     match = profile_re.search(temp)
     if match:
@@ -226,7 +250,13 @@ def ext_pillar(minion_id, pillar, conf):  # pylint: disable=W0613
     opts["root"] %= {"minion_id": minion_id, "role": role, "environment": environment}
 
     try:
-        pillar_tree = fetch_tree(client, opts["root"], opts["expand_keys"])
+        pillar_tree = fetch_tree(
+            client,
+            opts["root"],
+            opts["expand_keys"],
+            cache_ttl=opts["cache_ttl"],
+            cache_key=(opts["profile"], __opts__.get("pillarenv")),
+        )
         if opts["pillar_root"]:
             log.debug(
                 "Merging consul path %s/ into pillar at %s/",
@@ -262,28 +292,85 @@ def consul_fetch(client, path):
     return client.kv.get("" if not path else path.rstrip("/") + "/", recurse=True)
 
 
-def fetch_tree(client, path, expand_keys):
+def fetch_tree(client, path, expand_keys, cache_ttl=0, cache_key=None):
     """
     Grab data from consul, trim base path and remove any keys which
     are folders. Take the remaining data and send it to be formatted
     in such a way as to be used as pillar data.
+
+    With ``cache_ttl`` set, the tree is kept for that many seconds and shared
+    by every call using the same ``cache_key`` and path. After it expires the
+    tree is only rebuilt if consul returns a different index for the path.
     """
-    _, items = consul_fetch(client, path)
-    ret = {}
-    has_children = re.compile(r"/$")
+    key = (cache_key, path, expand_keys)
+    now = time.time()
+    cached = _TREE_CACHE.get(key) if cache_ttl else None
+    if cached is not None and now - cached["time"] < cache_ttl:
+        return copy.deepcopy(cached["tree"])
+
+    index, items = consul_fetch(client, path)
+
+    if cached is not None and index is not None and index == cached["index"]:
+        log.debug("Consul index for %s unchanged, reusing cached tree", path)
+        cached["time"] = now
+        return copy.deepcopy(cached["tree"])
 
     log.debug("Fetched items: %r", items)
 
+    ret = _build_tree(path, items, expand_keys)
+    if cache_ttl:
+        _TREE_CACHE[key] = {"time": now, "index": index, "tree": ret}
+        return copy.deepcopy(ret)
+    return ret
+
+
+def _build_tree(path, items, expand_keys):
+    """
+    Insert every value into a nested dict in a single pass over the items.
+
+    Items are applied last to first, with later insertions replacing earlier
+    ones, so the result is the same as merging one nested dict per key.
+    """
+    ret = {}
     if items is None:
         return ret
+
+    prefix = path
+    parsed = {}
     for item in reversed(items):
-        key = re.sub(r"^" + re.escape(path) + "/?", "", item["Key"])
-        if key != "":
-            log.debug("path/key - %s: %s", path, key)
-            log.debug("has_children? %r", has_children.search(key))
-        if has_children.search(key) is None:
-            ret = pillar_format(ret, key.split("/"), item["Value"], expand_keys)
-            log.debug("Fetching subkeys for key: %r", item)
+        key = item["Key"]
+        if key.startswith(prefix):
+            key = key[len(prefix) :]
+            if key.startswith("/"):
+                key = key[1:]
+        # Keys ending with a slash are folders
+        if key.endswith("/"):
+            continue
+        value = item["Value"]
+        # if value is empty in Consul then it's None here - skip it
+        if value is None:
+            continue
+        if expand_keys:
+            # YAML strips whitespaces unless they're surrounded by quotes.
+            # Identical values are only parsed once.
+            if value not in parsed:
+                parsed[value] = salt.utils.yaml.safe_load(value)
+            value = parsed[value]
+            if isinstance(value, (dict, list)):
+                value = copy.deepcopy(value)
+
+        keys = key.split("/")
+        branch = ret
+        for name in keys[:-1]:
+            child = branch.get(name)
+            if not isinstance(child, dict):
+                child = branch[name] = {}
+            branch = child
+        leaf = keys[-1]
+        if isinstance(value, dict) and isinstance(branch.get(leaf), dict):
+            dict_merge(branch[leaf], value)
+        else:
+            branch[leaf] = value
 
     return ret
 
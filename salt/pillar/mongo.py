@@ -69,13 +69,36 @@ the collection. When we find a minion, return only the ``customer_id``,
 want for a given node. They will be available directly inside the ``pillar``
 dict in your SLS templates.
 
+Connection pooling and prefetching
+==================================
+
+.. versionadded:: 3008.0
+
+The Mongo client of a host or URI configuration is created once per master
+process, and its connection pool is used by all the subsequent ext_pillar
+calls.
+
+When the pillars of many minions are refreshed at once, the documents of all
+the accepted minions can be read with a single query by setting ``prefetch``.
+They are kept in memory for ``prefetch_ttl`` seconds (60 by default), during
+which the pillars of the prefetched minions are built without querying Mongo:
+
+.. code-block:: yaml
+
+  ext_pillar:
+    - mongo: {collection: vm, id_field: name, prefetch: True, prefetch_ttl: 120}
+
 
 Module Documentation
 ====================
 """
 
+import copy
 import logging
+import os
 import re
+import threading
+import time
 
 import salt.exceptions
 
@@ -96,6 +119,69 @@ def __virtual__():
 # Set up logging
 log = logging.getLogger(__name__)
 
+DEFAULT_PREFETCH_TTL = 60
+
+# The Mongo clients of this process, per connection configuration
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+# The prefetched documents, per connection and query configuration
+_PREFETCHED = {}
+
+
+def _get_client(key, **kwargs):
+    """
+    Return the Mongo client of the connection configuration, which is only
+    created once per process
+    """
+    with _CLIENTS_LOCK:
+        pid, conn = _CLIENTS.get(key, (None, None))
+        # A client is not fork safe, the forked processes create their own
+        if conn is None or pid != os.getpid():
+            conn = pymongo.MongoClient(**kwargs)
+            _CLIENTS[key] = (os.getpid(), conn)
+        return conn
+
+
+def _get_minion_ids():
+    """
+    Return the ids of the accepted minions, to prefetch their documents
+    """
+    try:
+        return os.listdir(os.path.join(__opts__["pki_dir"], "minions"))
+    except (KeyError, OSError) as exc:
+        log.debug("ext_pillar.mongo: unable to list the accepted minions: %s", exc)
+        return []
+
+
+def _convert_id(result):
+    if "_id" in result:
+        # Converting _id to a string
+        # will avoid the most common serialization error cases, but DBRefs
+        # and whatnot will still cause problems.
+        result["_id"] = str(result["_id"])
+    return result
+
+
+def _prefetch(coll, key, minion_ids, id_field, fields):
+    """
+    Read the documents of the minions with a single query
+    """
+    log.info(
+        "ext_pillar.mongo: prefetching the documents of %s minions in %s",
+        len(minion_ids),
+        coll.name,
+    )
+    documents = dict.fromkeys(minion_ids)
+    for result in coll.find({id_field: {"$in": list(documents)}}, projection=fields):
+        doc_id = result.get(id_field)
+        # The first document of an id is used, as find_one would
+        if documents.get(doc_id) is None:
+            documents[doc_id] = _convert_id(result)
+    prefetched = {"time": time.time(), "documents": documents}
+    _PREFETCHED[key] = prefetched
+    return prefetched
+
 
 def ext_pillar(
     minion_id,
@@ -105,6 +191,8 @@ def ext_pillar(
     re_pattern=None,
     re_replace="",
     fields=None,
+    prefetch=False,
+    prefetch_ttl=DEFAULT_PREFETCH_TTL,
 ):
     """
     Connect to a mongo database and read per-node pillar information.
@@ -128,6 +216,11 @@ def ext_pillar(
           entire document, the ``_id`` field will be converted to string. Be
           careful with other fields in the document as they must be string
           serializable. Defaults to ``None``.
+        * `prefetch`: Read the documents of all the accepted minions with a
+          single query, and keep them for `prefetch_ttl` seconds. Defaults to
+          ``False``.
+        * `prefetch_ttl`: The number of seconds the prefetched documents are
+          used for. Defaults to ``60``.
     """
     host = __opts__["mongo.host"]
     port = __opts__["mongo.port"]
@@ -148,14 +241,16 @@ def ext_pillar(
                 " provided"
             )
         pymongo.uri_parser.parse_uri(uri)
-        conn = pymongo.MongoClient(uri)
+        conn_key = (uri,)
+        conn = _get_client(conn_key, host=uri)
         log.info("connecting to %s for mongo ext_pillar", uri)
         mdb = conn.get_database()
 
     else:
         log.info("connecting to %s:%s for mongo ext_pillar", host, port)
-        conn = pymongo.MongoClient(
-            host=host, port=port, username=user, password=password, ssl=ssl
+        conn_key = (host, port, user, password, ssl)
+        conn = _get_client(
+            conn_key, host=host, port=port, username=user, password=password, ssl=ssl
         )
 
         log.debug("using database '%s'", db)
@@ -165,6 +260,31 @@ def ext_pillar(
     if re_pattern:
         minion_id = re.sub(re_pattern, re_replace, minion_id)
 
+    if prefetch:
+        key = conn_key + (
+            db,
+            collection,
+            id_field,
+            re_pattern,
+            re_replace,
+            tuple(fields) if fields else fields,
+        )
+        prefetched = _PREFETCHED.get(key)
+        if prefetched is None or time.time() - prefetched["time"] > prefetch_ttl:
+            minion_ids = _get_minion_ids()
+            if re_pattern:
+                minion_ids = [
+                    re.sub(re_pattern, re_replace, minion) for minion in minion_ids
+                ]
+            prefetched = _prefetch(
+                mdb[collection], key, sorted({minion_id, *minion_ids}), id_field, fields
+            )
+        if minion_id in prefetched["documents"]:
+            log.debug(
+                "ext_pillar.mongo: using the prefetched document of %s", minion_id
+            )
+            return copy.deepcopy(prefetched["documents"][minion_id] or {})
+
     log.info(
         "ext_pillar.mongo: looking up pillar def for {'%s': '%s'} in mongo",
         id_field,
@@ -177,12 +297,7 @@ def ext_pillar(
             log.debug("ext_pillar.mongo: found document, returning fields '%s'", fields)
         else:
             log.debug("ext_pillar.mongo: found document, returning whole doc")
-        if "_id" in result:
-            # Converting _id to a string
-            # will avoid the most common serialization error cases, but DBRefs
-            # and whatnot will still cause problems.
-            result["_id"] = str(result["_id"])
-        return result
+        return _convert_id(result)
     else:
         # If we can't find the minion the database it's not necessarily an
         # error.
@@ -143,4 +143,4 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
     """
     Execute queries against MySQL, merge and return as a dict
     """
-    return MySQLExtPillar().fetch(minion_id, pillar, *args, **kwargs)
+    return MySQLExtPillar(__opts__).fetch(minion_id, pillar, *args, **kwargs)
@@ -88,6 +88,23 @@ connected_devices: ``False``
     Whether connected_devices key should be populated with device objects.
     If set to True it will force `interfaces` to also be true as a dependency
 
+cache_ttl: ``0``
+    Number of seconds to keep site details, site prefixes and platform lookups
+    in memory. The cache is shared by every minion that is compiled by the same
+    master worker, so minions at the same site only trigger one lookup per
+    interval. Set to ``0`` to disable caching.
+
+max_workers: ``4``
+    Maximum number of threads used to run the independent lookups of a minion
+    (interfaces, interface IPs, site details, site prefixes and platform)
+    concurrently. Set to ``1`` to run them one after another.
+
+prefetch_devices: ``False``
+    Page through every device (and virtual machine, if enabled) once and serve
+    the node lookups of each minion from memory for ``cache_ttl`` seconds.
+    Minions that are not found in the prefetched data are still queried
+    individually. Only takes effect when ``cache_ttl`` is set.
+
 Note that each option you enable can have a detrimental impact on pillar
 performance, so use them with caution.
 
@@ -686,7 +703,11 @@ Example output:
               2021-02-19T06:12:04.171105Z
 """
 
+import copy
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import salt.utils.http
 import salt.utils.url
@@ -695,6 +716,49 @@ from salt._compat import ipaddress
 # Set up logging
 log = logging.getLogger(__name__)
 
+# Lookups shared between minions, keyed by (kind, api_url, headers, id)
+_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_key(kind, api_url, headers, item_id):
+    return (kind, api_url, headers.get("Authorization"), item_id)
+
+
+def _cached(key, ttl, func, *args):
+    """
+    Return the result of ``func(*args)``, reusing a previous result stored
+    under ``key`` for ``ttl`` seconds. Empty results (which is what the lookup
+    functions return on errors) are not cached.
+    """
+    if not ttl or ttl <= 0:
+        return func(*args)
+    now = time.monotonic()
+    with _CACHE_LOCK:
+        entry = _CACHE.get(key)
+    if entry is not None and entry[0] > now:
+        return copy.deepcopy(entry[1])
+    value = func(*args)
+    if value:
+        with _CACHE_LOCK:
+            _CACHE[key] = (now + ttl, copy.deepcopy(value))
+    return value
+
+
+def _run_parallel(calls, max_workers):
+    """
+    Run the ``(func, args)`` tuples in the ``calls`` dict, concurrently when
+    there is more than one of them and ``max_workers`` allows it, and return a
+    dict with the result of each call under the same key.
+    """
+    if max_workers <= 1 or len(calls) <= 1:
+        return {name: func(*args) for name, (func, args) in calls.items()}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+        futures = {
+            name: pool.submit(func, *args) for name, (func, args) in calls.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 
 def _get_devices(api_url, minion_id, headers, api_query_result_limit):
     device_url = "{api_url}/{app}/{endpoint}".format(
@@ -778,6 +842,90 @@ def _get_virtual_machines(api_url, minion_id, headers, api_query_result_limit):
     return vm_results
 
 
+def _get_all_nodes(
+    api_url, app, endpoint, node_type, headers, api_query_result_limit
+):
+    """
+    Page through every node of the given endpoint and index them by name.
+    Returns ``None`` if any of the API calls fail.
+    """
+    log.debug("Prefetching all %s nodes", node_type)
+    nodes_url = "{api_url}/{app}/{endpoint}".format(
+        api_url=api_url, app=app, endpoint=endpoint
+    )
+    params = {}
+    if api_query_result_limit:
+        params["limit"] = api_query_result_limit
+    nodes_ret = salt.utils.http.query(
+        nodes_url, params=params, header_dict=headers, decode=True
+    )
+    nodes_by_name = {}
+    while True:
+        # Check status code for API call
+        if "error" in nodes_ret:
+            log.error(
+                "Unable to prefetch %s nodes, status code: %d, error %s",
+                node_type,
+                nodes_ret["status"],
+                nodes_ret["error"],
+            )
+            return None
+        for node in nodes_ret["dict"]["results"]:
+            node["node_type"] = node_type
+            nodes_by_name.setdefault(node["name"], []).append(node)
+        # Check if we need to paginate and fetch the next result list
+        if nodes_ret["dict"]["next"]:
+            nodes_ret = salt.utils.http.query(
+                nodes_ret["dict"]["next"], header_dict=headers, decode=True
+            )
+        else:
+            break
+    return nodes_by_name
+
+
+def _get_prefetched_nodes(
+    api_url,
+    minion_id,
+    headers,
+    api_query_result_limit,
+    devices,
+    virtual_machines,
+    cache_ttl,
+):
+    """
+    Return the nodes named ``minion_id`` from the prefetched device and virtual
+    machine indexes, or ``None`` if the minion is not found in them.
+    """
+    endpoints = []
+    if devices:
+        endpoints.append(("dcim", "devices", "device"))
+    if virtual_machines:
+        endpoints.append(("virtualization", "virtual-machines", "virtual-machine"))
+    nodes = []
+    found = False
+    for app, endpoint, node_type in endpoints:
+        key = _cache_key("nodes", api_url, headers, endpoint)
+        now = time.monotonic()
+        with _CACHE_LOCK:
+            entry = _CACHE.get(key)
+        if entry is None or entry[0] <= now:
+            index = _get_all_nodes(
+                api_url, app, endpoint, node_type, headers, api_query_result_limit
+            )
+            if index is None:
+                return None
+            with _CACHE_LOCK:
+                _CACHE[key] = (now + cache_ttl, index)
+        else:
+            index = entry[1]
+        if minion_id in index:
+            found = True
+            nodes.extend(copy.deepcopy(index[minion_id]))
+    if not found:
+        return None
+    return nodes
+
+
 def _get_interfaces(
     api_url, minion_id, node_id, node_type, headers, api_query_result_limit
 ):
@@ -1022,11 +1170,7 @@ def _get_site_prefixes(
     return site_prefixes_results
 
 
-def _get_proxy_details(api_url, minion_id, primary_ip, platform_id, headers):
-    log.debug(
-        'Retrieving proxy details for "%s"',
-        minion_id,
-    )
+def _get_platform(api_url, minion_id, platform_id, headers):
     platform_url = "{api_url}/{app}/{endpoint}/{id}/".format(
         api_url=api_url, app="dcim", endpoint="platforms", id=platform_id
     )
@@ -1039,17 +1183,36 @@ def _get_proxy_details(api_url, minion_id, primary_ip, platform_id, headers):
             platform_ret["status"],
             platform_ret["error"],
         )
-    else:
-        # Assign results from API call to "proxy" key if the platform has a
-        # napalm_driver defined.
-        napalm_driver = platform_ret["dict"].get("napalm_driver")
-        if napalm_driver:
-            proxy = {
-                "host": str(ipaddress.ip_interface(primary_ip).ip),
-                "driver": napalm_driver,
-                "proxytype": "napalm",
-            }
-            return proxy
+        return {}
+    return platform_ret["dict"]
+
+
+def _get_proxy_details(
+    api_url, minion_id, primary_ip, platform_id, headers, cache_ttl=0
+):
+    log.debug(
+        'Retrieving proxy details for "%s"',
+        minion_id,
+    )
+    platform = _cached(
+        _cache_key("platform", api_url, headers, platform_id),
+        cache_ttl,
+        _get_platform,
+        api_url,
+        minion_id,
+        platform_id,
+        headers,
+    )
+    # Assign results from API call to "proxy" key if the platform has a
+    # napalm_driver defined.
+    napalm_driver = platform.get("napalm_driver")
+    if napalm_driver:
+        proxy = {
+            "host": str(ipaddress.ip_interface(primary_ip).ip),
+            "driver": napalm_driver,
+            "proxytype": "napalm",
+        }
+        return proxy
 
 
 def ext_pillar(minion_id, pillar, *args, **kwargs):
@@ -1078,6 +1241,9 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
             "netbox pillar interfaces set to 'True' as connected_devices is 'True'"
         )
     api_query_result_limit = kwargs.get("api_query_result_limit")
+    cache_ttl = int(kwargs.get("cache_ttl", 0))
+    max_workers = int(kwargs.get("max_workers", 4))
+    prefetch_devices = kwargs.get("prefetch_devices", False)
 
     ret = {}
 
@@ -1113,13 +1279,32 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
     else:
         log.error("The value for api_token is not set")
         return ret
-    nodes = []
-    if devices:
-        nodes.extend(_get_devices(api_url, minion_id, headers, api_query_result_limit))
-    if virtual_machines:
-        nodes.extend(
-            _get_virtual_machines(api_url, minion_id, headers, api_query_result_limit)
+    nodes = None
+    if prefetch_devices and cache_ttl > 0:
+        nodes = _get_prefetched_nodes(
+            api_url,
+            minion_id,
+            headers,
+            api_query_result_limit,
+            devices,
+            virtual_machines,
+            cache_ttl,
         )
+    if nodes is None:
+        node_calls = {}
+        if devices:
+            node_calls["devices"] = (
+                _get_devices,
+                (api_url, minion_id, headers, api_query_result_limit),
+            )
+        if virtual_machines:
+            node_calls["virtual_machines"] = (
+                _get_virtual_machines,
+                (api_url, minion_id, headers, api_query_result_limit),
+            )
+        nodes = []
+        for node_list in _run_parallel(node_calls, max_workers).values():
+            nodes.extend(node_list)
     if len(nodes) == 1:
         # Return the 0th (and only) item in the list
         ret["netbox"] = nodes[0]
@@ -1131,31 +1316,6 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
         return ret
     node_id = ret["netbox"]["id"]
     node_type = ret["netbox"]["node_type"]
-    if interfaces:
-        interfaces_list = _get_interfaces(
-            api_url, minion_id, node_id, node_type, headers, api_query_result_limit
-        )
-        if len(interfaces_list) > 0 and interface_ips:
-            interface_ips_list = _get_interface_ips(
-                api_url, minion_id, node_id, node_type, headers, api_query_result_limit
-            )
-            ret["netbox"]["interfaces"] = _associate_ips_to_interfaces(
-                interfaces_list, interface_ips_list
-            )
-    site_id = ret["netbox"]["site"]["id"]
-    site_name = ret["netbox"]["site"]["name"]
-    if site_details:
-        ret["netbox"]["site"] = _get_site_details(
-            api_url, minion_id, site_name, site_id, headers
-        )
-    if site_prefixes:
-        ret["netbox"]["site"]["prefixes"] = _get_site_prefixes(
-            api_url, minion_id, site_name, site_id, headers, api_query_result_limit
-        )
-    if connected_devices:
-        ret["netbox"]["connected_devices"] = _get_connected_devices(
-            api_url, minion_id, ret["netbox"]["interfaces"], headers
-        )
     if proxy_return:
         if ret["netbox"]["platform"]:
             platform_id = ret["netbox"]["platform"]["id"]
@@ -1173,7 +1333,81 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
                 minion_id,
             )
             return
-        proxy = _get_proxy_details(api_url, minion_id, primary_ip, platform_id, headers)
+    site_id = ret["netbox"]["site"]["id"]
+    site_name = ret["netbox"]["site"]["name"]
+
+    # The remaining lookups only depend on the node itself, so run them
+    # concurrently
+    calls = {}
+    if interfaces:
+        calls["interfaces"] = (
+            _get_interfaces,
+            (api_url, minion_id, node_id, node_type, headers, api_query_result_limit),
+        )
+        if interface_ips:
+            calls["interface_ips"] = (
+                _get_interface_ips,
+                (
+                    api_url,
+                    minion_id,
+                    node_id,
+                    node_type,
+                    headers,
+                    api_query_result_limit,
+                ),
+            )
+    if site_details:
+        calls["site_details"] = (
+            _cached,
+            (
+                _cache_key("site", api_url, headers, site_id),
+                cache_ttl,
+                _get_site_details,
+                api_url,
+                minion_id,
+                site_name,
+                site_id,
+                headers,
+            ),
+        )
+    if site_prefixes:
+        calls["site_prefixes"] = (
+            _cached,
+            (
+                _cache_key("prefixes", api_url, headers, site_id),
+                cache_ttl,
+                _get_site_prefixes,
+                api_url,
+                minion_id,
+                site_name,
+                site_id,
+                headers,
+                api_query_result_limit,
+            ),
+        )
+    if proxy_return:
+        calls["proxy"] = (
+            _get_proxy_details,
+            (api_url, minion_id, primary_ip, platform_id, headers, cache_ttl),
+        )
+    results = _run_parallel(calls, max_workers)
+
+    if interfaces:
+        interfaces_list = results["interfaces"]
+        if len(interfaces_list) > 0 and interface_ips:
+            ret["netbox"]["interfaces"] = _associate_ips_to_interfaces(
+                interfaces_list, results["interface_ips"]
+            )
+    if site_details:
+        ret["netbox"]["site"] = results["site_details"]
+    if site_prefixes:
+        ret["netbox"]["site"]["prefixes"] = results["site_prefixes"]
+    if connected_devices:
+        ret["netbox"]["connected_devices"] = _get_connected_devices(
+            api_url, minion_id, ret["netbox"]["interfaces"], headers
+        )
+    if proxy_return:
+        proxy = results["proxy"]
         if proxy:
             ret["proxy"] = proxy
             if proxy_username:
@@ -363,6 +363,10 @@ def __virtual__():
     return True
 
 
+# Compiled templates, per file name, with the mtime and size of the file
+_TEMPLATES = {}
+
+
 def key_value_to_tree(data):
     """
     Convert key/value to tree
@@ -379,6 +383,74 @@ def key_value_to_tree(data):
     return tree
 
 
+class _ContextTree:
+    """
+    The tree of the key/value output, updated as the keys are set instead of
+    being converted again before each template is rendered
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.tree = None
+        # The paths of the intermediate dicts of the keys
+        self.branches = set()
+
+    def set(self, key):
+        """
+        Set the value of a key of the output in the tree
+        """
+        if self.tree is None:
+            return
+        keys = key.split(__opts__["pepa_delimiter"])
+        prefixes = [
+            __opts__["pepa_delimiter"].join(keys[:idx]) for idx in range(1, len(keys))
+        ]
+        if key in self.branches or any(prefix in self.output for prefix in prefixes):
+            # The key overlaps another key, the result depends on the order of
+            # the keys in the output
+            self.tree = None
+            return
+        self.branches.update(prefixes)
+        t = self.tree
+        for part in keys[:-1]:
+            t = t.setdefault(part, {})
+        t[keys[-1]] = self.output[key]
+
+    def unset(self):
+        """
+        Rebuild the tree after a key was removed from the output
+        """
+        self.tree = None
+
+    def get(self):
+        if self.tree is None:
+            self.tree = key_value_to_tree(self.output)
+            self.branches = set()
+            for key in self.output:
+                keys = key.split(__opts__["pepa_delimiter"])
+                self.branches.update(
+                    __opts__["pepa_delimiter"].join(keys[:idx])
+                    for idx in range(1, len(keys))
+                )
+        return self.tree
+
+
+def _get_template(fn):
+    """
+    Return the compiled template of a file, which is compiled again only when
+    the file changes
+    """
+    stat = os.stat(fn)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _TEMPLATES.get(fn)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with salt.utils.files.fopen(fn) as fhr:
+        template = jinja2.Template(fhr.read())
+    _TEMPLATES[fn] = (signature, template)
+    return template
+
+
 def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=False):
     """
     Evaluate Pepa templates
@@ -401,6 +473,9 @@ def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=
     output = inp
     output["pepa_templates"] = []
     immutable = {}
+    context = _ContextTree(output)
+    grains = __grains__.copy()
+    pillar_copy = pillar.copy()
 
     for categ, info in [next(iter(s.items())) for s in sequence]:
         if categ not in inp:
@@ -434,15 +509,13 @@ def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=
             fn = os.path.join(templdir, re.sub(r"\W", "_", entry.lower()) + ".yaml")
             if os.path.isfile(fn):
                 log.info("Loading template: %s", fn)
-                with salt.utils.files.fopen(fn) as fhr:
-                    template = jinja2.Template(fhr.read())
+                template = _get_template(fn)
                 output["pepa_templates"].append(fn)
 
                 try:
-                    data = key_value_to_tree(output)
-                    data["grains"] = __grains__.copy()
-                    data["pillar"] = pillar.copy()
-                    results_jinja = template.render(data)
+                    results_jinja = template.render(
+                        context.get(), grains=grains, pillar=pillar_copy
+                    )
                     results = salt.utils.yaml.safe_load(results_jinja)
                 except jinja2.UndefinedError as err:
                     log.error("Failed to parse JINJA template: %s\n%s", fn, err)
@@ -496,6 +569,7 @@ def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=
                             immutable[rkey] = True
                         if rkey in output:
                             del output[rkey]
+                            context.unset()
                     elif operator == "immutable()":
                         log.debug(
                             "Set immutable and substitute key %s: %s",
@@ -504,6 +578,7 @@ def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=
                         )
                         immutable[rkey] = True
                         output[rkey] = results[key]
+                        context.set(rkey)
                     elif operator is not None:
                         log.error(
                             "Unsupported operator %s, skipping key %s", operator, rkey
@@ -511,6 +586,7 @@ def ext_pillar(minion_id, pillar, resource, sequence, subkey=False, subkey_only=
                     else:
                         log.debug("Substitute key %s: %s", key, results[key])
                         output[key] = results[key]
+                        context.set(key)
 
     tree = key_value_to_tree(output)
     pillar_data = {}
@@ -177,6 +177,32 @@ Configuration of the connection depends on the adapter in use.
 .. versionadded:: 3005
    The *as_json* parameter.
 
+Prefetching the pillars of all the minions
+==========================================
+
+.. versionadded:: 3008.0
+
+By default the queries are run once per minion. When the pillars of many
+minions are refreshed at once, a ``prefetch_query`` can be given with the
+query. It is run for batches of accepted minion ids and must return the minion
+id as its first field, followed by the fields of ``query``. The ``{minion_ids}``
+placeholder is replaced by the parameters of the minion ids of the batch.
+
+.. code-block:: yaml
+
+  ext_pillar:
+    - sql_base:
+        - query: "SELECT pillar,value FROM pillars WHERE minion_id = %s"
+          prefetch_query: "SELECT minion_id,pillar,value FROM pillars
+                            WHERE minion_id IN ({minion_ids})"
+          prefetch_ttl: 60
+          prefetch_batch_size: 500
+
+The rows are partitioned per minion and kept in memory for ``prefetch_ttl``
+seconds, during which the pillars of the prefetched minions are built without
+querying the database. The minions which were not accepted when the rows were
+prefetched still run ``query``.
+
 More complete example for MySQL (to also show configuration)
 ============================================================
 
@@ -199,13 +225,22 @@ More complete example for MySQL (to also show configuration)
 """
 
 import abc
+import contextlib
 import logging
+import os
+import time
 
 from salt.utils.dictupdate import update
 from salt.utils.odict import OrderedDict
 
 log = logging.getLogger(__name__)
 
+DEFAULT_PREFETCH_TTL = 60
+DEFAULT_PREFETCH_BATCH_SIZE = 500
+
+# The rows of the prefetch queries, per database and query
+_PREFETCHED = {}
+
 # Please don't strip redundant parentheses from this file.
 # I have added some for clarity.
 
@@ -232,9 +267,14 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
     as_json = False
     with_lists = None
     ignore_null = False
+    # Parameter marker of the database adapter
+    param_marker = "%s"
+    # Number of rows read at once from the cursor
+    fetch_size = 1000
 
-    def __init__(self):
+    def __init__(self, opts=None):
         self.result = self.focus = {}
+        self.opts = opts
 
     @classmethod
     @abc.abstractmethod
@@ -340,6 +380,7 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
         This function takes a list of database results and iterates over,
         merging them into a dict form.
         """
+        # The keys to listify of each dict, in an ordered set
         listify = OrderedDict()
         listify_dicts = OrderedDict()
         for ret in rows:
@@ -357,10 +398,9 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
                 # At the end we'll use listify to find values to make a list of
                 if i + 1 in self.with_lists:
                     if id(crd) not in listify:
-                        listify[id(crd)] = []
+                        listify[id(crd)] = OrderedDict()
                         listify_dicts[id(crd)] = crd
-                    if ret[i] not in listify[id(crd)]:
-                        listify[id(crd)].append(ret[i])
+                    listify[id(crd)][ret[i]] = None
                 if ret[i] not in crd:
                     # Key missing
                     crd[ret[i]] = {}
@@ -412,10 +452,9 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
                 # This bit doesn't escape listify
                 if self.depth in self.with_lists:
                     if id(crd) not in listify:
-                        listify[id(crd)] = []
+                        listify[id(crd)] = OrderedDict()
                         listify_dicts[id(crd)] = crd
-                    if ret[self.depth - 1] not in listify[id(crd)]:
-                        listify[id(crd)].append(ret[self.depth - 1])
+                    listify[id(crd)][ret[self.depth - 1]] = None
                 crd = crd[ret[self.depth - 1]]
                 # Now for the remaining keys, we put them into the dict
                 for i in range(self.depth, self.num_fields):
@@ -423,10 +462,9 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
                     # Listify
                     if i + 1 in self.with_lists:
                         if id(crd) not in listify:
-                            listify[id(crd)] = []
+                            listify[id(crd)] = OrderedDict()
                             listify_dicts[id(crd)] = crd
-                        if nk not in listify[id(crd)]:
-                            listify[id(crd)].append(nk)
+                        listify[id(crd)][nk] = None
                     # Collision detection
                     if self.as_list and (nk in crd):
                         # Same as before...
@@ -448,6 +486,82 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
                 elif isinstance(d[k], list):
                     d[k] = [d[k]]
 
+    def fetch_rows(self, cursor):
+        """
+        Yield the rows of the last query, reading them from the cursor in
+        chunks of fetch_size rows.
+        """
+        while True:
+            rows = cursor.fetchmany(self.fetch_size)
+            if not rows:
+                return
+            yield from rows
+
+    def _get_minion_ids(self, minion_id):
+        """
+        Return the ids of the accepted minions, to prefetch their rows.
+        """
+        minion_ids = set()
+        if self.opts and self.opts.get("pki_dir"):
+            try:
+                minion_ids.update(
+                    os.listdir(os.path.join(self.opts["pki_dir"], "minions"))
+                )
+            except OSError as exc:
+                log.debug("Unable to list the accepted minions: %s", exc)
+        minion_ids.add(minion_id)
+        return sorted(minion_ids)
+
+    def _prefetch_key(self, details):
+        get_options = getattr(self, "_get_options", dict)
+        return (self._db_name(), repr(get_options()), details["prefetch_query"])
+
+    def get_prefetched(self, details):
+        """
+        Return the rows prefetched by the prefetch query, or None if they were
+        not prefetched or expired.
+        """
+        if not details.get("prefetch_query"):
+            return None
+        prefetched = _PREFETCHED.get(self._prefetch_key(details))
+        if prefetched is None:
+            return None
+        ttl = details.get("prefetch_ttl", DEFAULT_PREFETCH_TTL)
+        if time.time() - prefetched["time"] > ttl:
+            return None
+        return prefetched
+
+    def prefetch(self, cursor, minion_id, details):
+        """
+        Run the prefetch query for batches of the accepted minions and return
+        the rows partitioned per minion.
+        """
+        minion_ids = self._get_minion_ids(minion_id)
+        batch_size = int(
+            details.get("prefetch_batch_size", DEFAULT_PREFETCH_BATCH_SIZE)
+        )
+        field_names = None
+        rows = {minion: [] for minion in minion_ids}
+        for idx in range(0, len(minion_ids), batch_size):
+            batch = minion_ids[idx : idx + batch_size]
+            query = details["prefetch_query"].replace(
+                "{minion_ids}", ", ".join([self.param_marker] * len(batch))
+            )
+            cursor.execute(query, batch)
+            # The first field is the minion id
+            field_names = [row[0] for row in cursor.description][1:]
+            for row in self.fetch_rows(cursor):
+                rows.setdefault(row[0], []).append(row[1:])
+
+        log.debug(
+            "ext_pillar %s: Prefetched the rows of %s minions",
+            self._db_name(),
+            len(minion_ids),
+        )
+        prefetched = {"time": time.time(), "field_names": field_names, "rows": rows}
+        _PREFETCHED[self._prefetch_key(details)] = prefetched
+        return prefetched
+
     def fetch(self, minion_id, pillar, *args, **kwargs):  # pylint: disable=W0613
         """
         Execute queries, merge and return as a dict.
@@ -460,15 +574,34 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
         #
         # Most of the heavy lifting is in this class for ease of testing.
         qbuffer = self.extract_queries(args, kwargs)
-        with self._get_cursor() as cursor:
+        with contextlib.ExitStack() as stack:
+            # The database is only connected to when a row is not prefetched
+            cursor = None
             for root, details in qbuffer:
-                # Run the query
-                cursor.execute(details["query"], (minion_id,))
-
-                # Extract the field names the db has returned and process them
-                self.process_fields(
-                    [row[0] for row in cursor.description], details["depth"]
-                )
+                prefetched = self.get_prefetched(details)
+                if (
+                    prefetched is None
+                    and details.get("prefetch_query")
+                    and self.opts is not None
+                ):
+                    if cursor is None:
+                        cursor = stack.enter_context(self._get_cursor())
+                    prefetched = self.prefetch(cursor, minion_id, details)
+
+                if prefetched is not None and minion_id in prefetched["rows"]:
+                    field_names = prefetched["field_names"]
+                    rows = prefetched["rows"][minion_id]
+                else:
+                    if cursor is None:
+                        cursor = stack.enter_context(self._get_cursor())
+                    # Run the query
+                    cursor.execute(details["query"], (minion_id,))
+                    # Extract the field names the db has returned
+                    field_names = [row[0] for row in cursor.description]
+                    rows = self.fetch_rows(cursor)
+
+                # Process the field names
+                self.process_fields(field_names, details["depth"])
                 self.enter_root(root)
                 self.as_list = details["as_list"]
                 self.as_json = details["as_json"]
@@ -477,7 +610,7 @@ class SqlBaseExtPillar(metaclass=abc.ABCMeta):
                 else:
                     self.with_lists = []
                 self.ignore_null = details["ignore_null"]
-                self.process_results(cursor.fetchall())
+                self.process_results(rows)
 
                 log.debug("ext_pillar %s: Return data: %s", db_name, self)
         return self.result
@@ -84,6 +84,8 @@ class SQLCipherExtPillar(SqlBaseExtPillar):
     This class receives and processes the database rows from SQLCipher.
     """
 
+    param_marker = "?"
+
     @classmethod
     def _db_name(cls):
         return "SQLCipher"
@@ -131,4 +133,4 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
     """
     Execute queries against SQLCipher, merge and return as a dict
     """
-    return SQLCipherExtPillar().fetch(minion_id, pillar, *args, **kwargs)
+    return SQLCipherExtPillar(__opts__).fetch(minion_id, pillar, *args, **kwargs)
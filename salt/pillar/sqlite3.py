@@ -65,6 +65,8 @@ class SQLite3ExtPillar(SqlBaseExtPillar):
     This class receives and processes the database rows from SQLite3.
     """
 
+    param_marker = "?"
+
     @classmethod
     def _db_name(cls):
         return "SQLite3"
@@ -108,4 +110,4 @@ def ext_pillar(minion_id, pillar, *args, **kwargs):
     """
     Execute queries against SQLite3, merge and return as a dict
     """
-    return SQLite3ExtPillar().fetch(minion_id, pillar, *args, **kwargs)
+    return SQLite3ExtPillar(__opts__).fetch(minion_id, pillar, *args, **kwargs)
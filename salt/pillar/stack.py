@@ -209,6 +209,24 @@ So PillarStack ``ext_pillar`` returns the ``stack`` dict, the contents of which
 Salt takes care to merge in with all of the other pillars and finally return
 the whole pillar to the minion.
 
+Caching
+-------
+
+Templates are compiled once per master process and reused for every minion;
+a template is only recompiled when its source changes. ``yaml`` files which
+contain no Jinja2 syntax (no ``{{``, ``{%`` or ``{#``) are not rendered at
+all: they are parsed once and reused until their modification time or size
+changes.
+
+The results of the glob patterns listed in config files are kept for
+``pillar_stack_glob_cache_ttl`` seconds (5 by default) so that a pillar
+refresh of many minions does not scan the same directories for each of them.
+Set it to ``0`` to disable glob caching:
+
+.. code-block:: yaml
+
+    pillar_stack_glob_cache_ttl: 0
+
 Merging strategies
 ------------------
 
@@ -373,21 +391,59 @@ You can also select a custom merging strategy using a ``__`` object in a list:
 |       - root   |       - mat             |                         |
 +----------------+-------------------------+-------------------------+
 """
+import copy
 import functools
 import glob
 import logging
 import os
 import posixpath
+import time
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import BytecodeCache, Environment, FileSystemLoader
 
 import salt.utils.data
+import salt.utils.files
 import salt.utils.jinja
 import salt.utils.yaml
 
 log = logging.getLogger(__name__)
 strategies = ("overwrite", "merge-first", "merge-last", "remove")
 
+# Markers of Jinja2 syntax, files without any of them are plain yaml
+_TEMPLATE_MARKERS = ("{{", "{%", "{#")
+
+# Parsed plain yaml files: path -> ((mtime, size), is_plain, parsed data)
+_YAML_CACHE = {}
+
+# Glob results: pattern -> (time, paths)
+_GLOB_CACHE = {}
+
+
+class _MemoryBytecodeCache(BytecodeCache):
+    """
+    Keep compiled templates in memory for the life of the master process.
+
+    Jinja2 checks the checksum of the template source before using a cached
+    entry, so a modified template is compiled again.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def load_bytecode(self, bucket):
+        code = self._cache.get(bucket.key)
+        if code is not None:
+            bucket.bytecode_from_string(code)
+
+    def dump_bytecode(self, bucket):
+        self._cache[bucket.key] = bucket.bytecode_to_string()
+
+    def clear(self):
+        self._cache.clear()
+
+
+_BYTECODE_CACHE = _MemoryBytecodeCache()
+
 
 def ext_pillar(minion_id, pillar, *args, **kwargs):
     """
@@ -442,6 +498,7 @@ def _process_stack_cfg(cfg, stack, minion_id, pillar):
     jenv = Environment(
         loader=FileSystemLoader(basedir),
         extensions=["jinja2.ext.do", salt.utils.jinja.SerializerExtension],
+        bytecode_cache=_BYTECODE_CACHE,
     )
     jenv.globals.update(
         {
@@ -460,7 +517,7 @@ def _process_stack_cfg(cfg, stack, minion_id, pillar):
     for item in _parse_stack_cfg(jenv.get_template(filename).render(stack=stack)):
         if not item.strip():
             continue  # silently ignore whitespace or empty lines
-        paths = glob.glob(os.path.join(basedir, item))
+        paths = _glob(os.path.join(basedir, item))
         if not paths:
             log.info(
                 'Ignoring pillar stack template "%s": can\'t find from root dir "%s"',
@@ -470,6 +527,11 @@ def _process_stack_cfg(cfg, stack, minion_id, pillar):
             continue
         for path in sorted(paths):
             log.debug("YAML: basedir=%s, path=%s", basedir, path)
+            obj = _load_plain_yaml(path)
+            if obj is not _NOT_PLAIN:
+                if isinstance(obj, dict):
+                    stack = _merge_dict(stack, obj)
+                continue
             # FileSystemLoader always expects unix-style paths
             unix_path = _to_unix_slashes(os.path.relpath(path, basedir))
             try:
@@ -491,6 +553,58 @@ def _process_stack_cfg(cfg, stack, minion_id, pillar):
     return stack
 
 
+_NOT_PLAIN = object()
+
+
+def _glob(pattern):
+    """
+    Return the paths matching ``pattern``, cached for a few seconds
+    """
+    ttl = __opts__.get("pillar_stack_glob_cache_ttl", 5)
+    if not ttl:
+        return glob.glob(pattern)
+    now = time.time()
+    cached = _GLOB_CACHE.get(pattern)
+    if cached is None or now - cached[0] >= ttl:
+        cached = _GLOB_CACHE[pattern] = (now, glob.glob(pattern))
+    return list(cached[1])
+
+
+def _load_plain_yaml(path):
+    """
+    Return a copy of the parsed content of ``path`` if it holds no Jinja2
+    syntax, or ``_NOT_PLAIN`` if it has to be rendered as a template.
+
+    Parsed files are cached until their modification time or size changes.
+    The returned object is a deep copy, as merging modifies it in place.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return _NOT_PLAIN
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _YAML_CACHE.get(path)
+    if cached is None or cached[0] != key:
+        with salt.utils.files.fopen(path, "r") as fp_:
+            content = fp_.read()
+        if any(marker in content for marker in _TEMPLATE_MARKERS):
+            cached = (key, False, None)
+        else:
+            try:
+                obj = salt.utils.yaml.safe_load(content)
+            except Exception as e:
+                raise Exception(
+                    "Stack pillar yaml parsing error in {}:\n{}\n{}".format(
+                        path, e, content
+                    )
+                )
+            cached = (key, True, obj)
+        _YAML_CACHE[path] = cached
+    if not cached[1]:
+        return _NOT_PLAIN
+    return copy.deepcopy(cached[2])
+
+
 def _cleanup(obj):
     if obj:
         if isinstance(obj, dict):
@@ -149,10 +149,36 @@ You can override the merging behavior per defined ext_pillar:
            conf: path=secret/roles/{pillar[roles]}
            merge_strategy: smart
            merge_lists: false
+
+.. versionadded:: 3008.0
+
+    The paths a pattern expands to are read concurrently, by up to ``workers``
+    threads (default 4). The results are still merged in the order of the paths.
+
+    The secrets of the paths which are not templated, and thus are the same for
+    all minions, can be cached on the master for ``cache_ttl`` seconds. A
+    secret with a ``ttl`` key, the lease duration hint of the KV v1 secrets
+    engine, is not cached for longer than it. The cache is disabled by default.
+
+.. code-block:: yaml
+
+    ext_pillar:
+      - vault:
+           conf: path=secret/common
+           cache_ttl: 300
+      - vault:
+           conf: path=secret/roles/{pillar[roles]}
+           workers: 8
 """
 
 
+import concurrent.futures
+import contextvars
+import copy
 import logging
+import re
+import threading
+import time
 
 import salt.utils.dictupdate
 import salt.utils.vault as vault
@@ -161,6 +187,14 @@ from salt.exceptions import SaltException
 
 log = logging.getLogger(__name__)
 
+DEFAULT_WORKERS = 4
+
+# The secrets of the paths which do not depend on the minion, shared by all
+# the minions. A secret which was not found is cached as None.
+_CACHE = {}
+_CACHE_STATS = {"hits": 0, "misses": 0}
+_CACHE_LOCK = threading.Lock()
+
 
 def ext_pillar(
     minion_id,  # pylint: disable=W0613
@@ -170,6 +204,8 @@ def ext_pillar(
     merge_strategy=None,
     merge_lists=None,
     extra_minion_data=None,
+    cache_ttl=0,
+    workers=DEFAULT_WORKERS,
 ):
     """
     Get pillar data from Vault for the configuration ``conf``.
@@ -193,17 +229,22 @@ def ext_pillar(
     vault_pillar = {}
 
     path_pattern = paths[0].replace("path=", "")
-    for path in _get_paths(path_pattern, minion_id, pillar):
-        try:
-            vault_pillar_single = vault.read_kv(path, __opts__, __context__)
-            vault_pillar = salt.utils.dictupdate.merge(
-                vault_pillar,
-                vault_pillar_single,
-                strategy=merge_strategy,
-                merge_lists=merge_lists,
-            )
-        except SaltException:
+    # The expansion of a pattern without any template is the same for all minions
+    if "{" in path_pattern:
+        cache_ttl = 0
+    secrets = _read_paths(
+        _get_paths(path_pattern, minion_id, pillar), cache_ttl, workers
+    )
+    for path, vault_pillar_single in secrets:
+        if vault_pillar_single is None:
             log.info("Vault secret not found for: %s", path)
+            continue
+        vault_pillar = salt.utils.dictupdate.merge(
+            vault_pillar,
+            vault_pillar_single,
+            strategy=merge_strategy,
+            merge_lists=merge_lists,
+        )
 
     if nesting_key:
         vault_pillar = {nesting_key: vault_pillar}
@@ -225,3 +266,94 @@ def _get_paths(path_pattern, minion_id, pillar):
 
     log.debug("%s vault pillar paths: %s", minion_id, paths)
     return paths
+
+
+def _read_path(path, opts, context):
+    """
+    Read the secret of a path, or return None if it was not found
+    """
+    try:
+        return vault.read_kv(path, opts, context)
+    except SaltException:
+        return None
+
+
+def _read_paths(paths, cache_ttl, workers):
+    """
+    Read the secrets of the paths, from the cache or concurrently, and return
+    them in the order of the paths
+    """
+    secrets = {}
+    if cache_ttl:
+        with _CACHE_LOCK:
+            now = time.time()
+            for path in paths:
+                cached = _CACHE.get(path)
+                if cached is not None and cached[0] > now:
+                    _CACHE_STATS["hits"] += 1
+                    secrets[path] = copy.deepcopy(cached[1])
+                else:
+                    _CACHE_STATS["misses"] += 1
+
+    missing = [path for path in paths if path not in secrets]
+    if missing:
+        # The first path is read alone, so that the Vault authentication is
+        # cached in the context before the other paths are read concurrently
+        secrets[missing[0]] = _read_path(missing[0], __opts__, __context__)
+        if len(missing) > 1:
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, min(int(workers), len(missing) - 1))
+            ) as executor:
+                futures = {
+                    path: executor.submit(
+                        contextvars.copy_context().run,
+                        _read_path,
+                        path,
+                        __opts__,
+                        __context__,
+                    )
+                    for path in missing[1:]
+                }
+                for path, future in futures.items():
+                    secrets[path] = future.result()
+
+        if cache_ttl:
+            now = time.time()
+            with _CACHE_LOCK:
+                for path in missing:
+                    ttl = _secret_ttl(secrets[path], cache_ttl)
+                    _CACHE[path] = (now + ttl, copy.deepcopy(secrets[path]))
+
+    return [(path, secrets[path]) for path in paths]
+
+
+def _secret_ttl(secret, cache_ttl):
+    """
+    Return the seconds to cache a secret for, which are capped by the ``ttl``
+    lease duration hint of the secret
+    """
+    ttl = float(cache_ttl)
+    if isinstance(secret, dict) and "ttl" in secret:
+        match = re.match(r"^(\d+(?:\.\d+)?)([smhd]?)$", str(secret["ttl"]).strip())
+        if match:
+            factor = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+            ttl = min(ttl, float(match.group(1)) * factor)
+    return ttl
+
+
+def cache_stats():
+    """
+    Return the hits and misses of the cache of the secrets shared by all the
+    minions, and the number of cached paths
+    """
+    with _CACHE_LOCK:
+        return dict(_CACHE_STATS, paths=len(_CACHE))
+
+
+def clear_cache():
+    """
+    Clear the cache of the secrets shared by all the minions
+    """
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _CACHE_STATS.update(hits=0, misses=0)
@@ -17,6 +17,17 @@ config. These are the defaults:
     queue.pgjsonb.dbname: 'salt'
     queue.pgjsonb.port: 5432
 
+Items are popped oldest first. Each pop claims its rows with a single
+``DELETE ... RETURNING`` over a ``FOR UPDATE SKIP LOCKED`` subselect, so
+several masters can drain the same queue concurrently without popping the
+same item twice or waiting on each other's locks. ``SKIP LOCKED`` requires
+PostgreSQL 9.5 or later; it can be turned off on older servers, in which case
+concurrent consumers wait on each other instead:
+
+.. code-block:: yaml
+
+    queue.pgjsonb.skip_locked: False
+
 Use the following Pg database schema:
 
 .. code-block:: sql
@@ -40,6 +51,7 @@ Use the following Pg database schema:
 
 
 import logging
+import os
 import sys
 from contextlib import contextmanager
 
@@ -59,6 +71,13 @@ log = logging.getLogger(__name__)
 # Define the module's virtual name
 __virtualname__ = "pgjsonb"
 
+# Connections kept open for the life of the process, keyed by connection
+# arguments. The owning pid is stored so forked children reconnect.
+_CONNECTIONS = {}
+
+# Queues known to exist, so inserts do not query the catalog every time
+_KNOWN_QUEUES = set()
+
 
 def __virtual__():
     if HAS_PG is False:
@@ -66,11 +85,7 @@ def __virtual__():
     return __virtualname__
 
 
-@contextmanager
-def _conn(commit=False):
-    """
-    Return an postgres cursor
-    """
+def _conn_kwargs():
     defaults = {
         "host": "localhost",
         "user": "salt",
@@ -84,13 +99,38 @@ def _conn(commit=False):
         conn_kwargs[key] = __opts__.get(
             "queue.{}.{}".format(__virtualname__, key), value
         )
+    return conn_kwargs
+
+
+def _get_connection():
+    """
+    Return the cached connection for this process, connecting if needed
+    """
+    conn_kwargs = _conn_kwargs()
+    key = tuple(sorted(conn_kwargs.items()))
+    pid = os.getpid()
+    cached = _CONNECTIONS.get(key)
+    if cached is not None:
+        cached_pid, conn = cached
+        if cached_pid == pid and not conn.closed:
+            return conn
+        _CONNECTIONS.pop(key)
     try:
         conn = psycopg2.connect(**conn_kwargs)
     except psycopg2.OperationalError as exc:
         raise SaltMasterError(
             "pgjsonb returner could not connect to database: {exc}".format(exc=exc)
         )
+    _CONNECTIONS[key] = (pid, conn)
+    return conn
 
+
+@contextmanager
+def _conn(commit=False):
+    """
+    Return an postgres cursor on the process wide connection
+    """
+    conn = _get_connection()
     cursor = conn.cursor()
 
     try:
@@ -98,15 +138,19 @@ def _conn(commit=False):
     except psycopg2.DatabaseError as err:
         error = err.args
         sys.stderr.write(str(error))
-        cursor.execute("ROLLBACK")
+        if not conn.closed:
+            conn.rollback()
+        if isinstance(err, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            # The server went away, reconnect on the next call
+            conn.close()
         raise
     else:
         if commit:
-            cursor.execute("COMMIT")
+            conn.commit()
         else:
-            cursor.execute("ROLLBACK")
+            conn.rollback()
     finally:
-        conn.close()
+        cursor.close()
 
 
 def _list_tables(cur):
@@ -118,7 +162,9 @@ def _list_tables(cur):
 
 
 def _create_table(cur, queue):
-    cmd = "CREATE TABLE {}(id SERIAL PRIMARY KEY, data jsonb NOT NULL)".format(queue)
+    cmd = "CREATE TABLE IF NOT EXISTS {}(id SERIAL PRIMARY KEY, data jsonb NOT NULL)".format(
+        queue
+    )
     log.debug("SQL Query: %s", cmd)
     cur.execute(cmd)
     return True
@@ -158,8 +204,11 @@ def list_length(queue):
     """
     Provide the number of items in a queue
     """
-    items = _list_items(queue)
-    return len(items)
+    with _conn() as cur:
+        cmd = "SELECT COUNT(*) FROM {}".format(queue)
+        log.debug("SQL Query: %s", cmd)
+        cur.execute(cmd)
+        return cur.fetchone()[0]
 
 
 def _queue_exists(queue):
@@ -175,12 +224,15 @@ def _queue_exists(queue):
 
 
 def handle_queue_creation(queue):
+    if queue in _KNOWN_QUEUES:
+        return
     if not _queue_exists(queue):
         with _conn(commit=True) as cur:
             log.debug("Queue %s does not exist. Creating", queue)
             _create_table(cur, queue)
     else:
         log.debug("Queue %s already exists.", queue)
+    _KNOWN_QUEUES.add(queue)
 
 
 def insert(queue, items):
@@ -192,10 +244,10 @@ def insert(queue, items):
     with _conn(commit=True) as cur:
         if isinstance(items, dict):
             items = salt.utils.json.dumps(items)
-            cmd = "INSERT INTO {}(data) VALUES('{}')".format(queue, items)
+            cmd = "INSERT INTO {}(data) VALUES (%s)".format(queue)
             log.debug("SQL Query: %s", cmd)
             try:
-                cur.execute(cmd)
+                cur.execute(cmd, (items,))
             except psycopg2.IntegrityError as esc:
                 return "Item already exists in this queue. postgres error: {}".format(
                     esc
@@ -220,11 +272,9 @@ def delete(queue, items):
     """
     with _conn(commit=True) as cur:
         if isinstance(items, dict):
-            cmd = "DELETE FROM {} WHERE data = '{}'".format(
-                queue, salt.utils.json.dumps(items)
-            )
+            cmd = "DELETE FROM {} WHERE data = %s".format(queue)
             log.debug("SQL Query: %s", cmd)
-            cur.execute(cmd)
+            cur.execute(cmd, (salt.utils.json.dumps(items),))
             return True
         if isinstance(items, list):
             items = [(salt.utils.json.dumps(el),) for el in items]
@@ -237,8 +287,12 @@ def delete(queue, items):
 def pop(queue, quantity=1, is_runner=False):
     """
     Pop one or more or all items from the queue return them.
+
+    The rows are claimed and deleted in one statement, oldest first. Rows
+    already claimed by another consumer are skipped rather than waited on.
     """
-    cmd = "SELECT id, data FROM {}".format(queue)
+    limit = ""
+    params = ()
     if quantity != "all":
         try:
             quantity = int(quantity)
@@ -247,19 +301,21 @@ def pop(queue, quantity=1, is_runner=False):
                 exc
             )
             raise SaltInvocationError(error_txt)
-        cmd = "".join([cmd, " LIMIT {};".format(quantity)])
+        limit = " LIMIT %s"
+        params = (quantity,)
+    lock = " FOR UPDATE"
+    if __opts__.get("queue.{}.skip_locked".format(__virtualname__), True):
+        lock = " FOR UPDATE SKIP LOCKED"
+    cmd = (
+        "DELETE FROM {0} WHERE id IN "
+        "(SELECT id FROM {0} ORDER BY id{1}{2}) RETURNING id, data;".format(
+            queue, limit, lock
+        )
+    )
     log.debug("SQL Query: %s", cmd)
-    items = []
     with _conn(commit=True) as cur:
-        cur.execute(cmd)
+        cur.execute(cmd, params)
         result = cur.fetchall()
-        if len(result) > 0:
-            ids = [str(item[0]) for item in result]
-            items = [item[1] for item in result]
-            idlist = "','".join(ids)
-            del_cmd = "DELETE FROM {} WHERE id IN ('{}');".format(queue, idlist)
-
-            log.debug("SQL Query: %s", del_cmd)
-
-            cur.execute(del_cmd)
-    return items
+    # RETURNING does not guarantee any order
+    result.sort(key=lambda item: item[0])
+    return [item[1] for item in result]
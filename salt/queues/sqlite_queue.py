@@ -10,13 +10,19 @@ It's possible to store the sqlite3 database files by setting `sqlite_queue_dir`
 to another location::
 
     sqlite_queue_dir: /home/myuser/salt/master/queues
+
+Each queue database is opened in WAL journaling mode and its connection is
+kept open for the life of the process, so repeated calls against the same
+queue do not pay for reconnecting or checking the schema again. Items are
+popped in insertion (FIFO) order.
 """
 
+import contextlib
 import glob
 import logging
 import os
-import re
 import sqlite3
+import threading
 
 import salt.utils.json
 from salt.exceptions import SaltInvocationError
@@ -26,6 +32,10 @@ log = logging.getLogger(__name__)
 # Define the module's virtual name
 __virtualname__ = "sqlite"
 
+# Per-thread cache of open connections, keyed by database path. The pid is
+# recorded so that a forked process does not reuse its parent's handles.
+_CONNECTIONS = threading.local()
+
 
 def __virtual__():
     # All python servers should have sqlite3 and so be able to use
@@ -35,35 +45,52 @@ def __virtual__():
 
 def _conn(queue):
     """
-    Return an sqlite connection
+    Return an sqlite connection, reusing a cached one when possible
     """
     queue_dir = __opts__["sqlite_queue_dir"]
     db = os.path.join(queue_dir, "{}.db".format(queue))
-    log.debug("Connecting to: %s", db)
 
-    con = sqlite3.connect(db)
-    tables = _list_tables(con)
-    if queue not in tables:
-        _create_table(con, queue)
+    pid = os.getpid()
+    if getattr(_CONNECTIONS, "pid", None) != pid:
+        _CONNECTIONS.pid = pid
+        _CONNECTIONS.cache = {}
+    con = _CONNECTIONS.cache.get(db)
+    if con is not None:
+        return con
+
+    log.debug("Connecting to: %s", db)
+    # Transactions are managed explicitly through _transaction()
+    con = sqlite3.connect(db, isolation_level=None)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    _create_table(con, queue)
+    _CONNECTIONS.cache[db] = con
     return con
 
 
-def _list_tables(con):
-    with con:
-        cur = con.cursor()
-        cmd = 'SELECT name FROM sqlite_master WHERE type = "table"'
-        log.debug("SQL Query: %s", cmd)
-        cur.execute(cmd)
-        result = cur.fetchall()
-        return [x[0] for x in result]
+@contextlib.contextmanager
+def _transaction(con):
+    """
+    Run the enclosed statements in a single write transaction. The write lock
+    is taken up front so that a select followed by a delete is atomic.
+    """
+    cur = con.cursor()
+    cur.execute("BEGIN IMMEDIATE")
+    try:
+        yield cur
+    except BaseException:
+        cur.execute("ROLLBACK")
+        raise
+    else:
+        cur.execute("COMMIT")
 
 
 def _create_table(con, queue):
-    with con:
-        cur = con.cursor()
-        cmd = "CREATE TABLE {}(id INTEGER PRIMARY KEY, name TEXT UNIQUE)".format(queue)
-        log.debug("SQL Query: %s", cmd)
-        cur.execute(cmd)
+    cmd = "CREATE TABLE IF NOT EXISTS {}(id INTEGER PRIMARY KEY, name TEXT UNIQUE)".format(
+        queue
+    )
+    log.debug("SQL Query: %s", cmd)
+    con.execute(cmd)
     return True
 
 
@@ -72,13 +99,9 @@ def _list_items(queue):
     Private function to list contents of a queue
     """
     con = _conn(queue)
-    with con:
-        cur = con.cursor()
-        cmd = "SELECT name FROM {}".format(queue)
-        log.debug("SQL Query: %s", cmd)
-        cur.execute(cmd)
-        contents = cur.fetchall()
-    return contents
+    cmd = "SELECT name FROM {} ORDER BY id".format(queue)
+    log.debug("SQL Query: %s", cmd)
+    return con.execute(cmd).fetchall()
 
 
 def _list_queues():
@@ -114,60 +137,45 @@ def list_length(queue):
     """
     Provide the number of items in a queue
     """
-    items = _list_items(queue)
-    return len(items)
+    con = _conn(queue)
+    cmd = "SELECT COUNT(*) FROM {}".format(queue)
+    log.debug("SQL Query: %s", cmd)
+    return con.execute(cmd).fetchone()[0]
 
 
-def _quote_escape(item):
+def _encode(item):
     """
-    Make sure single quotes are escaped properly in sqlite3 fashion.
-    e.g.: ' becomes ''
+    Return the stored representation of a queue item
     """
-
-    rex_sqlquote = re.compile("'", re.M)
-
-    return rex_sqlquote.sub("''", item)
+    if isinstance(item, dict):
+        return salt.utils.json.dumps(item).replace('"', "'")
+    return item
 
 
 def insert(queue, items):
     """
     Add an item or items to a queue
+
+    A list of items is inserted with a single statement in one transaction.
     """
     con = _conn(queue)
-    with con:
-        cur = con.cursor()
-        if isinstance(items, str):
-            items = _quote_escape(items)
-            cmd = "INSERT INTO {}(name) VALUES('{}')".format(queue, items)
-            log.debug("SQL Query: %s", cmd)
-            try:
-                cur.execute(cmd)
-            except sqlite3.IntegrityError as esc:
-                return "Item already exists in this queue. sqlite error: {}".format(esc)
-        if isinstance(items, list):
-            items = [_quote_escape(el) for el in items]
-            cmd = "INSERT INTO {}(name) VALUES(?)".format(queue)
-            log.debug("SQL Query: %s", cmd)
-            newitems = []
-            for item in items:
-                newitems.append((item,))
-                # we need a list of one item tuples here
-            try:
-                cur.executemany(cmd, newitems)
-            except sqlite3.IntegrityError as esc:
-                return (
-                    "One or more items already exists in this queue. "
-                    "sqlite error: {}".format(esc)
-                )
-        if isinstance(items, dict):
-            items = salt.utils.json.dumps(items).replace('"', "'")
-            items = _quote_escape(items)
-            cmd = "INSERT INTO {}(name) VALUES('{}')".format(queue, items)
-            log.debug("SQL Query: %s", cmd)
-            try:
-                cur.execute(cmd)
-            except sqlite3.IntegrityError as esc:
-                return "Item already exists in this queue. sqlite error: {}".format(esc)
+    cmd = "INSERT INTO {}(name) VALUES(?)".format(queue)
+    log.debug("SQL Query: %s", cmd)
+    if isinstance(items, list):
+        try:
+            with _transaction(con) as cur:
+                cur.executemany(cmd, [(_encode(item),) for item in items])
+        except sqlite3.IntegrityError as esc:
+            return (
+                "One or more items already exists in this queue. "
+                "sqlite error: {}".format(esc)
+            )
+    elif isinstance(items, (str, dict)):
+        try:
+            with _transaction(con) as cur:
+                cur.execute(cmd, (_encode(items),))
+        except sqlite3.IntegrityError as esc:
+            return "Item already exists in this queue. sqlite error: {}".format(esc)
     return True
 
 
@@ -176,38 +184,27 @@ def delete(queue, items):
     Delete an item or items from a queue
     """
     con = _conn(queue)
-    with con:
-        cur = con.cursor()
-        if isinstance(items, str):
-            items = _quote_escape(items)
-            cmd = "DELETE FROM {} WHERE name = '{}'".format(queue, items)
-            log.debug("SQL Query: %s", cmd)
-            cur.execute(cmd)
-            return True
-        if isinstance(items, list):
-            items = [_quote_escape(el) for el in items]
-            cmd = "DELETE FROM {} WHERE name = ?".format(queue)
-            log.debug("SQL Query: %s", cmd)
-            newitems = []
-            for item in items:
-                newitems.append((item,))
-                # we need a list of one item tuples here
-            cur.executemany(cmd, newitems)
-        if isinstance(items, dict):
-            items = salt.utils.json.dumps(items).replace('"', "'")
-            items = _quote_escape(items)
-            cmd = "DELETE FROM {} WHERE name = '{}'".format(queue, items)
-            log.debug("SQL Query: %s", cmd)
-            cur.execute(cmd)
-            return True
-        return True
+    cmd = "DELETE FROM {} WHERE name = ?".format(queue)
+    log.debug("SQL Query: %s", cmd)
+    if isinstance(items, list):
+        with _transaction(con) as cur:
+            cur.executemany(cmd, [(_encode(item),) for item in items])
+    elif isinstance(items, (str, dict)):
+        with _transaction(con) as cur:
+            cur.execute(cmd, (_encode(items),))
+    return True
 
 
 def pop(queue, quantity=1, is_runner=False):
     """
     Pop one or more or all items from the queue return them.
+
+    Items are returned oldest first. The selected rows are removed with a
+    single rowid range delete inside the same transaction, so the cost of a
+    pop depends on the number of items popped and not on the queue length.
     """
-    cmd = "SELECT name FROM {}".format(queue)
+    cmd = "SELECT id, name FROM {} ORDER BY id".format(queue)
+    params = ()
     if quantity != "all":
         try:
             quantity = int(quantity)
@@ -216,24 +213,20 @@ def pop(queue, quantity=1, is_runner=False):
                 exc
             )
             raise SaltInvocationError(error_txt)
-        cmd = "".join([cmd, " LIMIT {}".format(quantity)])
+        cmd = "".join([cmd, " LIMIT ?"])
+        params = (quantity,)
     log.debug("SQL Query: %s", cmd)
     con = _conn(queue)
-    items = []
-    with con:
-        cur = con.cursor()
-        result = cur.execute(cmd).fetchall()
-        if len(result) > 0:
-            items = [item[0] for item in result]
-            itemlist = '","'.join(items)
-            _quote_escape(itemlist)
-            del_cmd = 'DELETE FROM {} WHERE name IN ("{}")'.format(queue, itemlist)
-
+    with _transaction(con) as cur:
+        result = cur.execute(cmd, params).fetchall()
+        if result:
+            # New rows always get a rowid above the current maximum, so
+            # everything up to the last selected id is exactly what we read.
+            del_cmd = "DELETE FROM {} WHERE id <= ?".format(queue)
             log.debug("SQL Query: %s", del_cmd)
-
-            cur.execute(del_cmd)
-        con.commit()
+            cur.execute(del_cmd, (result[-1][0],))
+    items = [item[1] for item in result]
     if is_runner:
-        items = [salt.utils.json.loads(item[0].replace("'", '"')) for item in result]
+        items = [salt.utils.json.loads(item.replace("'", '"')) for item in items]
     log.info(items)
     return items
@@ -56,6 +56,20 @@ the default location:
       skip_on_error: True
       mode: (pickle|text)
 
+The connection to carbon is kept open and reused across returns and events,
+and is re-established if it drops. Metrics sent with the pickle protocol are
+split into payloads of at most ``carbon.chunk_size`` metrics (500 by default).
+Metrics may also be buffered across returns by setting ``carbon.buffer_size``
+to the number of metrics to collect before sending. Buffered metrics are sent
+at least every ``carbon.buffer_age`` seconds (5 by default). Metrics are only
+buffered on the master, minion job processes exit without sending them:
+
+.. code-block:: yaml
+
+    carbon.buffer_size: 5000
+    carbon.buffer_age: 5
+    carbon.chunk_size: 500
+
 To use the carbon returner, append '--return carbon' to the salt command.
 
 .. code-block:: bash
@@ -80,13 +94,15 @@ To override individual configuration items, append --return_kwargs '{"key:": "va
 
 """
 
+import atexit
 import logging
+import os
 import pickle
 import socket
 import struct
+import threading
 import time
 from collections.abc import Mapping
-from contextlib import contextmanager
 
 import salt.returners
 import salt.utils.jid
@@ -96,6 +112,11 @@ log = logging.getLogger(__name__)
 # Define the module's virtual name
 __virtualname__ = "carbon"
 
+# Open senders, keyed by (pid, host, port, mode)
+_SENDERS = {}
+_SENDERS_LOCK = threading.Lock()
+_WARNED_NOT_MASTER = False
+
 
 def __virtual__():
     return __virtualname__
@@ -105,7 +126,15 @@ def _get_options(ret):
     """
     Returns options used for the carbon returner.
     """
-    attrs = {"host": "host", "port": "port", "skip": "skip_on_error", "mode": "mode"}
+    attrs = {
+        "host": "host",
+        "port": "port",
+        "skip": "skip_on_error",
+        "mode": "mode",
+        "buffer_size": "buffer_size",
+        "buffer_age": "buffer_age",
+        "chunk_size": "chunk_size",
+    }
 
     _options = salt.returners.get_returner_options(
         __virtualname__, ret, attrs, __salt__=__salt__, __opts__=__opts__
@@ -113,37 +142,128 @@ def _get_options(ret):
     return _options
 
 
-@contextmanager
-def _carbon(host, port):
+class _CarbonSender:
     """
-    Context manager to ensure the clean creation and destruction of a socket.
+    Long lived connection to a carbon server.
 
-    host
-        The IP or hostname of the carbon server
-    port
-        The port that carbon is listening on
+    Metrics are collected with ``add`` and written with ``flush``. The socket
+    is opened on first use and reopened once if a send fails. Metrics that
+    could not be sent are queued again, keeping at most ``max_pending``.
     """
-    carbon_sock = None
-
-    try:
-        carbon_sock = socket.socket(
-            socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP
-        )
 
-        carbon_sock.connect((host, port))
-    except OSError as err:
-        log.error("Error connecting to %s:%s, %s", host, port, err)
-        raise
-    else:
+    def __init__(
+        self, host, port, mode, chunk_size=500, timeout=10, max_pending=100000
+    ):
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.chunk_size = max(int(chunk_size), 1)
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._sock = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def _connect(self):
+        try:
+            self._sock = socket.create_connection(
+                (self.host, self.port), timeout=self.timeout
+            )
+        except OSError as err:
+            log.error("Error connecting to %s:%s, %s", self.host, self.port, err)
+            raise
         log.debug("Connected to carbon")
-        yield carbon_sock
-    finally:
-        if carbon_sock is not None:
-            # Shut down and close socket
+
+    def close(self):
+        if self._sock is not None:
             log.debug("Destroying carbon socket")
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _sendall(self, data):
+        for attempt in (1, 2):
+            if self._sock is None:
+                self._connect()
+            try:
+                self._sock.sendall(data)
+                log.debug("Sent %s bytes to carbon", len(data))
+                return
+            except OSError as err:
+                self.close()
+                if attempt == 2:
+                    raise
+                log.warning("Error sending to carbon, reconnecting: %s", err)
+
+    def _payloads(self, metrics):
+        for idx in range(0, len(metrics), self.chunk_size):
+            chunk = metrics[idx : idx + self.chunk_size]
+            if self.mode == "pickle":
+                yield _send_picklemetrics(chunk)
+            else:
+                yield _send_textmetrics(chunk).encode("utf-8")
+
+    def add(self, metrics):
+        """
+        Queue metrics and return the number of metrics now pending
+        """
+        with self._lock:
+            self._pending.extend(metrics)
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Send every pending metric
+        """
+        with self._lock:
+            metrics, self._pending = self._pending, []
+            sent = 0
+            try:
+                for payload in self._payloads(metrics):
+                    self._sendall(payload)
+                    sent += self.chunk_size
+            except OSError:
+                unsent = metrics[sent:]
+                if len(unsent) > self.max_pending:
+                    log.warning(
+                        "Dropping %d metrics that could not be sent to carbon",
+                        len(unsent) - self.max_pending,
+                    )
+                    unsent = unsent[-self.max_pending :]
+                self._pending = unsent
+                raise
+
+    def _flush_periodically(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except OSError as err:
+                log.error("Error flushing buffered metrics to carbon: %s", err)
+
+    def start_flusher(self, interval):
+        """
+        Make sure buffered metrics are sent at least every ``interval`` seconds
+        """
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, args=(interval,), name="carbon-flush"
+        )
+        self._flusher.daemon = True
+        self._flusher.start()
 
-            carbon_sock.shutdown(socket.SHUT_RDWR)
-            carbon_sock.close()
+
+def _get_sender(host, port, mode, chunk_size):
+    key = (os.getpid(), host, port, mode)
+    with _SENDERS_LOCK:
+        sender = _SENDERS.get(key)
+        if sender is None:
+            sender = _SENDERS[key] = _CarbonSender(host, port, mode, chunk_size)
+            atexit.register(sender.flush)
+    return sender
 
 
 def _send_picklemetrics(metrics):
@@ -173,14 +293,14 @@ def _send_textmetrics(metrics):
 
 def _walk(path, value, metrics, timestamp, skip):
     """
-    Recursively include metrics from *value*.
+    Include metrics from *value*, walking nested data without recursion.
 
     path
         The dot-separated path of the metric.
     value
-        A dictionary or value from a dictionary. If a dictionary, ``_walk``
-        will be called again with the each key/value pair as a new set of
-        metrics.
+        A dictionary or value from a dictionary. Each key/value pair of a
+        dictionary, and each item of a list, is walked as a new set of
+        metrics below ``path``.
     metrics
         The list of metrics that will be sent to carbon, formatted as::
 
@@ -190,45 +310,76 @@ def _walk(path, value, metrics, timestamp, skip):
         to a float. Defaults to `False`.
     """
     log.trace(
-        "Carbon return walking path: %s, value: %s, metrics: %s, timestamp: %s",
+        "Carbon return walking path: %s, value: %s, timestamp: %s",
         path,
         value,
-        metrics,
         timestamp,
     )
-    if isinstance(value, Mapping):
-        for key, val in value.items():
-            _walk("{}.{}".format(path, key), val, metrics, timestamp, skip)
-    elif isinstance(value, list):
-        for item in value:
-            _walk("{}.{}".format(path, item), item, metrics, timestamp, skip)
-
-    else:
-        try:
-            val = float(value)
-            metrics.append((path, val, timestamp))
-        except (TypeError, ValueError):
-            msg = (
-                "Error in carbon returner, when trying to convert metric: "
-                "{}, with val: {}".format(path, value)
+    # Children are pushed in reverse so metrics come out in the same order
+    # as a depth first recursive walk would produce them
+    stack = [(path, value)]
+    while stack:
+        path, value = stack.pop()
+        if isinstance(value, Mapping):
+            stack.extend(
+                (path + "." + str(key), val)
+                for key, val in reversed(list(value.items()))
             )
-            if skip:
-                log.debug(msg)
-            else:
-                log.info(msg)
-                raise
+        elif isinstance(value, list):
+            stack.extend((path + "." + str(item), item) for item in reversed(value))
+        else:
+            try:
+                val = float(value)
+                metrics.append((path, val, timestamp))
+            except (TypeError, ValueError):
+                msg = (
+                    "Error in carbon returner, when trying to convert metric: "
+                    "{}, with val: {}".format(path, value)
+                )
+                if skip:
+                    log.debug(msg)
+                else:
+                    log.info(msg)
+                    raise
+
+
+def _collect(saltdata, metric_base, opts, metrics):
+    """
+    Walk the data into ``metrics``
+    """
+    # TODO: possible to use time return from salt job to be slightly more precise?
+    # convert the jid to unix timestamp?
+    # {'fun': 'test.version', 'jid': '20130113193949451054', 'return': '0.11.0', 'id': 'salt'}
+    timestamp = int(time.time())
+    log.trace("Carbon returning walking data: %s", saltdata)
+    _walk(metric_base, saltdata, metrics, timestamp, opts.get("skip"))
 
 
-def _send(saltdata, metric_base, opts):
+def _buffer_size(opts):
     """
-    Send the data to carbon
+    Return the number of metrics to buffer, metrics are only buffered on the
+    master
     """
+    global _WARNED_NOT_MASTER
+    buffer_size = int(opts.get("buffer_size") or 0)
+    if buffer_size > 0 and __opts__.get("__role") != "master":
+        if not _WARNED_NOT_MASTER:
+            log.warning(
+                "carbon.buffer_size is only supported on the master, metrics are "
+                "sent immediately"
+            )
+            _WARNED_NOT_MASTER = True
+        return 0
+    return buffer_size
+
 
+def _send_metrics(metrics, opts):
+    """
+    Send the metrics to carbon, or buffer them if buffering is configured
+    """
     host = opts.get("host")
     port = opts.get("port")
-    skip = opts.get("skip")
-    metric_base_pattern = opts.get("carbon.metric_base_pattern")
-    mode = opts.get("mode").lower() if "mode" in opts else "text"
+    mode = opts.get("mode").lower() if opts.get("mode") else "text"
 
     log.debug("Carbon minion configured with host: %s:%s", host, port)
     log.debug("Using carbon protocol: %s", mode)
@@ -237,28 +388,23 @@ def _send(saltdata, metric_base, opts):
         log.error("Host or port not defined")
         return
 
-    # TODO: possible to use time return from salt job to be slightly more precise?
-    # convert the jid to unix timestamp?
-    # {'fun': 'test.version', 'jid': '20130113193949451054', 'return': '0.11.0', 'id': 'salt'}
-    timestamp = int(time.time())
+    sender = _get_sender(host, port, mode, opts.get("chunk_size") or 500)
+    pending = sender.add(metrics)
+    buffer_size = _buffer_size(opts)
+    if pending >= buffer_size:
+        sender.flush()
+    else:
+        sender.start_flusher(float(opts.get("buffer_age") or 5))
 
-    handler = _send_picklemetrics if mode == "pickle" else _send_textmetrics
-    metrics = []
-    log.trace("Carbon returning walking data: %s", saltdata)
-    _walk(metric_base, saltdata, metrics, timestamp, skip)
-    data = handler(metrics)
-    log.trace("Carbon inserting data: %s", data)
-
-    with _carbon(host, port) as sock:
-        total_sent_bytes = 0
-        while total_sent_bytes < len(data):
-            sent_bytes = sock.send(data[total_sent_bytes:])
-            if sent_bytes == 0:
-                log.error("Bytes sent 0, Connection reset?")
-                return
 
-            log.debug("Sent %s bytes to carbon", sent_bytes)
-            total_sent_bytes += sent_bytes
+def _send(saltdata, metric_base, opts):
+    """
+    Send the data to carbon
+    """
+    metrics = []
+    _collect(saltdata, metric_base, opts, metrics)
+    log.trace("Carbon inserting metrics: %s", metrics)
+    _send_metrics(metrics, opts)
 
 
 def event_return(events):
@@ -269,11 +415,13 @@ def event_return(events):
     """
     opts = _get_options({})  # Pass in empty ret, since this is a list of events
     opts["skip"] = True
+    metrics = []
     for event in events:
         log.trace("Carbon returner received event: %s", event)
         metric_base = event["tag"]
         saltdata = event["data"].get("data")
-        _send(saltdata, metric_base, opts)
+        _collect(saltdata, metric_base, opts, metrics)
+    _send_metrics(metrics, opts)
 
 
 def returner(ret):
@@ -74,6 +74,18 @@ Minion configuration:
         Store results for state.apply, state.sls and state.highstate in the salt-state_apply index
         (or -ordered/-<date>) indexes if enabled
 
+    bulk_size: 0
+        Number of returns to collect before sending them to Elasticsearch in a single _bulk
+        request. The default of 0 sends every return as it arrives. Events passed to
+        ``event_return`` are always sent as one _bulk request per call. Returns are
+        only collected on the master, minion job processes exit without sending
+        them, and returns using ``--return_config`` or ``--return_kwargs`` are
+        always sent immediately.
+
+    bulk_age: 5
+        Maximum number of seconds a collected return is held before it is sent, even if
+        ``bulk_size`` has not been reached.
+
 .. code-block:: yaml
 
     elasticsearch:
@@ -91,11 +103,16 @@ Minion configuration:
         functions_blacklist:
           - test.ping
           - saltutil.find_job
+        bulk_size: 500
+        bulk_age: 5
 """
 
 
+import atexit
 import datetime
 import logging
+import threading
+import time
 import uuid
 from datetime import timedelta, tzinfo
 
@@ -107,6 +124,15 @@ __virtualname__ = "elasticsearch"
 
 log = logging.getLogger(__name__)
 
+# Indices already checked or created by this process
+_KNOWN_INDICES = set()
+
+# Bulk actions waiting to be sent, as (action, document) pairs
+_BULK_BUFFER = []
+_BULK_LOCK = threading.Lock()
+_FLUSHER = None
+_WARNED_NOT_MASTER = False
+
 STATE_FUNCTIONS = {
     "state.apply": "state_apply",
     "state.highstate": "state_apply",
@@ -143,6 +169,8 @@ def _get_options(ret=None):
         "states_order_output": False,
         "states_count": False,
         "states_single_index": False,
+        "bulk_size": 0,
+        "bulk_age": 5,
     }
 
     attrs = {
@@ -159,6 +187,8 @@ def _get_options(ret=None):
         "states_count": "states_count",
         "states_order_output": "states_order_output",
         "states_single_index": "states_single_index",
+        "bulk_size": "bulk_size",
+        "bulk_age": "bulk_age",
     }
 
     _options = salt.returners.get_returner_options(
@@ -173,6 +203,8 @@ def _get_options(ret=None):
 
 
 def _ensure_index(index):
+    if index in _KNOWN_INDICES:
+        return
     index_exists = __salt__["elasticsearch.index_exists"](index)
     if not index_exists:
         options = _get_options()
@@ -185,6 +217,98 @@ def _ensure_index(index):
         }
         __salt__["elasticsearch.index_create"]("{}-v1".format(index), index_definition)
         __salt__["elasticsearch.alias_create"]("{}-v1".format(index), index)
+    _KNOWN_INDICES.add(index)
+
+
+def _bulk_action(index, doc_type, doc_id=None):
+    action = {"_index": index, "_type": doc_type}
+    if doc_id is not None:
+        action["_id"] = str(doc_id)
+    return {"index": action}
+
+
+def _send_bulk(actions):
+    """
+    Send (action, document) pairs to Elasticsearch in a single _bulk request
+    """
+    if not actions:
+        return
+    lines = []
+    for action, document in actions:
+        lines.append(salt.utils.json.dumps(action))
+        lines.append(salt.utils.json.dumps(document))
+    # The bulk API requires the body to end with a newline
+    response = __salt__["elasticsearch.document_bulk"]("\n".join(lines) + "\n")
+    # Documents rejected by Elasticsearch do not fail the whole request
+    if not response or not response.get("errors"):
+        return
+    for item in response.get("items", []):
+        for action, result in item.items():
+            if "error" in result:
+                log.error(
+                    "Elasticsearch rejected the %s of a document in %s: "
+                    "status %s, error %s",
+                    action,
+                    result.get("_index"),
+                    result.get("status"),
+                    result["error"],
+                )
+
+
+def _flush_bulk():
+    with _BULK_LOCK:
+        pending = _BULK_BUFFER[:]
+        del _BULK_BUFFER[:]
+    try:
+        _send_bulk(pending)
+    except Exception as exc:  # pylint: disable=broad-except
+        log.error(
+            "Failed to send %d buffered returns to Elasticsearch: %s",
+            len(pending),
+            exc,
+        )
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        _flush_bulk()
+
+
+def _start_flusher(interval):
+    """
+    Start the background thread sending returns older than bulk_age
+    """
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    if _FLUSHER is None:
+        atexit.register(_flush_bulk)
+    _FLUSHER = threading.Thread(
+        target=_flush_periodically, args=(interval,), name="elasticsearch-bulk-flush"
+    )
+    _FLUSHER.daemon = True
+    _FLUSHER.start()
+
+
+def _bulk_size(ret, options):
+    """
+    Return the number of returns to collect before sending them, returns are
+    only collected on the master and for the default configuration
+    """
+    global _WARNED_NOT_MASTER
+    bulk_size = int(options["bulk_size"] or 0)
+    if bulk_size <= 0 or ret.get("ret_config") or ret.get("ret_kwargs"):
+        return 0
+    if __opts__.get("__role") != "master":
+        if not _WARNED_NOT_MASTER:
+            log.warning(
+                "The elasticsearch bulk_size option is only supported on the "
+                "master, returns are sent immediately"
+            )
+            _WARNED_NOT_MASTER = True
+        return 0
+    return bulk_size
 
 
 def _convert_keys(data):
@@ -325,10 +449,21 @@ def returner(ret):
     if options["debug_returner_payload"]:
         log.debug("elasicsearch payload: %s", data)
 
-    # Post the payload
-    ret = __salt__["elasticsearch.document_create"](
-        index=index, doc_type=options["doc_type"], body=salt.utils.json.dumps(data)
-    )
+    bulk_size = _bulk_size(ret, options)
+    if bulk_size <= 0:
+        # Post the payload
+        __salt__["elasticsearch.document_create"](
+            index=index, doc_type=options["doc_type"], body=salt.utils.json.dumps(data)
+        )
+        return
+
+    with _BULK_LOCK:
+        _BULK_BUFFER.append((_bulk_action(index, options["doc_type"]), data))
+        full = len(_BULK_BUFFER) >= bulk_size
+    if full:
+        _flush_bulk()
+    else:
+        _start_flusher(float(options["bulk_age"] or 5))
 
 
 def event_return(events):
@@ -347,15 +482,12 @@ def event_return(events):
 
     _ensure_index(index)
 
+    actions = []
     for event in events:
         data = {"tag": event.get("tag", ""), "data": event.get("data", "")}
+        actions.append((_bulk_action(index, doc_type, uuid.uuid4()), data))
 
-    ret = __salt__["elasticsearch.document_create"](
-        index=index,
-        doc_type=doc_type,
-        id=uuid.uuid4(),
-        body=salt.utils.json.dumps(data),
-    )
+    _send_bulk(actions)
 
 
 def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
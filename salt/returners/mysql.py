@@ -58,6 +58,28 @@ set `archive_jobs` to True.  Salt will create 3 archive tables
 and move the contents of `jids`, `salt_returns`, and `salt_events` that are
 more than `keep_jobs_seconds` seconds old to these tables.
 
+Returns can be written in batches instead of with one ``INSERT`` and
+``COMMIT`` per minion return. Set ``mysql.batch_size`` to the number of
+returns to collect before they are written with a single multi-row insert.
+Collected returns are written at least every ``mysql.flush_interval``
+seconds. With ``mysql.async_writes`` enabled, all writes happen on a
+background thread so the returner never waits on the database. Returns using
+``--return_config`` or ``--return_kwargs`` are always written immediately.
+
+Batching is only done on the master, whose returner process outlives the
+jobs. Minion job processes exit without flushing, so these options are
+ignored with a warning when set in the minion configuration.
+
+.. code-block:: yaml
+
+    mysql.batch_size: 500
+    mysql.flush_interval: 2
+    mysql.async_writes: True
+
+Old jobs are purged and archived in chunks of ``mysql.purge_chunk_size``
+jobs (events are chunked by id range), committing after every chunk so the
+tables are never locked for long. The default is ``1000``.
+
 Use the following mysql database schema:
 
 .. code-block:: sql
@@ -138,8 +160,10 @@ To override individual configuration items, append --return_kwargs '{"key:": "va
 
 """
 
+import atexit
 import logging
 import sys
+import threading
 from contextlib import contextmanager
 
 import salt.exceptions
@@ -176,6 +200,26 @@ log = logging.getLogger(__name__)
 # Define the module's virtual name
 __virtualname__ = "mysql"
 
+_RETURNS_SQL = """INSERT INTO `salt_returns`
+                  (`fun`, `jid`, `return`, `id`, `success`, `full_ret`)
+                  VALUES (%s, %s, %s, %s, %s, %s)"""
+
+_EVENTS_SQL = """INSERT INTO `salt_events` (`tag`, `data`, `master_id`)
+                 VALUES (%s, %s, %s)"""
+
+# Maximum number of rows passed to a single executemany call
+_INSERT_CHUNK_SIZE = 1000
+
+# Returns waiting to be written when batching is enabled
+_BATCH = []
+_BATCH_LOCK = threading.Lock()
+# Serializes batch writes, which share one connection
+_WRITE_LOCK = threading.Lock()
+_FLUSHER = None
+# Wakes the background writer before the flush interval has passed
+_FLUSH_NOW = threading.Event()
+_WARNED_NOT_MASTER = False
+
 
 def __virtual__():
     """
@@ -197,6 +241,10 @@ def _get_options(ret=None):
         "ssl_ca": None,
         "ssl_cert": None,
         "ssl_key": None,
+        "batch_size": 0,
+        "async_writes": False,
+        "flush_interval": 1,
+        "purge_chunk_size": 1000,
     }
 
     attrs = {
@@ -208,6 +256,10 @@ def _get_options(ret=None):
         "ssl_ca": "ssl_ca",
         "ssl_cert": "ssl_cert",
         "ssl_key": "ssl_key",
+        "batch_size": "batch_size",
+        "async_writes": "async_writes",
+        "flush_interval": "flush_interval",
+        "purge_chunk_size": "purge_chunk_size",
     }
 
     _options = salt.returners.get_returner_options(
@@ -223,25 +275,32 @@ def _get_options(ret=None):
         if isinstance(v, str) and v.lower() == "none":
             # Ensure 'None' is rendered as None
             _options[k] = None
-        if k == "port":
-            # Ensure port is an int
+        if k in ("port", "batch_size", "purge_chunk_size"):
+            # Ensure port and sizes are ints
             _options[k] = int(v)
+        elif k == "flush_interval":
+            _options[k] = float(v)
+        elif k == "async_writes":
+            _options[k] = salt.utils.data.is_true(v)
 
     return _options
 
 
 @contextmanager
-def _get_serv(ret=None, commit=False):
+def _get_serv(ret=None, commit=False, conn_key="mysql_returner_conn"):
     """
     Return a mysql cursor
+
+    ``conn_key`` names the ``__context__`` slot holding the connection, so a
+    background writer can keep a connection of its own.
     """
     _options = _get_options(ret)
 
     connect = True
-    if __context__ and "mysql_returner_conn" in __context__:
+    if __context__ and conn_key in __context__:
         try:
             log.debug("Trying to reuse MySQL connection pool")
-            conn = __context__["mysql_returner_conn"]
+            conn = __context__[conn_key]
             conn.ping()
             connect = False
         except OperationalError as exc:
@@ -269,7 +328,7 @@ def _get_serv(ret=None, commit=False):
             )
 
             try:
-                __context__["mysql_returner_conn"] = conn
+                __context__[conn_key] = conn
             except TypeError:
                 pass
         except OperationalError as exc:
@@ -293,6 +352,85 @@ def _get_serv(ret=None, commit=False):
             cursor.execute("ROLLBACK")
 
 
+def _executemany(cur, sql, rows):
+    """
+    Insert rows in chunks, letting the driver turn each chunk into a single
+    multi-row ``INSERT``
+    """
+    for idx in range(0, len(rows), _INSERT_CHUNK_SIZE):
+        cur.executemany(sql, rows[idx : idx + _INSERT_CHUNK_SIZE])
+
+
+def _return_row(ret):
+    cleaned_return = salt.utils.data.decode(ret)
+    return (
+        ret["fun"],
+        ret["jid"],
+        salt.utils.json.dumps(cleaned_return["return"]),
+        ret["id"],
+        ret.get("success", False),
+        salt.utils.json.dumps(cleaned_return),
+    )
+
+
+def _flush_batch():
+    """
+    Write every collected return in a single transaction
+    """
+    with _WRITE_LOCK:
+        with _BATCH_LOCK:
+            rows = _BATCH[:]
+            del _BATCH[:]
+        if not rows:
+            return
+        try:
+            with _get_serv(commit=True, conn_key="mysql_returner_batch_conn") as cur:
+                _executemany(cur, _RETURNS_SQL, rows)
+        except (salt.exceptions.SaltMasterError, MySQLdb.Error) as exc:
+            log.critical(exc)
+            log.critical("Could not store %d returns with MySQL returner.", len(rows))
+
+
+def _flush_periodically(interval):
+    while True:
+        _FLUSH_NOW.wait(interval)
+        _FLUSH_NOW.clear()
+        _flush_batch()
+
+
+def _start_flusher(interval):
+    """
+    Start the background thread writing out collected returns
+    """
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    if _FLUSHER is None:
+        atexit.register(_flush_batch)
+    _FLUSHER = threading.Thread(
+        target=_flush_periodically, args=(interval,), name="mysql-returner-flush"
+    )
+    _FLUSHER.daemon = True
+    _FLUSHER.start()
+
+
+def _batch_size(_options):
+    """
+    Return the number of returns to collect before writing them, batching is
+    only done on the master
+    """
+    global _WARNED_NOT_MASTER
+    if _options["batch_size"] > 0 and __opts__.get("__role") != "master":
+        if not _WARNED_NOT_MASTER:
+            log.warning(
+                "mysql.batch_size is only supported on the master, returns are "
+                "written immediately"
+            )
+            _WARNED_NOT_MASTER = True
+        return 0
+    return _options["batch_size"]
+
+
 def returner(ret):
     """
     Return data to a mysql server
@@ -302,24 +440,26 @@ def returner(ret):
         ret["jid"] = prep_jid(nocache=ret.get("nocache", False))
         save_load(ret["jid"], ret)
 
+    # Returns sent to an alternative configuration are never batched, the
+    # batch is written with the default one
+    if not ret.get("ret_config") and not ret.get("ret_kwargs"):
+        _options = _get_options(ret)
+        batch_size = _batch_size(_options)
+        if batch_size > 0:
+            with _BATCH_LOCK:
+                _BATCH.append(_return_row(ret))
+                full = len(_BATCH) >= batch_size
+            _start_flusher(_options["flush_interval"])
+            if full:
+                if _options["async_writes"]:
+                    _FLUSH_NOW.set()
+                else:
+                    _flush_batch()
+            return
+
     try:
         with _get_serv(ret, commit=True) as cur:
-            sql = """INSERT INTO `salt_returns`
-                     (`fun`, `jid`, `return`, `id`, `success`, `full_ret`)
-                     VALUES (%s, %s, %s, %s, %s, %s)"""
-
-            cleaned_return = salt.utils.data.decode(ret)
-            cur.execute(
-                sql,
-                (
-                    ret["fun"],
-                    ret["jid"],
-                    salt.utils.json.dumps(cleaned_return["return"]),
-                    ret["id"],
-                    ret.get("success", False),
-                    salt.utils.json.dumps(cleaned_return),
-                ),
-            )
+            cur.execute(_RETURNS_SQL, _return_row(ret))
     except salt.exceptions.SaltMasterError as exc:
         log.critical(exc)
         log.critical(
@@ -334,13 +474,16 @@ def event_return(events):
     Requires that configuration be enabled via 'event_return'
     option in master config.
     """
+    rows = [
+        (
+            event.get("tag", ""),
+            salt.utils.json.dumps(event.get("data", "")),
+            __opts__["id"],
+        )
+        for event in events
+    ]
     with _get_serv(events, commit=True) as cur:
-        for event in events:
-            tag = event.get("tag", "")
-            data = event.get("data", "")
-            sql = """INSERT INTO `salt_events` (`tag`, `data`, `master_id`)
-                     VALUES (%s, %s, %s)"""
-            cur.execute(sql, (tag, salt.utils.json.dumps(data), __opts__["id"]))
+        _executemany(cur, _EVENTS_SQL, rows)
 
 
 def save_load(jid, load, minions=None):
@@ -494,6 +637,58 @@ def prep_jid(nocache=False, passed_jid=None):  # pylint: disable=unused-argument
     return passed_jid if passed_jid is not None else salt.utils.jid.gen_jid(__opts__)
 
 
+def _purge_chunk_size():
+    return max(_get_options()["purge_chunk_size"], 1)
+
+
+def _old_jids(cur, timestamp):
+    """
+    Return the sorted jids having returns older than ``timestamp``
+    """
+    sql = "select distinct jid from `salt_returns` where alter_time < %s order by jid"
+    cur.execute(sql, (timestamp,))
+    return [row[0] for row in cur.fetchall()]
+
+
+def _old_event_id_range(cur, timestamp):
+    """
+    Return the (min, max) ids of events older than ``timestamp``
+    """
+    sql = "select min(id), max(id) from `salt_events` where alter_time < %s"
+    cur.execute(sql, (timestamp,))
+    return cur.fetchone() or (None, None)
+
+
+def _by_jid_chunks(cur, sql, jids, timestamp=None):
+    """
+    Run ``sql`` once per chunk of jids, committing after each chunk.
+    ``sql`` contains a ``{}`` placeholder for the jid list, followed by a
+    ``%s`` for the timestamp when one is given.
+    """
+    chunk_size = _purge_chunk_size()
+    for idx in range(0, len(jids), chunk_size):
+        chunk = jids[idx : idx + chunk_size]
+        params = list(chunk)
+        if timestamp is not None:
+            params.append(timestamp)
+        cur.execute(sql.format(", ".join(["%s"] * len(chunk))), params)
+        cur.execute("COMMIT")
+
+
+def _by_id_chunks(cur, sql, id_range, timestamp):
+    """
+    Run ``sql`` once per range of event ids, committing after each range.
+    ``sql`` takes the lower id, upper id and timestamp as parameters.
+    """
+    low, high = id_range
+    if low is None:
+        return
+    chunk_size = _purge_chunk_size()
+    for start in range(low, high + 1, chunk_size):
+        cur.execute(sql, (start, min(start + chunk_size - 1, high), timestamp))
+        cur.execute("COMMIT")
+
+
 def _purge_jobs(timestamp):
     """
     Purge records from the returner tables.
@@ -502,12 +697,8 @@ def _purge_jobs(timestamp):
     """
     with _get_serv() as cur:
         try:
-            sql = (
-                "delete from `jids` where jid in (select distinct jid from salt_returns"
-                " where alter_time < %s)"
-            )
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            jids = _old_jids(cur, timestamp)
+            _by_jid_chunks(cur, "delete from `jids` where jid in ({})", jids)
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to delete contents of table 'jids'"
@@ -516,9 +707,12 @@ def _purge_jobs(timestamp):
             raise salt.exceptions.SaltRunnerError(str(e))
 
         try:
-            sql = "delete from `salt_returns` where alter_time < %s"
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            _by_jid_chunks(
+                cur,
+                "delete from `salt_returns` where jid in ({}) and alter_time < %s",
+                jids,
+                timestamp,
+            )
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to delete contents of table"
@@ -528,9 +722,13 @@ def _purge_jobs(timestamp):
             raise salt.exceptions.SaltRunnerError(str(e))
 
         try:
-            sql = "delete from `salt_events` where alter_time < %s"
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            _by_id_chunks(
+                cur,
+                "delete from `salt_events` where id between %s and %s"
+                " and alter_time < %s",
+                _old_event_id_range(cur, timestamp),
+                timestamp,
+            )
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to delete contents of table"
@@ -569,14 +767,11 @@ def _archive_jobs(timestamp):
                 raise salt.exceptions.SaltRunnerError(str(e))
 
         try:
-            sql = (
-                "insert into `{}` select * from `{}` where jid in (select distinct jid"
-                " from salt_returns where alter_time < %s)".format(
-                    target_tables["jids"], "jids"
-                )
+            jids = _old_jids(cur, timestamp)
+            sql = "insert into `{}` select * from `{}` where jid in ({{}})".format(
+                target_tables["jids"], "jids"
             )
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            _by_jid_chunks(cur, sql, jids)
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to copy contents of table 'jids'"
@@ -588,11 +783,13 @@ def _archive_jobs(timestamp):
             raise
 
         try:
-            sql = "insert into `{}` select * from `{}` where alter_time < %s".format(
-                target_tables["salt_returns"], "salt_returns"
+            sql = (
+                "insert into `{}` select * from `{}` where jid in ({{}})"
+                " and alter_time < %s".format(
+                    target_tables["salt_returns"], "salt_returns"
+                )
             )
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            _by_jid_chunks(cur, sql, jids, timestamp)
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to copy contents of table"
@@ -602,11 +799,13 @@ def _archive_jobs(timestamp):
             raise salt.exceptions.SaltRunnerError(str(e))
 
         try:
-            sql = "insert into `{}` select * from `{}` where alter_time < %s".format(
-                target_tables["salt_events"], "salt_events"
+            sql = (
+                "insert into `{}` select * from `{}` where id between %s and %s"
+                " and alter_time < %s".format(
+                    target_tables["salt_events"], "salt_events"
+                )
             )
-            cur.execute(sql, (timestamp,))
-            cur.execute("COMMIT")
+            _by_id_chunks(cur, sql, _old_event_id_range(cur, timestamp), timestamp)
         except MySQLdb.Error as e:
             log.error(
                 "mysql returner archiver was unable to copy contents of table"
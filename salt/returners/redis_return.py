@@ -92,10 +92,32 @@ cluster.skip_full_coverage_check: ``False``
 
         Most cloud hosted redis clusters will require this to be set to ``True``
 
+Buffering Options:
+
+buffer_size: ``0``
+    Number of returns to collect before writing them to redis in a single
+    pipeline. The default of ``0`` writes every return as it arrives. On
+    masters receiving returns from many minions at once, buffering saves one
+    network round trip per return. Returns are only buffered on the master,
+    minion job processes exit without writing them, and returns using
+    ``--return_config`` or ``--return_kwargs`` are always written immediately.
+
+buffer_age: ``1``
+    Maximum number of seconds a buffered return is held before it is written,
+    even if ``buffer_size`` has not been reached.
+
+    .. code-block:: yaml
+
+        redis.buffer_size: 500
+        redis.buffer_age: 2
+
 
 """
 
+import atexit
 import logging
+import threading
+import time
 
 import salt.returners
 import salt.utils.jid
@@ -124,6 +146,15 @@ except ImportError:
 
 REDIS_POOL = None
 
+# Returns waiting to be written when buffering is enabled
+_BUFFER = []
+_BUFFER_LOCK = threading.Lock()
+_FLUSHER = None
+_WARNED_NOT_MASTER = False
+
+# Number of keys requested per SCAN/MGET round trip
+_SCAN_COUNT = 1000
+
 # Define the module's virtual name
 __virtualname__ = "redis"
 
@@ -158,6 +189,8 @@ def _get_options(ret=None):
         "cluster_mode": "cluster_mode",
         "startup_nodes": "cluster.startup_nodes",
         "skip_full_coverage_check": "cluster.skip_full_coverage_check",
+        "buffer_size": "buffer_size",
+        "buffer_age": "buffer_age",
     }
 
     if salt.utils.platform.is_proxy():
@@ -172,6 +205,8 @@ def _get_options(ret=None):
             "skip_full_coverage_check": __opts__.get(
                 "redis.cluster.skip_full_coverage_check", False
             ),
+            "buffer_size": __opts__.get("redis.buffer_size", 0),
+            "buffer_age": __opts__.get("redis.buffer_age", 1),
         }
 
     _options = salt.returners.get_returner_options(
@@ -210,17 +245,96 @@ def _get_ttl():
     return salt.utils.job.get_keep_jobs_seconds(__opts__)
 
 
+def _queue_return(pipeline, minion, jid, fun, data, ttl):
+    pipeline.hset(f"ret:{jid}", minion, data)
+    pipeline.expire(f"ret:{jid}", ttl)
+    pipeline.set(f"{minion}:{fun}", jid)
+    pipeline.sadd("minions", minion)
+
+
+def _flush_buffer():
+    """
+    Write every buffered return to redis in a single pipeline
+    """
+    with _BUFFER_LOCK:
+        if not _BUFFER:
+            return
+        pending = _BUFFER[:]
+        del _BUFFER[:]
+    pipeline = _get_serv(ret=None).pipeline(transaction=False)
+    ttl = _get_ttl()
+    for minion, jid, fun, data in pending:
+        _queue_return(pipeline, minion, jid, fun, data, ttl)
+    try:
+        pipeline.execute()
+    except Exception as exc:  # pylint: disable=broad-except
+        log.error(
+            "Failed to write %d buffered returns to redis: %s", len(pending), exc
+        )
+
+
+def _flush_periodically(interval):
+    while True:
+        time.sleep(interval)
+        _flush_buffer()
+
+
+def _start_flusher(interval):
+    """
+    Start the background thread writing out returns older than buffer_age
+    """
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    if _FLUSHER is None:
+        atexit.register(_flush_buffer)
+    _FLUSHER = threading.Thread(
+        target=_flush_periodically, args=(interval,), name="redis-returner-flush"
+    )
+    _FLUSHER.daemon = True
+    _FLUSHER.start()
+
+
+def _buffer_size(ret, _options):
+    """
+    Return the number of returns to buffer, returns are only buffered on the
+    master and for the default configuration
+    """
+    global _WARNED_NOT_MASTER
+    buffer_size = int(_options.get("buffer_size") or 0)
+    if buffer_size <= 0 or ret.get("ret_config") or ret.get("ret_kwargs"):
+        return 0
+    if __opts__.get("__role") != "master":
+        if not _WARNED_NOT_MASTER:
+            log.warning(
+                "redis.buffer_size is only supported on the master, returns are "
+                "written immediately"
+            )
+            _WARNED_NOT_MASTER = True
+        return 0
+    return buffer_size
+
+
 def returner(ret):
     """
     Return data to a redis data store
     """
+    _options = _get_options(ret)
+    minion, jid, fun = ret["id"], ret["jid"], ret["fun"]
+    data = salt.utils.json.dumps(ret)
+    buffer_size = _buffer_size(ret, _options)
+    if buffer_size > 0:
+        with _BUFFER_LOCK:
+            _BUFFER.append((minion, jid, fun, data))
+            full = len(_BUFFER) >= buffer_size
+        if full:
+            _flush_buffer()
+        else:
+            _start_flusher(float(_options.get("buffer_age") or 1))
+        return
     serv = _get_serv(ret)
     pipeline = serv.pipeline(transaction=False)
-    minion, jid = ret["id"], ret["jid"]
-    pipeline.hset(f"ret:{jid}", minion, salt.utils.json.dumps(ret))
-    pipeline.expire(f"ret:{jid}", _get_ttl())
-    pipeline.set("{}:{}".format(minion, ret["fun"]), jid)
-    pipeline.sadd("minions", minion)
+    _queue_return(pipeline, minion, jid, fun, data, _get_ttl())
     pipeline.execute()
 
 
@@ -267,32 +381,50 @@ def get_fun(fun):
     """
     serv = _get_serv(ret=None)
     ret = {}
-    for minion in serv.smembers("minions"):
-        ind_str = f"{minion}:{fun}"
-        try:
-            jid = serv.get(ind_str)
-        except Exception:  # pylint: disable=broad-except
-            continue
-        if not jid:
-            continue
-        data = serv.get(f"{minion}:{jid}")
+    minions = list(serv.smembers("minions"))
+    if not minions:
+        return ret
+    jids = serv.mget([f"{minion}:{fun}" for minion in minions])
+    found = [(minion, jid) for minion, jid in zip(minions, jids) if jid]
+    if not found:
+        return ret
+    pipeline = serv.pipeline(transaction=False)
+    for minion, jid in found:
+        pipeline.hget(f"ret:{jid}", minion)
+    for (minion, _), data in zip(found, pipeline.execute()):
         if data:
             ret[minion] = salt.utils.json.loads(data)
     return ret
 
 
+def _scan_chunks(serv, match):
+    """
+    Yield the keys matching ``match`` in lists of at most _SCAN_COUNT keys,
+    without blocking the server the way KEYS does
+    """
+    chunk = []
+    for key in serv.scan_iter(match=match, count=_SCAN_COUNT):
+        chunk.append(key)
+        if len(chunk) >= _SCAN_COUNT:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 def get_jids():
     """
     Return a dict mapping all job ids to job information
     """
     serv = _get_serv(ret=None)
     ret = {}
-    for s in serv.mget(serv.keys("load:*")):
-        if s is None:
-            continue
-        load = salt.utils.json.loads(s)
-        jid = load["jid"]
-        ret[jid] = salt.utils.jid.format_jid_instance(jid, load)
+    for keys in _scan_chunks(serv, "load:*"):
+        for s in serv.mget(keys):
+            if s is None:
+                continue
+            load = salt.utils.json.loads(s)
+            jid = load["jid"]
+            ret[jid] = salt.utils.jid.format_jid_instance(jid, load)
     return ret
 
 
@@ -314,10 +446,9 @@ def clean_old_jobs():
     do manually cleaning here.
     """
     serv = _get_serv(ret=None)
-    ret_jids = serv.keys("ret:*")
-    living_jids = set(serv.keys("load:*"))
+    living_jids = set(serv.scan_iter(match="load:*", count=_SCAN_COUNT))
     to_remove = []
-    for ret_key in ret_jids:
+    for ret_key in serv.scan_iter(match="ret:*", count=_SCAN_COUNT):
         load_key = ret_key.replace("ret:", "load:", 1)
         if load_key not in living_jids:
             to_remove.append(ret_key)
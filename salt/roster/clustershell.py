@@ -9,11 +9,31 @@ When you want to use host globs for target matching, use ``--roster clustershell
 
     salt-ssh --roster clustershell 'server_[1-10,21-30],test_server[5,7,9]' test.ping
 
+The hosts are resolved and their ``ssh_scan_ports`` are probed concurrently,
+with at most ``ssh_scan_workers`` hosts resolved or ports probed at the same
+time. The results of the scan can be kept for ``ssh_scan_cache_ttl`` seconds in
+the cache directory of the master, so that consecutive runs targeting the same
+nodes do not scan them again:
+
+.. code-block:: yaml
+
+    ssh_scan_workers: 100
+    ssh_scan_cache_ttl: 60
+
 """
 
 
+import concurrent.futures
 import copy
+import hashlib
+import logging
+import os
 import socket
+import time
+
+import salt.utils.atomicfile
+import salt.utils.files
+import salt.utils.json
 
 REQ_ERROR = None
 try:
@@ -21,11 +41,99 @@ try:
 except (ImportError, OSError) as e:
     REQ_ERROR = "ClusterShell import error, perhaps missing python ClusterShell package"
 
+log = logging.getLogger(__name__)
+
+DEFAULT_SCAN_WORKERS = 100
+
 
 def __virtual__():
     return (REQ_ERROR is None, REQ_ERROR)
 
 
+def _probe(addr, port, timeout):
+    """
+    Return True if a TCP connection can be established to the port of the
+    address
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect((addr, port))
+        sock.shutdown(socket.SHUT_RDWR)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def _scan(hosts, ports, timeout, workers):
+    """
+    Resolve the hosts and probe their ports with a pool of workers. Return a
+    dict of the address and of the open ports of each host.
+    """
+    ret = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        addrs = executor.map(socket.gethostbyname, hosts)
+        for host, addr in zip(hosts, addrs):
+            ret[host] = {"addr": str(addr), "ports": []}
+
+        probes = {
+            (host, port): executor.submit(_probe, ret[host]["addr"], port, timeout)
+            for host in hosts
+            for port in ports
+        }
+        for (host, port), probe in probes.items():
+            if probe.result():
+                ret[host]["ports"].append(port)
+    return ret
+
+
+def _cache_file(ports):
+    """
+    Return the path of the scan cache of the ports, or None if the cache is
+    disabled
+    """
+    if not __opts__.get("ssh_scan_cache_ttl") or not __opts__.get("cachedir"):
+        return None
+    key = hashlib.sha256(",".join(map(str, ports)).encode()).hexdigest()
+    return os.path.join(
+        __opts__["cachedir"], "roster", "clustershell_{}.json".format(key)
+    )
+
+
+def _read_cache(cache_file):
+    """
+    Return the results of the scans which did not expire
+    """
+    if cache_file is None:
+        return {}
+    try:
+        with salt.utils.files.fopen(cache_file, "r") as fp_:
+            data = salt.utils.json.load(fp_)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    expiry = time.time() - float(__opts__["ssh_scan_cache_ttl"])
+    return {
+        host: result
+        for host, result in data.items()
+        if isinstance(result, dict) and result.get("time", 0) > expiry
+    }
+
+
+def _write_cache(cache_file, results):
+    if cache_file is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with salt.utils.atomicfile.atomic_open(cache_file, "w") as fp_:
+            salt.utils.json.dump(results, fp_)
+    except OSError as exc:
+        log.debug("Unable to write the scan cache %s: %s", cache_file, exc)
+
+
 def targets(tgt, tgt_type="glob", **kwargs):
     """
     Return the targets
@@ -37,19 +145,28 @@ def targets(tgt, tgt_type="glob", **kwargs):
         ports = list(map(int, str(ports).split(",")))
 
     hosts = list(NodeSet(tgt))
-    host_addrs = {h: socket.gethostbyname(h) for h in hosts}
+    cache_file = _cache_file(ports)
+    results = _read_cache(cache_file)
+
+    missing = [host for host in hosts if host not in results]
+    if missing:
+        scanned = _scan(
+            missing,
+            ports,
+            float(__opts__["ssh_scan_timeout"]),
+            int(__opts__.get("ssh_scan_workers", DEFAULT_SCAN_WORKERS)),
+        )
+        now = time.time()
+        for result in scanned.values():
+            result["time"] = now
+        results.update(scanned)
+        _write_cache(cache_file, results)
 
-    for host, addr in host_addrs.items():
-        addr = str(addr)
+    for host in hosts:
         ret[host] = copy.deepcopy(__opts__.get("roster_defaults", {}))
-        for port in ports:
-            try:
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(float(__opts__["ssh_scan_timeout"]))
-                sock.connect((addr, port))
-                sock.shutdown(socket.SHUT_RDWR)
-                sock.close()
-                ret[host].update({"host": addr, "port": port})
-            except OSError:
-                pass
+        if results[host]["ports"]:
+            # The last open port of the list is used
+            ret[host].update(
+                {"host": results[host]["addr"], "port": results[host]["ports"][-1]}
+            )
     return ret
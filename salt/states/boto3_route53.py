@@ -58,12 +58,43 @@ passed in as a dict, or as a string to pull from pillars or minion config:
         - keyid: GKTADJGHEIQSXMKKRBJ08H
         - key: askdjghsdfjkghWupUjasdflkdfklgjsdfjajkghs
 
+Zone snapshots and change batching
+----------------------------------
+
+.. versionadded:: 3008.0
+
+By default, every ``rr_present`` and ``rr_absent`` state looks up its own
+record and submits its own change. With many records in the same hosted zone,
+this makes a lot of API calls and is likely to hit the Route 53 throttling.
+
+Setting ``route53.zone_snapshot`` to ``True`` in the minion configuration or in
+pillar makes these states list each hosted zone only once per state run, and
+look up the records in this snapshot:
+
+.. code-block:: yaml
+
+    route53.zone_snapshot: True
+
+When :ref:`state aggregation <mod-aggregate-state>` is enabled for
+``boto3_route53``, the first ``rr_present`` or ``rr_absent`` state of a hosted
+zone also works out the changes of all the other ones using the same hosted
+zone and credentials, and submits them together in change batches of up to
+1000 records. The other states then just report their own changes. States
+with requisites or ``onlyif``/``unless`` conditions are left out of the
+aggregation and run on their own.
+
+.. code-block:: yaml
+
+    state_aggregate:
+      - boto3_route53
 """
 # keep lint from choking
 # pylint: disable=W0106
 # pylint: disable=E1320
 
 
+import copy
+import inspect
 import logging
 import uuid
 
@@ -73,6 +104,24 @@ from salt.exceptions import SaltInvocationError
 
 log = logging.getLogger(__name__)  # pylint: disable=W1699
 
+# Limits of a single ChangeResourceRecordSets request
+MAX_BATCH_RECORDS = 1000
+MAX_BATCH_CHARS = 32000
+
+# Chunk keys which make a state depend on something else than its arguments
+_CONDITIONAL_KEYS = (
+    "require",
+    "watch",
+    "prereq",
+    "onchanges",
+    "onfail",
+    "listen",
+    "use",
+    "onlyif",
+    "unless",
+    "creates",
+)
+
 __deprecated__ = (
     3009,
     "boto",
@@ -448,6 +497,167 @@ def hosted_zone_absent(
     return ret
 
 
+def _snapshot_enabled():
+    """
+    Return whether records must be looked up in a snapshot of their zone
+    """
+    return salt.utils.data.is_true(
+        __salt__["config.option"]("route53.zone_snapshot", False)
+    )
+
+
+def _find_hosted_zone(snapshot, **args):
+    """
+    Look up a hosted zone, only once per state run in snapshot mode
+    """
+    if not snapshot:
+        return __salt__["boto3_route53.find_hosted_zone"](**args)
+    zones = __context__.setdefault("boto3_route53.zones", {})
+    cache_key = repr(sorted(args.items()))
+    if not zones.get(cache_key):
+        # The zone may be created by a later state, so don't remember misses
+        zones[cache_key] = __salt__["boto3_route53.find_hosted_zone"](**args)
+    return zones[cache_key]
+
+
+def _snapshot_key(HostedZoneId, region, key, keyid, profile):
+    return repr((HostedZoneId, region, key, keyid, profile))
+
+
+def _zone_snapshot(HostedZoneId, region, key, keyid, profile):
+    """
+    Return the records of a hosted zone indexed by name and type. The zone is
+    listed only once per state run.
+    """
+    snapshots = __context__.setdefault("boto3_route53.snapshots", {})
+    cache_key = _snapshot_key(HostedZoneId, region, key, keyid, profile)
+    if cache_key not in snapshots:
+        index = {}
+        for rrset in __salt__["boto3_route53.get_resource_records"](
+            HostedZoneId=HostedZoneId,
+            region=region,
+            key=key,
+            keyid=keyid,
+            profile=profile,
+        ):
+            index.setdefault((rrset["Name"], rrset["Type"]), []).append(rrset)
+        snapshots[cache_key] = index
+    return snapshots[cache_key]
+
+
+def _get_recordsets(HostedZoneId, Name, Type, snapshot, region, key, keyid, profile):
+    """
+    Return the record sets with the given name and type
+    """
+    if snapshot:
+        index = _zone_snapshot(HostedZoneId, region, key, keyid, profile)
+        return copy.deepcopy(index.get((Name, Type), []))
+    return __salt__["boto3_route53.get_resource_records"](
+        HostedZoneId=HostedZoneId,
+        StartRecordName=Name,
+        StartRecordType=Type,
+        region=region,
+        key=key,
+        keyid=keyid,
+        profile=profile,
+    )
+
+
+def _update_snapshot(HostedZoneId, change, region, key, keyid, profile):
+    """
+    Apply a submitted change to the snapshot of its zone, if any
+    """
+    snapshots = __context__.get("boto3_route53.snapshots", {})
+    index = snapshots.get(_snapshot_key(HostedZoneId, region, key, keyid, profile))
+    if index is None:
+        return
+    rrset = change["ResourceRecordSet"]
+    recordsets = [
+        r
+        for r in index.get((rrset["Name"], rrset["Type"]), [])
+        if r.get("SetIdentifier") != rrset.get("SetIdentifier")
+    ]
+    if change["Action"] == "UPSERT":
+        recordsets.append(copy.deepcopy(rrset))
+    index[(rrset["Name"], rrset["Type"])] = recordsets
+
+
+def _submit_changes(HostedZoneId, changes, region, key, keyid, profile):
+    """
+    Submit changes in a single change batch and keep the zone snapshot up to
+    date
+    """
+    # The execution module encodes the names in place
+    result = __salt__["boto3_route53.change_resource_record_sets"](
+        HostedZoneId=HostedZoneId,
+        ChangeBatch={"Changes": copy.deepcopy(changes)},
+        region=region,
+        key=key,
+        keyid=keyid,
+        profile=profile,
+    )
+    if result:
+        for change in changes:
+            _update_snapshot(HostedZoneId, change, region, key, keyid, profile)
+    return result
+
+
+def _apply_change(ret, HostedZoneId, change, failure, region, key, keyid, profile):
+    """
+    Submit the change worked out by a state and update its return accordingly
+    """
+    if _submit_changes(HostedZoneId, [change], region, key, keyid, profile):
+        log.info(ret["comment"])
+    else:
+        ret["comment"] = failure
+        log.error(ret["comment"])
+        ret["result"] = False
+        ret["changes"] = {}
+    return ret
+
+
+def _change_batches(items):
+    """
+    Split the planned changes in batches fitting in a single request. UPSERT
+    changes count twice against the Route 53 limits.
+    """
+    batch = []
+    records = chars = 0
+    for item in items:
+        change = item["change"]
+        values = [
+            rr["Value"] for rr in change["ResourceRecordSet"].get("ResourceRecords", [])
+        ]
+        factor = 2 if change["Action"] == "UPSERT" else 1
+        item_records = factor * max(len(values), 1)
+        item_chars = factor * sum(len(value) for value in values)
+        if batch and (
+            records + item_records > MAX_BATCH_RECORDS
+            or chars + item_chars > MAX_BATCH_CHARS
+        ):
+            yield batch
+            batch = []
+            records = chars = 0
+        batch.append(item)
+        records += item_records
+        chars += item_chars
+    if batch:
+        yield batch
+
+
+def _pop_aggregated_result(fun, state_args):
+    """
+    Return the result of a state whose change was already submitted by
+    :py:func:`mod_aggregate`, if any
+    """
+    results = __context__.get("boto3_route53.aggregated", [])
+    for idx, (agg_fun, agg_args, ret) in enumerate(results):
+        if agg_fun == fun and agg_args == state_args:
+            del results[idx]
+            return ret
+    return None
+
+
 def rr_present(
     name,
     HostedZoneId=None,
@@ -643,6 +853,51 @@ def rr_present(
     profile
         Dict, or pillar key pointing to a dict, containing AWS region/key/keyid.
     """
+    state_args = locals().copy()
+    aggregated = _pop_aggregated_result("rr_present", state_args)
+    if aggregated is not None:
+        return aggregated
+
+    ret, HostedZoneId, change, failure = _rr_present(
+        snapshot=_snapshot_enabled(), **state_args
+    )
+    if change is None:
+        return ret
+    return _apply_change(
+        ret, HostedZoneId, change, failure, region, key, keyid, profile
+    )
+
+
+def _rr_present(
+    name,
+    HostedZoneId=None,
+    DomainName=None,
+    PrivateZone=False,
+    Name=None,
+    Type=None,
+    SetIdentifier=None,
+    Weight=None,
+    Region=None,
+    GeoLocation=None,
+    Failover=None,
+    TTL=None,
+    ResourceRecords=None,
+    AliasTarget=None,
+    HealthCheckId=None,
+    TrafficPolicyInstanceId=None,
+    region=None,
+    key=None,
+    keyid=None,
+    profile=None,
+    snapshot=False,
+):
+    """
+    Work out what rr_present has to do, without changing anything.
+
+    Return a tuple with the state return, the hosted zone ID, the change to
+    submit (``None`` if there is nothing to submit) and the comment to use if
+    submitting it fails.
+    """
     Name = Name if Name else name
 
     if Type is None:
@@ -660,13 +915,13 @@ def rr_present(
         "keyid": keyid,
         "profile": profile,
     }
-    zone = __salt__["boto3_route53.find_hosted_zone"](**args)
+    zone = _find_hosted_zone(snapshot, **args)
     if not zone:
         ret["comment"] = "Route 53 {} hosted zone {} not found".format(
             "private" if PrivateZone else "public", DomainName
         )
         log.info(ret["comment"])
-        return ret
+        return ret, HostedZoneId, None, None
     zone = zone[0]
     HostedZoneId = zone["HostedZone"]["Id"]
 
@@ -710,7 +965,7 @@ def rr_present(
                         )
                         log.error(ret["comment"])
                         ret["result"] = False
-                        return ret
+                        return ret, HostedZoneId, None, None
                     if len(r) > 1:
                         ret[
                             "comment"
@@ -719,7 +974,7 @@ def rr_present(
                         )
                         log.error(ret["comment"])
                         ret["result"] = False
-                        return ret
+                        return ret, HostedZoneId, None, None
                     instance = r[0]
                     res = getattr(instance, instance_attr, None)
                     if res:
@@ -736,7 +991,7 @@ def rr_present(
                         )
                         log.error(ret["comment"])
                         ret["result"] = False
-                        return ret
+                        return ret, HostedZoneId, None, None
                 else:
                     ret["comment"] = (
                         "Unknown RR magic value seen: {}.  Please extend the "
@@ -745,7 +1000,7 @@ def rr_present(
                     )
                     log.error(ret["comment"])
                     ret["result"] = False
-                    return ret
+                    return ret, HostedZoneId, None, None
             else:
                 # for TXT records the entry must be encapsulated in quotes as required by the API
                 # this appears to be incredibly difficult with the jinja templating engine
@@ -755,14 +1010,8 @@ def rr_present(
                 fixed_rrs += [rr]
         ResourceRecords = [{"Value": rr} for rr in sorted(fixed_rrs)]
 
-    recordsets = __salt__["boto3_route53.get_resource_records"](
-        HostedZoneId=HostedZoneId,
-        StartRecordName=Name,
-        StartRecordType=Type,
-        region=region,
-        key=key,
-        keyid=keyid,
-        profile=profile,
+    recordsets = _get_recordsets(
+        HostedZoneId, Name, Type, snapshot, region, key, keyid, profile
     )
 
     if SetIdentifier and recordsets:
@@ -794,12 +1043,12 @@ def rr_present(
                 Name, Type
             )
             ret["result"] = None
-            return ret
+            return ret, HostedZoneId, None, None
     elif len(recordsets) > 1:
         ret["comment"] = "Given criteria matched more than one ResourceRecordSet."
         log.error(ret["comment"])
         ret["result"] = False
-        return ret
+        return ret, HostedZoneId, None, None
     else:
         rrset = recordsets[0]
         for u in updatable:
@@ -821,7 +1070,7 @@ def rr_present(
             "".format(Name, Type)
         )
         log.info(ret["comment"])
-        return ret
+        return ret, HostedZoneId, None, None
     else:
         if __opts__["test"]:
             ret[
@@ -830,7 +1079,7 @@ def rr_present(
                 Name, Type
             )
             ret["result"] = None
-            return ret
+            return ret, HostedZoneId, None, None
         ResourceRecordSet = {"Name": Name, "Type": Type}
         if ResourceRecords:
             ResourceRecordSet["ResourceRecords"] = ResourceRecords
@@ -843,37 +1092,16 @@ def rr_present(
                     locals().get(u),
                 )
 
-        ChangeBatch = {
-            "Changes": [{"Action": "UPSERT", "ResourceRecordSet": ResourceRecordSet}]
-        }
-
-        if __salt__["boto3_route53.change_resource_record_sets"](
-            HostedZoneId=HostedZoneId,
-            ChangeBatch=ChangeBatch,
-            region=region,
-            key=key,
-            keyid=keyid,
-            profile=profile,
-        ):
-            ret["comment"] = "Route 53 resource record {} with type {} {}.".format(
-                Name, Type, "created" if create else "updated"
-            )
-            log.info(ret["comment"])
-            if create:
-                ret["changes"]["old"] = None
-            else:
-                ret["changes"]["old"] = rrset
-            ret["changes"]["new"] = ResourceRecordSet
-        else:
-            ret[
-                "comment"
-            ] = "Failed to {} Route 53 resource record {} with type {}.".format(
-                "create" if create else "update", Name, Type
-            )
-            log.error(ret["comment"])
-            ret["result"] = False
-
-    return ret
+        ret["comment"] = "Route 53 resource record {} with type {} {}.".format(
+            Name, Type, "created" if create else "updated"
+        )
+        ret["changes"]["old"] = None if create else rrset
+        ret["changes"]["new"] = ResourceRecordSet
+        failure = "Failed to {} Route 53 resource record {} with type {}.".format(
+            "create" if create else "update", Name, Type
+        )
+        change = {"Action": "UPSERT", "ResourceRecordSet": ResourceRecordSet}
+        return ret, HostedZoneId, change, failure
 
 
 def rr_absent(
@@ -930,6 +1158,39 @@ def rr_absent(
     profile
         Dict, or pillar key pointing to a dict, containing AWS region/key/keyid.
     """
+    state_args = locals().copy()
+    aggregated = _pop_aggregated_result("rr_absent", state_args)
+    if aggregated is not None:
+        return aggregated
+
+    ret, HostedZoneId, change, failure = _rr_absent(
+        snapshot=_snapshot_enabled(), **state_args
+    )
+    if change is None:
+        return ret
+    return _apply_change(
+        ret, HostedZoneId, change, failure, region, key, keyid, profile
+    )
+
+
+def _rr_absent(
+    name,
+    HostedZoneId=None,
+    DomainName=None,
+    PrivateZone=False,
+    Name=None,
+    Type=None,
+    SetIdentifier=None,
+    region=None,
+    key=None,
+    keyid=None,
+    profile=None,
+    snapshot=False,
+):
+    """
+    Work out what rr_absent has to do, without changing anything. Return the
+    same tuple as :py:func:`_rr_present`.
+    """
     Name = Name if Name else name
 
     if Type is None:
@@ -947,24 +1208,18 @@ def rr_absent(
         "keyid": keyid,
         "profile": profile,
     }
-    zone = __salt__["boto3_route53.find_hosted_zone"](**args)
+    zone = _find_hosted_zone(snapshot, **args)
     if not zone:
         ret["comment"] = "Route 53 {} hosted zone {} not found".format(
             "private" if PrivateZone else "public", DomainName
         )
         log.info(ret["comment"])
-        return ret
+        return ret, HostedZoneId, None, None
     zone = zone[0]
     HostedZoneId = zone["HostedZone"]["Id"]
 
-    recordsets = __salt__["boto3_route53.get_resource_records"](
-        HostedZoneId=HostedZoneId,
-        StartRecordName=Name,
-        StartRecordType=Type,
-        region=region,
-        key=key,
-        keyid=keyid,
-        profile=profile,
+    recordsets = _get_recordsets(
+        HostedZoneId, Name, Type, snapshot, region, key, keyid, profile
     )
     if SetIdentifier and recordsets:
         log.debug(
@@ -978,12 +1233,12 @@ def rr_absent(
         ] = "Route 53 resource record {} with type {} already absent.".format(
             Name, Type
         )
-        return ret
+        return ret, HostedZoneId, None, None
     elif len(recordsets) > 1:
         ret["comment"] = "Given criteria matched more than one ResourceRecordSet."
         log.error(ret["comment"])
         ret["result"] = False
-        return ret
+        return ret, HostedZoneId, None, None
     ResourceRecordSet = recordsets[0]
     if __opts__["test"]:
         ret[
@@ -992,33 +1247,136 @@ def rr_absent(
             Name, Type
         )
         ret["result"] = None
-        return ret
+        return ret, HostedZoneId, None, None
 
-    ChangeBatch = {
-        "Changes": [{"Action": "DELETE", "ResourceRecordSet": ResourceRecordSet}]
+    ret["comment"] = "Route 53 resource record {} with type {} deleted.".format(
+        Name, Type
+    )
+    ret["changes"]["old"] = ResourceRecordSet
+    ret["changes"]["new"] = None
+    failure = "Failed to delete Route 53 resource record {} with type {}.".format(
+        Name, Type
+    )
+    change = {"Action": "DELETE", "ResourceRecordSet": ResourceRecordSet}
+    return ret, HostedZoneId, change, failure
+
+
+_AGGREGATES = {
+    "rr_present": (rr_present, _rr_present),
+    "rr_absent": (rr_absent, _rr_absent),
+}
+
+
+def _chunk_args(chunk):
+    """
+    Return all the arguments the state function of a chunk is called with,
+    including the default ones
+    """
+    params = inspect.signature(_AGGREGATES[chunk["fun"]][0]).parameters
+    args = {
+        name: param.default
+        for name, param in params.items()
+        if param.default is not inspect.Parameter.empty
     }
+    args.update({name: chunk[name] for name in params if name in chunk})
+    return args
 
-    if __salt__["boto3_route53.change_resource_record_sets"](
-        HostedZoneId=HostedZoneId,
-        ChangeBatch=ChangeBatch,
-        region=region,
-        key=key,
-        keyid=keyid,
-        profile=profile,
-    ):
-        ret["comment"] = "Route 53 resource record {} with type {} deleted.".format(
-            Name, Type
-        )
-        log.info(ret["comment"])
-        ret["changes"]["old"] = ResourceRecordSet
-        ret["changes"]["new"] = None
-    else:
-        ret[
-            "comment"
-        ] = "Failed to delete Route 53 resource record {} with type {}.".format(
-            Name, Type
+
+def _is_conditional(chunk):
+    return any(key.startswith(_CONDITIONAL_KEYS) for key in chunk)
+
+
+def mod_aggregate(low, chunks, running):
+    """
+    The mod_aggregate function which looks up all the rr_present and rr_absent
+    states using the same hosted zone as ``low``, works out their changes from
+    a snapshot of the zone, and submits them together in as few change batches
+    as possible.
+
+    .. versionadded:: 3008.0
+    """
+    if low.get("fun") not in _AGGREGATES or __opts__["test"] or _is_conditional(low):
+        return low
+
+    low_args = _chunk_args(low)
+    zone_args = ("HostedZoneId", "DomainName", "PrivateZone")
+    conn_args = ("region", "key", "keyid", "profile")
+    low_tag = __utils__["state.gen_tag"](low)
+
+    selected = [(low, low_args)]
+    for chunk in chunks:
+        if (
+            chunk.get("state") != low["state"]
+            or chunk.get("fun") not in _AGGREGATES
+            or "__agg__" in chunk
+            or _is_conditional(chunk)
+        ):
+            continue
+        tag = __utils__["state.gen_tag"](chunk)
+        if tag == low_tag or tag in running:
+            continue
+        args = _chunk_args(chunk)
+        if any(args[arg] != low_args[arg] for arg in zone_args + conn_args):
+            continue
+        selected.append((chunk, args))
+
+    planned = []
+    targets = set()
+    for chunk, args in selected:
+        try:
+            ret, zone_id, change, failure = _AGGREGATES[chunk["fun"]][1](
+                snapshot=True, **args
+            )
+        except SaltInvocationError:
+            # Let the state run on its own and report the error
+            continue
+        # Don't look at the other states again when this one runs
+        chunk["__agg__"] = True
+        if change is None:
+            # Nothing to submit, the state will find it out on its own
+            continue
+        rrset = change["ResourceRecordSet"]
+        target = (zone_id, rrset["Name"], rrset["Type"], rrset.get("SetIdentifier"))
+        if target in targets:
+            # A change batch can't change a record twice
+            continue
+        targets.add(target)
+        planned.append(
+            {
+                "fun": chunk["fun"],
+                "args": args,
+                "ret": ret,
+                "zone_id": zone_id,
+                "change": change,
+                "failure": failure,
+            }
         )
-        log.error(ret["comment"])
-        ret["result"] = False
 
-    return ret
+    conn = {arg: low_args[arg] for arg in conn_args}
+    results = __context__.setdefault("boto3_route53.aggregated", [])
+    zone_ids = {item["zone_id"] for item in planned}
+    for zone_id in zone_ids:
+        items = [item for item in planned if item["zone_id"] == zone_id]
+        for batch in _change_batches(items):
+            log.debug(
+                "Submitting %s changes to the hosted zone %s", len(batch), zone_id
+            )
+            try:
+                result = _submit_changes(
+                    zone_id, [item["change"] for item in batch], **conn
+                )
+            except Exception as exc:  # pylint: disable=broad-except
+                log.error(
+                    "Failed to submit changes to the hosted zone %s: %s", zone_id, exc
+                )
+                result = False
+            for item in batch:
+                ret = item["ret"]
+                if result:
+                    log.info(ret["comment"])
+                else:
+                    ret["comment"] = item["failure"]
+                    ret["result"] = False
+                    ret["changes"] = {}
+                results.append((item["fun"], item["args"], ret))
+    return low
@@ -1,5 +1,7 @@
+import hashlib
 import shutil
 import tempfile
+import urllib.parse
 from pathlib import Path
 
 import psutil  # pylint: disable=3rd-party-module-not-gated
@@ -103,17 +105,17 @@ def test_all_branches(hgfs_setup_and_teardown):
 
 @pytest.mark.slow_test
 @pytest.mark.skip_on_windows(reason="testing break in windows")
-def test_get_branch(hgfs_setup_and_teardown):
+def test_get_ref_branch(hgfs_setup_and_teardown):
     with patch.dict(
         hgfs.__opts__,
         {
             "hgfs_remotes": [{str(hgfs_setup_and_teardown): [{"base": "default"}]}],
+            "hgfs_branch_method": "branches",
         },
     ):
         repo = hgfs.init()
         hgfs.update()
-        repo[0]["repo"].open()
-        branch = hgfs._get_branch(repo[0]["repo"], "test")
+        branch = hgfs._get_ref(repo[0], "test")
         assert isinstance(branch, tuple)
         assert len(branch) == 3
         assert branch[0] in "test"
@@ -121,7 +123,7 @@ def test_get_branch(hgfs_setup_and_teardown):
         assert isinstance(branch[2], str)
 
         # Fail test
-        branch = hgfs._get_branch(repo[0]["repo"], "fake")
+        branch = hgfs._get_ref(repo[0], "fake")
         assert branch is False
 
 
@@ -151,17 +153,19 @@ def test_all_bookmarks(hgfs_setup_and_teardown):
 
 @pytest.mark.slow_test
 @pytest.mark.skip_on_windows(reason="testing break in windows")
-def test_get_bookmark(hgfs_setup_and_teardown):
+def test_get_ref_bookmark(hgfs_setup_and_teardown):
     with patch.dict(
         hgfs.__opts__,
         {
-            "hgfs_remotes": [{str(hgfs_setup_and_teardown): [{"base": "default"}]}],
+            "hgfs_remotes": [
+                {str(hgfs_setup_and_teardown): [{"base": "bookmark_test"}]}
+            ],
+            "hgfs_branch_method": "bookmarks",
         },
     ):
         repo = hgfs.init()
         hgfs.update()
-        repo[0]["repo"].open()
-        bookmark = hgfs._get_bookmark(repo[0]["repo"], "bookmark_test")
+        bookmark = hgfs._get_ref(repo[0], "bookmark_test")
         assert isinstance(bookmark, tuple)
         assert len(bookmark) == 3
         assert bookmark[0] in "bookmark_test"
@@ -169,7 +173,7 @@ def test_get_bookmark(hgfs_setup_and_teardown):
         assert isinstance(bookmark[2], str)
 
         # Fail test
-        bookmark = hgfs._get_bookmark(repo[0]["repo"], "fake")
+        bookmark = hgfs._get_ref(repo[0], "fake")
         assert bookmark is False
 
 
@@ -201,17 +205,19 @@ def test_all_tags(hgfs_setup_and_teardown):
 
 @pytest.mark.slow_test
 @pytest.mark.skip_on_windows(reason="testing break in windows")
-def test_get_tag(hgfs_setup_and_teardown):
+def test_get_ref_tag(hgfs_setup_and_teardown):
     with patch.dict(
         hgfs.__opts__,
         {
-            "hgfs_remotes": [{str(hgfs_setup_and_teardown): [{"base": "default"}]}],
+            "hgfs_remotes": [
+                {str(hgfs_setup_and_teardown): [{"base": "bookmark_test"}]}
+            ],
+            "hgfs_branch_method": "bookmarks",
         },
     ):
         repo = hgfs.init()
         hgfs.update()
-        repo[0]["repo"].open()
-        tag = hgfs._get_tag(repo[0]["repo"], "test")
+        tag = hgfs._get_ref(repo[0], "test")
         assert isinstance(tag, tuple)
         assert len(tag) == 4
         assert tag[0] in "test"
@@ -219,11 +225,11 @@ def test_get_tag(hgfs_setup_and_teardown):
         assert isinstance(tag[2], str)
 
         # Fail test
-        tag = hgfs._get_tag(repo[0]["repo"], "fake")
+        tag = hgfs._get_ref(repo[0], "fake")
         assert tag is False
 
         # real tag that should fail
-        tag = hgfs._get_tag(repo[0]["repo"], "tip")
+        tag = hgfs._get_ref(repo[0], "tip")
         assert tag is False
 
 
@@ -464,3 +470,170 @@ def test_dir_list(hgfs_setup_and_teardown):
         load = {"saltenv": "base", "loc": 0, "path": "test.sls"}
         data = hgfs.dir_list(load)
         assert data == ["subdir"]
+
+
+def _commit(repo_uri, files, message):
+    """
+    Write the files to the hg repo of the uri and commit them to its current
+    branch
+    """
+    repo_dir = Path(urllib.parse.urlparse(repo_uri).path)
+    for name, content in files.items():
+        path = repo_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+    with hglib.open(bytes(repo_dir.as_posix(), encoding="utf8")) as repo:
+        repo.commit(message, user="test", addremove=True)
+
+
+@pytest.mark.slow_test
+@pytest.mark.skip_on_windows(reason="testing break in windows")
+def test_find_file_command_server(hgfs_setup_and_teardown):
+    """
+    Test that the command server and the refs of the remote are reused
+    between requests, and resolved again once the remote is updated
+    """
+    with patch.dict(
+        hgfs.__opts__,
+        {
+            "hgfs_remotes": [{str(hgfs_setup_and_teardown): [{"base": "default"}]}],
+        },
+    ):
+        repo = hgfs.init()[0]
+        hgfs.update()
+        client = hgfs._get_client(repo)
+        with patch.object(
+            hgfs, "_all_branches", wraps=hgfs._all_branches
+        ) as all_branches:
+            for path in ("test.sls", "test2.sls", "subdir/test.sls"):
+                assert hgfs.find_file(path=path, tgt_env="base")["rel"] == path
+            assert all_branches.call_count == 0
+        assert hgfs._get_client(repo) is client
+
+        _commit(hgfs_setup_and_teardown, {"new.sls": "foo: bar\n"}, b"add new")
+        assert hgfs.find_file(path="new.sls", tgt_env="test")["rel"] == ""
+        hgfs.update()
+        assert hgfs.find_file(path="new.sls", tgt_env="test")["rel"] == "new.sls"
+        assert hgfs._get_client(repo) is client
+
+
+@pytest.mark.slow_test
+@pytest.mark.skip_on_windows(reason="testing break in windows")
+def test_find_file_export(hgfs_setup_and_teardown):
+    """
+    Test that the files are served from the exported tree of the ref
+    """
+    with patch.dict(
+        hgfs.__opts__,
+        {
+            "hgfs_remotes": [
+                {str(hgfs_setup_and_teardown): [{"base": "test"}, {"export": True}]}
+            ],
+        },
+    ):
+        repo = hgfs.init()[0]
+        hgfs.update()
+        ref = hgfs._get_ref(repo, "base")
+        export_dir = Path(hgfs.__opts__["cachedir"], "hgfs", "export", repo["hash"])
+        load = {"saltenv": "base", "loc": 0, "path": "test.sls"}
+
+        fnd = hgfs.find_file(path="test.sls", tgt_env="base")
+        assert fnd["path"] == str(export_dir / ref[2] / "test.sls")
+        assert fnd["rel"] == "test.sls"
+        assert isinstance(fnd["stat"], list)
+        assert hgfs.serve_file(load, fnd)["data"] == (
+            "always-passes:\n  test.succeed_without_changes:\n    - name: foo\n"
+        )
+        assert hgfs.file_hash(load, fnd)["hsum"] == (
+            "a6a48d90dce9c9b580efb2ed308af100a8328913dcf9441705125866551c7d8d"
+        )
+        assert not (export_dir / ref[2] / ".hg_archival.txt").exists()
+        for path in ("missing.sls", "subdir", "../test.sls", "subdir/../../x"):
+            assert hgfs.find_file(path=path, tgt_env="base")["path"] == ""
+
+        _commit(hgfs_setup_and_teardown, {"test.sls": "foo: bar\n"}, b"change")
+        hgfs.update()
+        new_ref = hgfs._get_ref(repo, "base")
+        assert new_ref[2] != ref[2]
+        assert not (export_dir / ref[2]).exists()
+
+        fnd = hgfs.find_file(path="test.sls", tgt_env="base")
+        assert fnd["path"] == str(export_dir / new_ref[2] / "test.sls")
+        assert hgfs.serve_file(load, fnd)["data"] == "foo: bar\n"
+        assert hgfs.file_hash(load, fnd)["hsum"] == (
+            hashlib.sha256(b"foo: bar\n").hexdigest()
+        )
+        assert [x.name for x in export_dir.iterdir()] == [new_ref[2]]
+
+
+@pytest.mark.slow_test
+@pytest.mark.skip_on_windows(reason="testing break in windows")
+def test_find_file_export_symlinks(hgfs_setup_and_teardown, tmp_path):
+    """
+    Test that the symlinks of the repo are not followed out of the exported
+    tree, their target is served as with hg cat
+    """
+    secret = tmp_path / "secret"
+    secret.mkdir()
+    (secret / "key.pem").write_text("secret\n")
+    repo_dir = Path(urllib.parse.urlparse(hgfs_setup_and_teardown).path)
+    (repo_dir / "leak.sls").symlink_to(secret / "key.pem")
+    (repo_dir / "leakdir").symlink_to(secret)
+    _commit(hgfs_setup_and_teardown, {}, b"add symlinks")
+    with patch.dict(
+        hgfs.__opts__,
+        {
+            "hgfs_remotes": [
+                {str(hgfs_setup_and_teardown): [{"base": "test"}, {"export": True}]}
+            ],
+        },
+    ):
+        hgfs.update()
+        load = {"saltenv": "base", "loc": 0, "path": "leak.sls"}
+        fnd = hgfs.find_file(path="leak.sls", tgt_env="base")
+        assert fnd["rel"] == "leak.sls"
+        assert hgfs.serve_file(load, fnd)["data"] == str(secret / "key.pem")
+        assert hgfs.find_file(path="leakdir/key.pem", tgt_env="base")["path"] == ""
+
+
+@pytest.mark.slow_test
+@pytest.mark.skip_on_windows(reason="testing break in windows")
+def test_find_file_benchmark(hgfs_setup_and_teardown):
+    """
+    Benchmark serving hundreds of files of a ref, with hg cat and from the
+    exported tree of the ref
+    """
+    paths = [f"bench/file{idx}.sls" for idx in range(300)]
+    _commit(
+        hgfs_setup_and_teardown,
+        {path: f"idx: {idx}\n" for idx, path in enumerate(paths)},
+        b"add bench files",
+    )
+    calls = []
+    for export in (False, True):
+        with patch.dict(
+            hgfs.__opts__,
+            {
+                "hgfs_remotes": [
+                    {
+                        str(hgfs_setup_and_teardown): [
+                            {"base": "test"},
+                            {"export": export},
+                        ]
+                    }
+                ],
+            },
+        ):
+            hgfs.update()
+            with patch.object(
+                hglib.client.hgclient,
+                "cat",
+                autospec=True,
+                side_effect=hglib.client.hgclient.cat,
+            ) as cat:
+                for path in paths:
+                    assert hgfs.find_file(path=path, tgt_env="base")["rel"] == path
+            calls.append(cat.call_count)
+
+    # The exported tree is served without reading the files with hg cat
+    assert calls == [len(paths), 0]
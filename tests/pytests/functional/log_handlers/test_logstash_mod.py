@@ -7,8 +7,14 @@ import pytest
 import zmq
 from pytestshellutils.utils import ports
 
+import salt.utils.json
 import salt.utils.stringutils
-from salt.log_handlers.logstash_mod import DatagramLogstashHandler, ZMQLogstashHander
+from salt.log_handlers.logstash_mod import (
+    DatagramLogstashHandler,
+    LogstashFormatter,
+    QueuedLogstashHandler,
+    ZMQLogstashHander,
+)
 
 log = logging.getLogger(__name__)
 
@@ -89,3 +95,98 @@ def test_zmq_handler_log_pickling(zmq_server):
             raise
 
     assert received_log == salt.utils.stringutils.to_bytes(the_log)
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_queued_datagram_handler_batches_records(version):
+    logger = logging.getLogger("test_logstash_queued_logger")
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    port = ports.get_unused_localhost_port()
+    handler = QueuedLogstashHandler(
+        DatagramLogstashHandler("127.0.0.1", port), batch_size=10, flush_interval=0.1
+    )
+    handler.setFormatter(LogstashFormatter(version=version))
+    try:
+        server.bind(("127.0.0.1", port))
+        server.settimeout(2)
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        for idx in range(10):
+            logger.info("message %s", idx, extra={"idx": idx})
+
+        datagram, _ = server.recvfrom(65535)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+        server.close()
+
+    records = [salt.utils.json.loads(line) for line in datagram.splitlines()]
+    assert len(records) == 10
+    for idx, record in enumerate(records):
+        if version == 0:
+            assert record["@message"] == "message {}".format(idx)
+            assert record["@fields"]["idx"] == idx
+        else:
+            assert record["message"] == "message {}".format(idx)
+            assert record["idx"] == idx
+
+
+def test_queued_datagram_handler_drops_oldest_records():
+    handler = QueuedLogstashHandler(
+        DatagramLogstashHandler("127.0.0.1", 9), queue_size=3, flush_interval=60
+    )
+    handler._start_worker = lambda: None
+    logger = logging.getLogger("test_logstash_queued_logger")
+    logger.addHandler(handler)
+    try:
+        for idx in range(5):
+            logger.error("message %s", idx)
+    finally:
+        logger.removeHandler(handler)
+
+    assert handler.dropped == 2
+    assert [record.msg for record in handler._queue] == [
+        "message 2",
+        "message 3",
+        "message 4",
+    ]
+    assert all(record.args is None for record in handler._queue)
+    handler.close()
+
+
+def test_queued_zmq_handler_sends_multipart():
+    context = zmq.Context()
+    server = context.socket(zmq.SUB)
+    port = ports.get_unused_localhost_port()
+    handler = QueuedLogstashHandler(
+        ZMQLogstashHander("tcp://127.0.0.1:{}".format(port)), batch_size=3
+    )
+    handler.setFormatter(LogstashFormatter(version=1))
+    record = logging.LogRecord(
+        "test_logstash_logger", logging.INFO, __file__, 1, "test message", (), None
+    )
+    try:
+        server.setsockopt(zmq.SUBSCRIBE, b"")
+        server.bind("tcp://127.0.0.1:{}".format(port))
+        server.setsockopt(zmq.RCVTIMEO, 500)
+
+        # As with the unqueued handler, the first messages can be lost while
+        # the subscription is set up, so retry a few times
+        frames = None
+        for _ in range(5):
+            for _ in range(3):
+                handler.emit(record)
+            handler.flush()
+            try:
+                frames = server.recv_multipart()
+                break
+            except zmq.Again:
+                continue
+    finally:
+        handler.close()
+        server.close()
+        context.term()
+
+    assert frames is not None
+    assert len(frames) == 3
+    assert salt.utils.json.loads(frames[0])["message"] == "test message"
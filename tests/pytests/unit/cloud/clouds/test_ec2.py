@@ -4,7 +4,7 @@ import salt.crypt
 import salt.utils.files
 from salt.cloud.clouds import ec2
 from salt.exceptions import SaltCloudSystemExit
-from tests.support.mock import PropertyMock, patch
+from tests.support.mock import MagicMock, PropertyMock, patch
 
 pytestmark = [
     pytest.mark.windows_whitelisted,
@@ -13,7 +13,7 @@ pytestmark = [
 
 @pytest.fixture
 def configure_loader_modules():
-    return {ec2: {"__opts__": {}}}
+    return {ec2: {"__opts__": {}, "__context__": {}, "__utils__": {}}}
 
 
 def test__load_params_size():
@@ -372,3 +372,91 @@ def test_get_subnetname_id():
                 ):
                     # test for returns that include subnets with missing Name tags, see Issue 44330
                     assert ec2._get_subnetname_id(subnetname) == subnetid
+
+
+def _reservation(instance_id, name):
+    return {
+        "instancesSet": {
+            "item": {
+                "instanceId": instance_id,
+                "imageId": "ami-1234",
+                "instanceType": "t3.micro",
+                "instanceState": {"name": "running"},
+                "tagSet": {"item": {"key": "Name", "value": name}},
+            }
+        }
+    }
+
+
+def test_list_nodes_full_paginated_locations():
+    """
+    Test that the nodes are listed from all the configured locations, following
+    the pagination of DescribeInstances, and that the listed nodes are used by
+    show_instance
+    """
+    pages = {
+        ("us-east-1", None): [
+            {"requestId": "req-1"},
+            {"item": [_reservation("i-1", "web01"), _reservation("i-2", "web02")]},
+            {"nextToken": "token-1"},
+        ],
+        ("us-east-1", "token-1"): [
+            {"requestId": "req-2"},
+            {"item": _reservation("i-3", "web03")},
+            {"nextToken": None},
+        ],
+        ("eu-west-1", None): [
+            {"requestId": "req-3"},
+            {"item": _reservation("i-4", "db01")},
+        ],
+    }
+
+    def _query(params, location=None, **kwargs):
+        assert params["MaxResults"] == 1000
+        assert kwargs["return_root"] is True
+        return pages[(location, params.get("NextToken"))]
+
+    provider = {"locations": ["us-east-1", "eu-west-1"]}
+    aws_query = MagicMock(side_effect=_query)
+    cache_node_list = MagicMock()
+    with patch(
+        "salt.cloud.clouds.ec2.get_configured_provider", return_value=provider
+    ), patch(
+        "salt.cloud.clouds.ec2.config.get_cloud_config_value",
+        side_effect=lambda key, vm_, opts, default=None, **kw: vm_.get(key, default),
+    ), patch(
+        "salt.cloud.clouds.ec2.aws.query", aws_query
+    ), patch.dict(
+        ec2.__utils__,
+        {"cloud.cache_node_list": cache_node_list, "cloud.cache_node": MagicMock()},
+    ):
+        nodes = ec2.list_nodes_full(call="function")
+        assert sorted(nodes) == ["db01", "web01", "web02", "web03"]
+        assert nodes["web03"]["id"] == "i-3"
+        assert aws_query.call_count == 3
+        cache_node_list.assert_called_once()
+
+        assert ec2.list_nodes_min(location="eu-west-1", call="function") == {
+            "db01": {"state": "running", "id": "i-4"}
+        }
+        assert aws_query.call_count == 4
+
+        with patch("salt.cloud.clouds.ec2.get_location", return_value="us-east-1"):
+            node = ec2.show_instance("web02", call="action")
+            assert node["instanceId"] == "i-2"
+            node = ec2.show_instance(call="function", kwargs={"instance_id": "i-3"})
+            assert node["name"] == "web03"
+        assert aws_query.call_count == 4
+
+
+def test_signing_key_cached():
+    """
+    Test that the signing key is derived once per date, region and service
+    """
+    ec2._signing_key.cache_clear()
+    with patch("salt.cloud.clouds.ec2.sign", wraps=ec2.sign) as sign:
+        key = ec2._signing_key("secret", "20240101", "us-east-1", "ec2")
+        assert ec2._signing_key("secret", "20240101", "us-east-1", "ec2") == key
+        assert sign.call_count == 4
+        assert ec2._signing_key("secret", "20240101", "eu-west-1", "ec2") != key
+        assert sign.call_count == 8
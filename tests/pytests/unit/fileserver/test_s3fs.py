@@ -1,6 +1,11 @@
+import os
+import time
+
 import pytest
 
 import salt.fileserver.s3fs as s3fs
+import salt.utils.hashutils
+from tests.support.mock import patch
 
 
 @pytest.fixture
@@ -23,3 +28,96 @@ def test_ignore_pickle_load_exceptions():
     #  TODO: parameterized test with patched pickle.load that raises the
     #  various allowable exception from _read_buckets_cache_file
     pass
+
+
+@pytest.fixture
+def metadata():
+    return {
+        "base": [
+            {
+                "bucket1": [
+                    {"Key": "top.sls", "ETag": '"abc"', "Size": "10"},
+                    {"Key": "files/", "ETag": '"def"', "Size": "0"},
+                    {"Key": "files/a.txt", "ETag": '"123"', "Size": "3"},
+                ]
+            },
+            {"bucket2": [{"Key": "top.sls", "ETag": '"456"', "Size": "10"}]},
+        ]
+    }
+
+
+@pytest.fixture
+def env_per_bucket():
+    with patch.dict(s3fs.__opts__, {"s3.buckets": {"base": ["bucket1", "bucket2"]}}):
+        yield
+
+
+def test_init_only_reads_cache_file_when_it_changes(metadata):
+    s3fs._METADATA.clear()
+    cache_file = s3fs._get_buckets_cache_filename()
+    s3fs._write_buckets_cache_file(metadata, cache_file)
+
+    with patch(
+        "salt.fileserver.s3fs._read_buckets_cache_file",
+        wraps=s3fs._read_buckets_cache_file,
+    ) as read:
+        assert s3fs._init() == metadata
+        assert s3fs._init() is s3fs._init()
+        assert read.call_count == 1
+
+        metadata["base"][1]["bucket2"].append({"Key": "new.sls", "ETag": '"789"'})
+        s3fs._write_buckets_cache_file(metadata, cache_file)
+        os.utime(cache_file, ns=(time.time_ns(), time.time_ns() + 1000))
+        assert s3fs._init() == metadata
+        assert read.call_count == 2
+
+
+def test_find_file_uses_first_bucket_holding_path(metadata, env_per_bucket):
+    with patch("salt.fileserver.s3fs._init", return_value=metadata), patch(
+        "salt.fileserver.s3fs._get_file_from_s3"
+    ) as get_file:
+        assert s3fs.find_file("top.sls") == {"bucket": "bucket1", "path": "top.sls"}
+        assert s3fs.find_file("files/") == {"bucket": None, "path": None}
+        assert s3fs.find_file("missing.sls") == {"bucket": None, "path": None}
+        assert get_file.call_count == 1
+
+
+def test_find_file_meta(metadata):
+    assert s3fs._find_file_meta(metadata, "bucket2", "base", "top.sls") == {
+        "Key": "top.sls",
+        "ETag": "456",
+        "Size": "10",
+    }
+    assert s3fs._find_file_meta(metadata, "bucket2", "base", "files/a.txt") is None
+    assert s3fs._find_file_meta(metadata, "bucket1", "dev", "top.sls") is None
+
+
+def test_cached_file_hash_is_only_computed_when_file_changes(tmp_path):
+    s3fs._HASHES.clear()
+    cached_file = tmp_path / "file.txt"
+    cached_file.write_text("foo")
+
+    with patch(
+        "salt.utils.hashutils.get_hash", wraps=salt.utils.hashutils.get_hash
+    ) as get_hash:
+        first = s3fs._get_cached_file_hash(str(cached_file), "md5")
+        assert s3fs._get_cached_file_hash(str(cached_file), "md5") == first
+        assert get_hash.call_count == 1
+
+        cached_file.write_text("foobar")
+        assert s3fs._get_cached_file_hash(str(cached_file), "md5") != first
+        assert get_hash.call_count == 2
+
+
+def test_update_syncs_every_file(metadata, env_per_bucket):
+    with patch("salt.fileserver.s3fs._init", return_value=metadata), patch(
+        "salt.fileserver.s3fs._get_file_from_s3"
+    ) as get_file, patch.dict(s3fs.__opts__, {"s3.sync_workers": 2}):
+        s3fs.update()
+
+    synced = sorted((call.args[2], call.args[3]) for call in get_file.call_args_list)
+    assert synced == [
+        ("bucket1", "files/a.txt"),
+        ("bucket1", "top.sls"),
+        ("bucket2", "top.sls"),
+    ]
@@ -0,0 +1,166 @@
+"""
+Tests for salt.log_handlers.fluent_mod
+"""
+import gzip
+import logging
+import socket
+import threading
+import time
+
+import pytest
+
+import salt.log_handlers.fluent_mod as fluent_mod
+import salt.utils.msgpack
+
+
+class FluentStub:
+    """
+    Minimal fluentd forward input, which records the messages it receives and
+    answers ack requests
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        unpacker = salt.utils.msgpack.Unpacker(raw=False)
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                unpacker.feed(data)
+                for message in unpacker:
+                    self.messages.append(message)
+                    option = message[2] if len(message) > 2 else {}
+                    if "chunk" in option:
+                        ack = salt.utils.msgpack.packb({"ack": option["chunk"]})
+                        conn.sendall(ack)
+
+    def records(self):
+        ret = []
+        for tag, entries, option in self.messages:
+            if option.get("compressed") == "gzip":
+                entries = gzip.decompress(entries)
+            unpacker = salt.utils.msgpack.Unpacker(raw=False)
+            unpacker.feed(entries)
+            ret.extend((tag, record) for _, record in unpacker)
+        return ret
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture
+def fluent_stub():
+    stub = FluentStub()
+    yield stub
+    stub.close()
+
+
+def _wait_for(func, timeout=5):
+    start = time.time()
+    while not func():
+        if time.time() - start > timeout:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_async_sender_packs_records(fluent_stub):
+    sender = fluent_mod.AsyncFluentSender(
+        "salt", port=fluent_stub.port, batch_size=10, flush_interval=0.05
+    )
+    try:
+        for idx in range(25):
+            sender.emit(None, {"idx": idx})
+        assert _wait_for(lambda: sender.stats()["sent"] == 25)
+    finally:
+        sender.close()
+
+    assert [record["idx"] for _, record in fluent_stub.records()] == list(range(25))
+    assert all(message[2]["size"] <= 10 for message in fluent_stub.messages)
+    assert sender.stats() == {"queued": 0, "sent": 25, "dropped": 0}
+
+
+def test_async_sender_compressed_with_ack(fluent_stub):
+    sender = fluent_mod.AsyncFluentSender(
+        "salt",
+        port=fluent_stub.port,
+        batch_size=5,
+        flush_interval=0.05,
+        compressed=True,
+        require_ack=True,
+    )
+    try:
+        for idx in range(12):
+            sender.emit("minion", {"idx": idx})
+        sender.flush()
+    finally:
+        sender.close()
+
+    assert fluent_stub.records() == [
+        ("salt.minion", {"idx": idx}) for idx in range(12)
+    ]
+    assert all("chunk" in message[2] for message in fluent_stub.messages)
+    assert sender.stats()["sent"] == 12
+
+
+def test_async_sender_drops_oldest_records_when_fluentd_is_down():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    port = server.getsockname()[1]
+    # Nothing is listening on the port
+    server.close()
+
+    sender = fluent_mod.AsyncFluentSender(
+        "salt", port=port, queue_size=5, batch_size=100, flush_interval=10
+    )
+    try:
+        start = time.time()
+        for idx in range(8):
+            sender.emit(None, {"idx": idx})
+        assert time.time() - start < 1
+        assert sender.stats() == {"queued": 5, "sent": 0, "dropped": 3}
+        assert [record[2]["idx"] for record in sender._queue] == [3, 4, 5, 6, 7]
+
+        # A failed send puts the records back in the queue
+        assert sender._flush_batch() is None
+        assert sender.stats() == {"queued": 5, "sent": 0, "dropped": 3}
+    finally:
+        sender.close()
+
+
+def test_handler_uses_async_sender(fluent_stub):
+    handler = fluent_mod.FluentHandler(
+        "salt", port=fluent_stub.port, asynchronous=True, batch_size=1
+    )
+    try:
+        assert isinstance(handler.sender, fluent_mod.AsyncFluentSender)
+        formatter = fluent_mod.MessageFormatter(
+            payload_type="graylog", version=0, tags=["salt"]
+        )
+        handler.setFormatter(formatter)
+        handler.emit(
+            logging.LogRecord("salt", logging.ERROR, __file__, 1, "hello", (), None)
+        )
+        assert _wait_for(lambda: handler.sender.stats()["sent"] == 1)
+    finally:
+        handler.close()
+
+    assert fluent_stub.records()[0][1]["message"] == "hello"
+
@@ -0,0 +1,108 @@
+"""
+Test cases for salt.modules.lxc
+"""
+
+import pytest
+
+import salt.modules.lxc as lxc
+from tests.support.mock import MagicMock, call, patch
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {lxc: {"__context__": {}}}
+
+
+@pytest.fixture
+def fancy_output():
+    return "\n".join(
+        [
+            "NAME    STATE",
+            "-------------",
+            "web01   RUNNING",
+            "web02   STOPPED",
+            "db01    FROZEN",
+            "tmp01   STARTING",
+        ]
+    )
+
+
+def test_list_single_lxc_ls_call(fancy_output):
+    """
+    Test that list_ gets all the containers states with a single command
+    """
+    run_all = MagicMock(return_value={"retcode": 0, "stdout": fancy_output})
+    run = MagicMock()
+    with patch.dict(lxc.__salt__, {"cmd.run_all": run_all, "cmd.run": run}):
+        assert lxc.list_() == {
+            "running": ["web01"],
+            "stopped": ["web02"],
+            "frozen": ["db01"],
+        }
+        assert lxc.list_(limit="stopped") == ["web02"]
+        # The states are shared with lxc.state
+        assert lxc.state("db01") == "frozen"
+
+    assert run_all.call_count == 2
+    run_all.assert_called_with(
+        "lxc-ls --fancy --fancy-format name,state",
+        python_shell=False,
+        output_loglevel="debug",
+    )
+    run.assert_not_called()
+
+
+def test_list_fallback_to_lxc_info():
+    """
+    Test that list_ falls back to lxc-info when lxc-ls --fancy is not supported
+    """
+    run_all = MagicMock(return_value={"retcode": 1, "stdout": "", "stderr": "nope"})
+    run_stdout = MagicMock(return_value="web01\nweb02")
+    run = MagicMock(side_effect=["State: RUNNING", "State: STOPPED"])
+    with patch.dict(
+        lxc.__salt__,
+        {"cmd.run_all": run_all, "cmd.run_stdout": run_stdout, "cmd.run": run},
+    ):
+        assert lxc.list_(path="/srv/lxc") == {
+            "running": ["web01"],
+            "stopped": ["web02"],
+            "frozen": [],
+        }
+    run.assert_has_calls(
+        [
+            call(
+                "lxc-info -P /srv/lxc -n web01",
+                python_shell=False,
+                output_loglevel="debug",
+            ),
+            call(
+                "lxc-info -P /srv/lxc -n web02",
+                python_shell=False,
+                output_loglevel="debug",
+            ),
+        ]
+    )
+
+
+@pytest.mark.parametrize("workers", [None, 4])
+def test_list_extra(fancy_output, workers):
+    """
+    Test that list_ with extra gets the infos of the selected containers, in
+    order, sequentially or with a pool of workers
+    """
+    run_all = MagicMock(return_value={"retcode": 0, "stdout": fancy_output})
+    mock_info = MagicMock(side_effect=lambda name, path=None: {"name": name})
+    with patch.dict(lxc.__salt__, {"cmd.run_all": run_all}), patch.object(
+        lxc, "info", mock_info
+    ):
+        ret = lxc.list_(extra=True, workers=workers)
+    assert ret == {
+        "running": {"web01": {"name": "web01"}},
+        "stopped": {"web02": {"name": "web02"}},
+        "frozen": {"db01": {"name": "db01"}},
+    }
+    assert sorted(c.args[0] for c in mock_info.call_args_list) == [
+        "db01",
+        "web01",
+        "web02",
+    ]
@@ -5,6 +5,7 @@
 
 import os
 import textwrap
+from xml.dom import minidom
 
 import pytest
 
@@ -70,6 +71,102 @@ def test_list_pkgs_no_context():
         list_pkgs_context_mock.reset_mock()
 
 
+def test_list_pkgs_rpmdb_cache(tmp_path):
+    """
+    Test that the installed packages are cached on disk as long as the rpm
+    database does not change
+    """
+    root = tmp_path / "root"
+    rpmdb = root / "usr" / "lib" / "sysimage" / "rpm" / "rpmdb.sqlite"
+    rpmdb.parent.mkdir(parents=True)
+    rpmdb.write_text("db")
+
+    rpm_out = [
+        "jose4j_|-(none)_|-0.4.4_|-2.1.develHead_|-noarch_|-(none)_|-1499257756",
+        "kernel-default_|-(none)_|-4.4.138_|-94.39.1_|-x86_64_|-(none)_|-1529936067",
+    ]
+    cmd_run = MagicMock(return_value=os.linesep.join(rpm_out))
+    with patch.dict(zypper.__grains__, {"osarch": "x86_64"}), patch.dict(
+        zypper.__opts__, {"cachedir": str(tmp_path / "cache")}
+    ), patch.dict(
+        zypper.__salt__,
+        {
+            "cmd.run": cmd_run,
+            "pkg_resource.add_pkg": pkg_resource.add_pkg,
+            "pkg_resource.format_pkg_list": pkg_resource.format_pkg_list,
+            "pkg_resource.stringify": pkg_resource.stringify,
+        },
+    ):
+        expected = {
+            "jose4j": "0.4.4-2.1.develHead",
+            "kernel-default": "4.4.138-94.39.1",
+        }
+        assert zypper.list_pkgs(root=str(root)) == expected
+        cmd_run.assert_called_once()
+
+        # A new job, with an empty context, reuses the cache
+        zypper.__context__.clear()
+        assert zypper.list_pkgs(root=str(root)) == expected
+        cmd_run.assert_called_once()
+
+        # A change in the rpm database invalidates the cache
+        zypper.__context__.clear()
+        rpmdb.write_text("updated db")
+        assert zypper.list_pkgs(root=str(root)) == expected
+        assert cmd_run.call_count == 2
+
+
+def test_list_pkgs_includes_patterns_single_call():
+    """
+    Test that the installed patterns details are fetched with a single zypper
+    call
+    """
+    zypper_info = textwrap.dedent(
+        """\
+        Loading repository data...
+        Reading installed packages...
+
+
+        Information for pattern base:
+        -----------------------------
+        Repository     : SLE-Module-Basesystem15-SP3-Pool
+        Name           : base
+        Version        : 20170319-3.25.1
+        Arch           : x86_64
+        Installed      : Yes
+
+        Information for pattern x11:
+        ----------------------------
+        Repository     : SLE-Module-Basesystem15-SP3-Pool
+        Name           : x11
+        Version        : 20200505-11.3.2
+        Arch           : x86_64
+        Installed      : Yes
+        """
+    )
+    zypper_mock = MagicMock()
+    zypper_mock.return_value.nolock.call.return_value = zypper_info
+    with patch.dict(zypper.__grains__, {"osarch": "x86_64"}), patch.dict(
+        zypper.__salt__,
+        {
+            "cmd.run": MagicMock(return_value=""),
+            "pkg_resource.add_pkg": pkg_resource.add_pkg,
+            "pkg_resource.format_pkg_list": pkg_resource.format_pkg_list,
+            "pkg_resource.stringify": pkg_resource.stringify,
+        },
+    ), patch.object(zypper, "__zypper__", zypper_mock), patch.object(
+        zypper,
+        "list_installed_patterns",
+        MagicMock(return_value={"base": {}, "x11": {}}),
+    ):
+        pkgs = zypper.list_pkgs(includes=["pattern"])
+
+    assert pkgs == {"pattern:base": "20170319-3.25.1", "pattern:x11": "20200505-11.3.2"}
+    zypper_mock.return_value.nolock.call.assert_called_once_with(
+        "info", "-t", "package", "pattern:base", "pattern:x11"
+    )
+
+
 def test_normalize_name():
     """
     Test that package is normalized only when it should be
@@ -444,3 +541,67 @@ def test_remove_ptf():
         call_spy.assert_called_with(*expected_call_ptf)
         assert result["ptf-12345"]["new"] == "", result
         assert result["ptf-12345"]["old"] == "1", result
+
+
+def test_resolve_capabilities_batched(caplog):
+    """
+    Test that the capabilities are resolved with one search for the package
+    names and one search for the provides
+    """
+
+    def _solvables(*solvables):
+        return minidom.parseString(
+            "<stream><search-result><solvable-list>{}</solvable-list>"
+            "</search-result></stream>".format(
+                "".join(
+                    '<solvable status="installed" name="{}" kind="package"/>'.format(
+                        name
+                    )
+                    for name in solvables
+                )
+            )
+        )
+
+    zypper_mock = MagicMock()
+    zypper_mock.return_value.nolock.noraise.xml.call.side_effect = [
+        _solvables("vim"),
+        _solvables("w3m", "perl-Foo", "editor-a", "editor-b"),
+    ]
+    list_provides = MagicMock(
+        return_value={
+            "w3m_ssl": ["w3m"],
+            "perl(Foo)": ["perl-Foo"],
+            "editor": ["editor-a", "editor-b"],
+            "libfoo.so.1": ["foo"],
+        }
+    )
+    with patch.object(zypper, "__zypper__", zypper_mock), patch.object(
+        zypper, "list_provides", list_provides
+    ):
+        ret = zypper.resolve_capabilities(
+            ["vim", "w3m_ssl", {"perl(Foo)": "1.0"}, "editor", "unknown"],
+            resolve_capabilities=True,
+        )
+
+    assert ret == ["vim", "w3m", {"perl-Foo": "1.0"}, "editor", "unknown"]
+    assert zypper_mock.return_value.nolock.noraise.xml.call.call_args_list == [
+        call(
+            "search",
+            "--match-exact",
+            "editor",
+            "perl(Foo)",
+            "unknown",
+            "vim",
+            "w3m_ssl",
+        ),
+        call(
+            "search",
+            "--match-exact",
+            "--provides",
+            "editor",
+            "perl(Foo)",
+            "unknown",
+            "w3m_ssl",
+        ),
+    ]
+    assert "Found ambiguous match for capability 'editor'." in caplog.messages
@@ -2352,3 +2352,123 @@ def test_gen_xml_spice():
     assert "listen" not in root.find("devices/graphics").attrib
     assert root.find("devices/graphics/listen").attrib["type"] == "none"
     assert "address" not in root.find("devices/graphics/listen").attrib
+
+
+def test_domain_stats(make_mock_vm):
+    """
+    Test virt.domain_stats()
+    """
+    vm1 = make_mock_vm()
+    vm2 = MagicMock()
+    vm2.name.return_value = "vm2"
+    mocked_conn = virt.libvirt.openAuth.return_value
+    mocked_conn.getAllDomainStats.return_value = [
+        (
+            vm1,
+            {
+                "state.state": 1,
+                "cpu.time": 1500,
+                "balloon.current": 1048576,
+                "vcpu.current": 2,
+                "vcpu.0.state": 1,
+                "vcpu.1.state": 1,
+                "net.count": 1,
+                "net.0.name": "vnet0",
+                "net.0.rx.bytes": 2158,
+            },
+        ),
+        (vm2, {"state.state": 5}),
+    ]
+
+    assert virt.domain_stats() == {
+        "my_vm": {
+            "state": {"state": 1},
+            "cpu": {"time": 1500},
+            "balloon": {"current": 1048576},
+            "vcpu": {"current": 2, "items": [{"state": 1}, {"state": 1}]},
+            "net": {"count": 1, "items": [{"name": "vnet0", "rx_bytes": 2158}]},
+        },
+        "vm2": {"state": {"state": 5}},
+    }
+    mocked_conn.getAllDomainStats.assert_called_once()
+
+    mocked_conn.domainListGetStats.return_value = [(vm1, {"cpu.time": 1500})]
+    assert virt.domain_stats("my_vm", stats=["cpu"]) == {
+        "my_vm": {"cpu": {"time": 1500}}
+    }
+    mocked_conn.domainListGetStats.assert_called_once_with(
+        [vm1], virt.libvirt.VIR_DOMAIN_STATS_CPU_TOTAL
+    )
+
+    with pytest.raises(SaltInvocationError):
+        virt.domain_stats(stats=["cpu", "foo"])
+
+
+def test_cached_connection():
+    """
+    Test that connections are reused when virt:connection:cache is set
+    """
+    config = {"virt:connection:uri": "test:///default", "virt:connection:cache": True}
+    mocked_conn = virt.libvirt.openAuth.return_value
+    virt._CONNECTIONS.clear()
+    with patch.dict(
+        virt.__salt__,
+        {"config.get": lambda key, default=None: config.get(key, default)},
+    ):
+        try:
+            virt.list_domains()
+            virt.list_domains()
+            assert virt.libvirt.openAuth.call_count == 1
+            mocked_conn.close.assert_not_called()
+
+            # A dead connection is replaced
+            mocked_conn.isAlive.return_value = 0
+            virt.list_domains()
+            assert virt.libvirt.openAuth.call_count == 2
+            mocked_conn.close.assert_called_once()
+
+            # Other credentials get their own connection
+            mocked_conn.isAlive.return_value = 1
+            virt.list_domains(username="other")
+            assert virt.libvirt.openAuth.call_count == 3
+        finally:
+            virt._CONNECTIONS.clear()
+
+
+def test_vm_info_shares_storage_index(make_mock_vm, make_mock_storage_pool):
+    """
+    Test that vm_info() lists the storage volumes once and parses the domain
+    definitions only once
+    """
+    make_mock_storage_pool("default", "dir", ["vm01_system"])
+    vm = make_mock_vm(
+        """
+        <domain type='kvm' id='7'>
+          <name>vm01</name>
+          <uuid>vm01-uuid</uuid>
+          <memory unit='KiB'>1048576</memory>
+          <vcpu placement='auto'>1</vcpu>
+          <os>
+            <type arch='x86_64' machine='pc-i440fx-2.6'>hvm</type>
+          </os>
+          <devices>
+            <disk type='file' device='disk'>
+              <driver name='qemu' type='qcow2'/>
+              <source file='/path/to/default/vm01_system'/>
+              <target dev='vda' bus='virtio'/>
+            </disk>
+          </devices>
+        </domain>
+        """
+    )
+    mocked_conn = virt.libvirt.openAuth.return_value
+
+    info = virt.vm_info("vm01")
+
+    assert info["vm01"]["uuid"] == "vm01-uuid"
+    assert info["vm01"]["disks"]["vda"]["file"] == "default/vm01_system"
+    assert info["vm01"]["disks"]["vda"]["virtual size"] == 1234567
+    mocked_conn.listAllStoragePools.assert_called_once()
+    virt.libvirt.openAuth.assert_called_once()
+    # Active and inactive definitions
+    assert vm.XMLDesc.call_count == 2
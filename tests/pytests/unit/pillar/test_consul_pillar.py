@@ -162,3 +162,57 @@ def test_dict_merge():
         assert consul_pillar.dict_merge(test_dict, simple_dict) == {
             "key1": {"key2": "val1", "key3": {"key4": "value"}}
         }
+
+
+def test_later_keys_do_not_override_earlier_ones():
+    items = [
+        {"Key": "root/a", "Value": "first"},
+        {"Key": "root/a", "Value": "second"},
+        {"Key": "root/b", "Value": "{c: 1}"},
+        {"Key": "root/b/d", "Value": "2"},
+    ]
+    with patch.object(
+        consul_pillar, "consul_fetch", MagicMock(return_value=("1", items))
+    ):
+        assert consul_pillar.fetch_tree("client", "root", True) == {
+            "a": "first",
+            "b": {"c": 1, "d": 2},
+        }
+
+
+def test_fetch_tree_cache(base_pillar_data):
+    consul_pillar._TREE_CACHE.clear()
+    fetch = MagicMock(return_value=("2232", base_pillar_data))
+    with patch.object(consul_pillar, "consul_fetch", fetch), patch.object(
+        consul_pillar, "_build_tree", wraps=consul_pillar._build_tree
+    ) as build, patch("time.time", MagicMock(return_value=1000)):
+        first = consul_pillar.fetch_tree("client", "test-shared", True, cache_ttl=60)
+        first["user"]["login"] = "changed"
+        second = consul_pillar.fetch_tree("client", "test-shared", True, cache_ttl=60)
+        assert second["user"]["login"] == "test"
+        assert fetch.call_count == 1
+        assert build.call_count == 1
+
+    # Once expired, an unchanged index reuses the parsed tree
+    with patch.object(consul_pillar, "consul_fetch", fetch), patch.object(
+        consul_pillar, "_build_tree", wraps=consul_pillar._build_tree
+    ) as build, patch("time.time", MagicMock(return_value=1100)):
+        consul_pillar.fetch_tree("client", "test-shared", True, cache_ttl=60)
+        assert fetch.call_count == 2
+        build.assert_not_called()
+    consul_pillar._TREE_CACHE.clear()
+
+
+def test_cache_ttl_without_profile(base_pillar_data):
+    consul_pillar._TREE_CACHE.clear()
+    with patch.dict(
+        consul_pillar.__salt__, {"grains.get": MagicMock(return_value=({}))}
+    ), patch.object(
+        consul_pillar,
+        "fetch_tree",
+        MagicMock(return_value={}),
+    ) as fetch_tree:
+        consul_pillar.ext_pillar("testminion", {}, "root=test-shared/ cache_ttl=60")
+        consul_pillar.get_conn.assert_called_once_with(consul_pillar.__opts__, None)
+        assert fetch_tree.call_args[1]["cache_ttl"] == 60
+    consul_pillar._TREE_CACHE.clear()
@@ -2,7 +2,7 @@ import pytest
 
 import salt.exceptions
 import salt.pillar.mongo as mongo
-from tests.support.mock import patch
+from tests.support.mock import MagicMock, patch
 
 
 @pytest.fixture
@@ -10,6 +10,24 @@ def configure_loader_modules():
     return {mongo: {"__opts__": {}}}
 
 
+@pytest.fixture(autouse=True)
+def clear_clients():
+    mongo._CLIENTS.clear()
+    mongo._PREFETCHED.clear()
+    yield
+    mongo._CLIENTS.clear()
+    mongo._PREFETCHED.clear()
+
+
+@pytest.fixture
+def pki_dir(tmp_path):
+    minions_dir = tmp_path / "minions"
+    minions_dir.mkdir()
+    for idx in range(200):
+        (minions_dir / "minion{}.example.com".format(idx)).touch()
+    return str(tmp_path)
+
+
 def test_config_exception():
     opts = {
         "mongo.host": "localhost",
@@ -46,3 +64,110 @@ def test_mongo_pillar_should_use_ssl_when_set_in_opts(expected_ssl, use_ssl):
             password=None,
             ssl=expected_ssl,
         )
+
+
+def test_mongo_pillar_reuses_client():
+    """
+    Test that the Mongo client is created once per connection configuration
+    """
+    opts = {"mongo.host": "fnord", "mongo.port": 27017, "mongo.db": "salt"}
+    with patch.dict(mongo.__opts__, opts), patch(
+        "salt.pillar.mongo.pymongo", create=True
+    ) as fake_mongo:
+        mongo.ext_pillar("minion1", {})
+        mongo.ext_pillar("minion2", {})
+        fake_mongo.MongoClient.assert_called_once()
+
+        with patch.dict(mongo.__opts__, {"mongo.port": 27018}):
+            mongo.ext_pillar("minion1", {})
+        assert fake_mongo.MongoClient.call_count == 2
+
+
+def test_mongo_pillar_prefetch(pki_dir):
+    """
+    Test that the documents of the accepted minions are read with one query
+    """
+    documents = [
+        {"_id": "id{}".format(idx), "name": "minion{}".format(idx), "idx": idx}
+        for idx in range(150)
+    ]
+    opts = {
+        "mongo.host": "fnord",
+        "mongo.port": 27017,
+        "mongo.db": "salt",
+        "pki_dir": pki_dir,
+    }
+    with patch.dict(mongo.__opts__, opts), patch(
+        "salt.pillar.mongo.pymongo", create=True
+    ) as fake_mongo:
+        coll = fake_mongo.MongoClient.return_value["salt"]["vm"]
+        coll.find.return_value = iter(documents)
+        coll.find_one.return_value = None
+        for idx in (0, 3, 149):
+            assert mongo.ext_pillar(
+                "minion{}.example.com".format(idx),
+                {},
+                collection="vm",
+                id_field="name",
+                re_pattern=r"\.example\.com",
+                prefetch=True,
+            ) == {"_id": "id{}".format(idx), "name": "minion{}".format(idx), "idx": idx}
+        # An accepted minion without document
+        assert (
+            mongo.ext_pillar(
+                "minion199.example.com",
+                {},
+                collection="vm",
+                id_field="name",
+                re_pattern=r"\.example\.com",
+                prefetch=True,
+            )
+            == {}
+        )
+        coll.find.assert_called_once()
+        query = coll.find.call_args.args[0]
+        assert len(query["name"]["$in"]) == 200
+        coll.find_one.assert_not_called()
+
+        # A minion which was not accepted when the documents were prefetched
+        mongo.ext_pillar(
+            "minion200.example.com",
+            {},
+            collection="vm",
+            id_field="name",
+            re_pattern=r"\.example\.com",
+            prefetch=True,
+        )
+        coll.find_one.assert_called_once_with({"name": "minion200"}, projection=None)
+
+
+@pytest.mark.slow_test
+def test_mongo_pillar_prefetch_benchmark(pki_dir):
+    """
+    Benchmark the mongo ext_pillar over hundreds of minions, with and without
+    prefetch, against mongomock
+    """
+    mongomock = pytest.importorskip("mongomock")
+    client = mongomock.MongoClient()
+    client["salt"]["pillar"].insert_many(
+        [
+            {"_id": "minion{}.example.com".format(idx), "role": "web", "idx": idx}
+            for idx in range(200)
+        ]
+    )
+    opts = {
+        "mongo.host": "localhost",
+        "mongo.port": 27017,
+        "mongo.db": "salt",
+        "pki_dir": pki_dir,
+    }
+    with patch.dict(mongo.__opts__, opts), patch(
+        "salt.pillar.mongo.pymongo", create=True
+    ) as fake_mongo:
+        fake_mongo.MongoClient = MagicMock(return_value=client)
+        for prefetch in (False, True):
+            for idx in range(200):
+                minion_id = "minion{}.example.com".format(idx)
+                ret = mongo.ext_pillar(minion_id, {}, prefetch=prefetch)
+                assert ret == {"_id": minion_id, "role": "web", "idx": idx}
+        fake_mongo.MongoClient.assert_called_once()
@@ -2,12 +2,21 @@
     :codeauthor: Gary T. Giesen <ggiesen@giesen.me>
 """
 
+import copy
+
 import pytest
 
 import salt.pillar.netbox as netbox
 from tests.support.mock import patch
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    netbox._CACHE.clear()
+    yield
+    netbox._CACHE.clear()
+
+
 @pytest.fixture
 def default_kwargs():
     return {
@@ -2362,3 +2371,93 @@ def test_when_we_set_proxy_return_but_get_no_value_for_primary_ip_then_error_mes
             'You have set "proxy_return" to "True" but you have not set the primary IPv4 or IPv6 address in NetBox for "%s"',
             "minion1",
         )
+
+
+@pytest.fixture
+def netbox_api(
+    multiple_device_results, site_results, site_prefixes_results, proxy_details_results
+):
+    """
+    Stand-in for the NetBox API that records the URL of every query
+    """
+    calls = []
+
+    def query(url, params=None, header_dict=None, decode=False):
+        calls.append(url)
+        if url.endswith("/dcim/devices"):
+            ret = copy.deepcopy(multiple_device_results)
+            if params and "name" in params:
+                ret["dict"]["results"] = [
+                    device
+                    for device in ret["dict"]["results"]
+                    if device["name"] == params["name"]
+                ]
+            return ret
+        if url.endswith("/dcim/sites/18/"):
+            return copy.deepcopy(site_results)
+        if url.endswith("/ipam/prefixes"):
+            return copy.deepcopy(site_prefixes_results)
+        if url.endswith("/dcim/platforms/1/"):
+            return copy.deepcopy(proxy_details_results)
+        return {"status": 404, "error": "Not Found"}
+
+    with patch("salt.utils.http.query", side_effect=query):
+        yield calls
+
+
+def test_when_cache_ttl_is_set_then_site_and_platform_lookups_are_shared(
+    default_kwargs, netbox_api
+):
+    default_kwargs["cache_ttl"] = 60
+
+    first = netbox.ext_pillar(**default_kwargs)
+    default_kwargs["minion_id"] = "minion2"
+    second = netbox.ext_pillar(**default_kwargs)
+
+    assert first["netbox"]["name"] == "minion1"
+    assert second["netbox"]["name"] == "minion2"
+    assert first["netbox"]["site"] == second["netbox"]["site"]
+    assert len(first["netbox"]["site"]["prefixes"]) == 2
+    assert first["proxy"]["driver"] == "ios"
+    assert sum(url.endswith("/dcim/sites/18/") for url in netbox_api) == 1
+    assert sum(url.endswith("/ipam/prefixes") for url in netbox_api) == 1
+    assert sum(url.endswith("/dcim/platforms/1/") for url in netbox_api) == 1
+    assert sum(url.endswith("/dcim/devices") for url in netbox_api) == 2
+
+
+def test_when_cache_ttl_is_not_set_then_every_minion_queries_the_site(
+    default_kwargs, netbox_api
+):
+    netbox.ext_pillar(**default_kwargs)
+    default_kwargs["minion_id"] = "minion2"
+    netbox.ext_pillar(**default_kwargs)
+
+    assert sum(url.endswith("/dcim/sites/18/") for url in netbox_api) == 2
+    assert not netbox._CACHE
+
+
+def test_when_prefetch_devices_is_set_then_devices_are_fetched_once(
+    default_kwargs, netbox_api
+):
+    default_kwargs["cache_ttl"] = 60
+    default_kwargs["prefetch_devices"] = True
+
+    first = netbox.ext_pillar(**default_kwargs)
+    default_kwargs["minion_id"] = "minion2"
+    second = netbox.ext_pillar(**default_kwargs)
+
+    assert first["netbox"]["name"] == "minion1"
+    assert first["netbox"]["node_type"] == "device"
+    assert second["netbox"]["name"] == "minion2"
+    assert sum(url.endswith("/dcim/devices") for url in netbox_api) == 1
+
+
+def test_when_running_lookups_concurrently_then_result_is_unchanged(
+    default_kwargs, netbox_api
+):
+    default_kwargs["max_workers"] = 1
+    sequential = netbox.ext_pillar(**default_kwargs)
+    default_kwargs["max_workers"] = 8
+    concurrent = netbox.ext_pillar(**default_kwargs)
+
+    assert sequential == concurrent
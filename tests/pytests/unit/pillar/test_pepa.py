@@ -1,4 +1,10 @@
+import textwrap
+
+import jinja2
+import pytest
+
 import salt.pillar.pepa as pepa
+from tests.support.mock import MagicMock, patch
 
 try:
     from salt.utils.odict import OrderedDict
@@ -23,3 +29,142 @@ def test_repeated_keys():
     )
     result = pepa.key_value_to_tree(data)
     assert result == expected_result
+
+
+@pytest.fixture
+def pepa_roots(tmp_path):
+    pepa._TEMPLATES.clear()
+    opts = {"pepa_roots": {"base": str(tmp_path)}}
+    with patch.dict(pepa.__opts__, opts), patch.object(
+        pepa, "__grains__", {"os": "Linux"}, create=True
+    ):
+        yield tmp_path
+    pepa._TEMPLATES.clear()
+
+
+def _write_template(root, categ, entry, content):
+    templdir = root / "host" / categ
+    templdir.mkdir(parents=True, exist_ok=True)
+    (templdir / "{}.yaml".format(entry)).write_text(textwrap.dedent(content))
+
+
+SEQUENCE = [{"default": None}, {"roles": None}, {"hostname": None}]
+
+
+def test_ext_pillar_context(pepa_roots):
+    """
+    Test that the templates are rendered with the keys set, merged and unset
+    by the previous templates
+    """
+    _write_template(
+        pepa_roots,
+        "default",
+        "default",
+        """\
+        pkgs:
+          - a
+        foo..bar: 1
+        roles:
+          - web
+          - db
+        """,
+    )
+    _write_template(
+        pepa_roots,
+        "roles",
+        "web",
+        """\
+        web..port: {{ foo.bar + 1 }}
+        pkgs..merge():
+          - b
+        """,
+    )
+    _write_template(
+        pepa_roots,
+        "roles",
+        "db",
+        """\
+        foo..bar..unset(): null
+        db..name: {{ hostname }}
+        db..port: {{ web.port }}
+        """,
+    )
+    _write_template(
+        pepa_roots,
+        "hostname",
+        "minion1",
+        """\
+        summary: "{{ pkgs|join(',') }} {{ db.name }} {{ foo is defined }}"
+        os: {{ grains.os }}
+        """,
+    )
+
+    ret = pepa.ext_pillar("minion1", {}, "host", SEQUENCE)
+    assert len(ret.pop("pepa_templates")) == 4
+    assert ret == {
+        "default": "default",
+        "hostname": "minion1",
+        "environment": "base",
+        "pkgs": ["a", "b"],
+        "roles": ["web", "db"],
+        "web": {"port": 2},
+        "db": {"name": "minion1", "port": 2},
+        "summary": "a,b minion1 False",
+        "os": "Linux",
+    }
+
+
+def test_ext_pillar_template_cache(pepa_roots):
+    """
+    Test that the templates are compiled once, until their file changes
+    """
+    _write_template(pepa_roots, "default", "default", "roles: [web]\n")
+    _write_template(pepa_roots, "roles", "web", "port: 80\n")
+    template = MagicMock(side_effect=jinja2.Template)
+    with patch.object(pepa.jinja2, "Template", template):
+        assert pepa.ext_pillar("minion1", {}, "host", SEQUENCE)["port"] == 80
+        assert pepa.ext_pillar("minion2", {}, "host", SEQUENCE)["port"] == 80
+        assert template.call_count == 2
+
+        _write_template(pepa_roots, "roles", "web", "port: 8080\n")
+        assert pepa.ext_pillar("minion1", {}, "host", SEQUENCE)["port"] == 8080
+        assert template.call_count == 3
+
+
+@pytest.mark.slow_test
+def test_ext_pillar_benchmark(pepa_roots):
+    """
+    Benchmark the rendering of thousands of templates, which are compiled
+    during the first run only
+    """
+    roles = ["role{}".format(idx) for idx in range(2000)]
+    _write_template(
+        pepa_roots,
+        "default",
+        "default",
+        "roles:\n" + "".join("  - " + role + "\n" for role in roles),
+    )
+    for idx, role in enumerate(roles):
+        _write_template(
+            pepa_roots,
+            "roles",
+            role,
+            """\
+            {role}..idx: {idx}
+            {role}..host: {{{{ hostname }}}}
+            {role}..previous: {{{{ {previous}.idx if {previous} is defined else -1 }}}}
+            """.format(
+                role=role, idx=idx, previous=roles[idx - 1] if idx else "missing"
+            ),
+        )
+
+    template = MagicMock(side_effect=jinja2.Template)
+    with patch.object(pepa.jinja2, "Template", template):
+        for minion_id in ("minion1", "minion2"):
+            ret = pepa.ext_pillar(minion_id, {}, "host", SEQUENCE)
+            assert ret["role1999"] == {
+                "idx": 1999,
+                "host": minion_id,
+                "previous": 1998,
+            }
+            assert template.call_count == len(roles) + 1
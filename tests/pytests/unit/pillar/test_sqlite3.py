@@ -1,4 +1,41 @@
+import time
+
+import pytest
+
+import salt.pillar.sql_base as sql_base
 import salt.pillar.sqlite3 as sqlite3
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def pillar_db(tmp_path):
+    database = str(tmp_path / "pillar.db")
+    conn = sqlite3.sqlite3.connect(database)
+    conn.execute("CREATE TABLE pillars (minion_id TEXT, pillar TEXT, value TEXT)")
+    conn.executemany(
+        "INSERT INTO pillars VALUES (?, ?, ?)",
+        [
+            ("minion1", "role", "web"),
+            ("minion2", "role", "db"),
+            ("minion2", "env", "prod"),
+            ("minion3", "role", "cache"),
+            ("minion4", "role", "new"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    minions_dir = tmp_path / "pki" / "minions"
+    minions_dir.mkdir(parents=True)
+    for minion_id in ("minion1", "minion2", "minion3"):
+        (minions_dir / minion_id).touch()
+
+    sql_base._PREFETCHED.clear()
+    yield {
+        "sqlite3": {"database": database, "timeout": 5.0},
+        "pki_dir": str(tmp_path / "pki"),
+    }
+    sql_base._PREFETCHED.clear()
 
 
 def test_001_extract_queries_list():
@@ -787,3 +824,39 @@ def test_302_process_results_with_lists_consecutive():
     assert sorted({"a": [[[{"e": 1}, {"g": 2}]], [[{"j": 3, "k": 4}]]]}) == sorted(
         return_data.result
     )
+
+
+def test_401_fetch_prefetch(pillar_db):
+    """
+    Test that the rows of the accepted minions are prefetched in batches and
+    that the pillars of the prefetched minions are built without a query
+    """
+    query = {
+        "query": "SELECT pillar, value FROM pillars WHERE minion_id = ?",
+        "prefetch_query": (
+            "SELECT minion_id, pillar, value FROM pillars "
+            "WHERE minion_id IN ({minion_ids})"
+        ),
+        "prefetch_batch_size": 2,
+    }
+    connect = MagicMock(side_effect=sqlite3.sqlite3.connect)
+    with patch.object(sqlite3, "__opts__", pillar_db, create=True), patch.object(
+        sqlite3.sqlite3, "connect", connect
+    ):
+        assert sqlite3.ext_pillar("minion1", {}, query) == {"role": "web"}
+        assert connect.call_count == 1
+        assert sqlite3.ext_pillar("minion2", {}, query) == {
+            "role": "db",
+            "env": "prod",
+        }
+        assert sqlite3.ext_pillar("minion3", {}, query) == {"role": "cache"}
+        assert connect.call_count == 1
+
+        # minion4 was not accepted when the rows were prefetched
+        assert sqlite3.ext_pillar("minion4", {}, query) == {"role": "new"}
+        assert connect.call_count == 2
+
+        # The prefetched rows expire
+        with patch("time.time", MagicMock(return_value=time.time() + 120)):
+            assert sqlite3.ext_pillar("minion1", {}, query) == {"role": "web"}
+        assert connect.call_count == 3
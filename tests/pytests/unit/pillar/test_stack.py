@@ -15,6 +15,17 @@ def configure_loader_modules():
     return {stack: loader_globals}
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    stack._GLOB_CACHE.clear()
+    stack._YAML_CACHE.clear()
+    stack._BYTECODE_CACHE.clear()
+    yield
+    stack._GLOB_CACHE.clear()
+    stack._YAML_CACHE.clear()
+    stack._BYTECODE_CACHE.clear()
+
+
 def mock_stack_pillar(mock_output, *args, **kwargs):
     # mock: jenv.get_template(filename).render(stack=stack)
     class MockJinja:
@@ -81,3 +92,42 @@ def test_extpillar_stack_exceptions():
         """,  # mocked contents of filename.yml
     ]
     pytest.raises(Exception, mock_stack_pillar, mock_output, "/path/to/stack.cfg")
+
+
+def test_plain_yaml_is_parsed_once_and_copied(tmp_path):
+    (tmp_path / "stack.cfg").write_text("plain.yml\ntemplated.yml\n")
+    (tmp_path / "plain.yml").write_text("users:\n  - tom\n")
+    (tmp_path / "templated.yml").write_text("minion: {{ minion_id }}\n")
+    cfg = str(tmp_path / "stack.cfg")
+
+    result = stack.ext_pillar("minion1", {}, cfg)
+    assert result == {"users": ["tom"], "minion": "minion1"}
+    assert stack._YAML_CACHE[str(tmp_path / "plain.yml")][1] is True
+    assert stack._YAML_CACHE[str(tmp_path / "templated.yml")][1] is False
+
+    # Merging must not modify the cached object
+    result["users"].append("mat")
+    safe_load = stack.salt.utils.yaml.safe_load
+    with patch("salt.utils.yaml.safe_load", wraps=safe_load) as load:
+        assert stack.ext_pillar("minion2", {}, cfg) == {
+            "users": ["tom"],
+            "minion": "minion2",
+        }
+    # Only the config file and the templated file were parsed again
+    assert load.call_count == 2
+
+
+def test_glob_results_are_cached(tmp_path):
+    (tmp_path / "stack.cfg").write_text("*.yml\n")
+    (tmp_path / "a.yml").write_text("a: 1\n")
+    cfg = str(tmp_path / "stack.cfg")
+    with patch("glob.glob", wraps=stack.glob.glob) as mock_glob:
+        stack.ext_pillar("minion1", {}, cfg)
+        stack.ext_pillar("minion2", {}, cfg)
+    assert mock_glob.call_count == 1
+
+    with patch.dict(stack.__opts__, {"pillar_stack_glob_cache_ttl": 0}), patch(
+        "glob.glob", wraps=stack.glob.glob
+    ) as mock_glob:
+        stack.ext_pillar("minion1", {}, cfg)
+    assert mock_glob.call_count == 1
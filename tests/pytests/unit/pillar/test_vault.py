@@ -1,4 +1,6 @@
 import logging
+import threading
+import time
 
 import pytest
 
@@ -128,7 +130,9 @@ def test_ext_pillar_merging(read_kv, first, second, expected, request):
     """
     first = request.getfixturevalue(first)
     second = request.getfixturevalue(second)
-    read_kv.side_effect = (first, second)
+    # The paths are read concurrently, so the secrets are returned per path
+    secrets = {"salt/roles/db": first, "salt/roles/web": second}
+    read_kv.side_effect = lambda path, *args, **kwargs: secrets[path]
     ext_pillar = vault.ext_pillar(
         "test-minion",
         {"roles": ["db", "web"]},
@@ -162,3 +166,85 @@ def test_invalid_config(caplog):
         ext_pillar = vault.ext_pillar("testminion", {}, "secret/path")
         assert ext_pillar == {}
         assert "is not a valid Vault ext_pillar config" in caplog.text
+
+
+@pytest.fixture
+def vault_cache():
+    vault.clear_cache()
+    yield
+    vault.clear_cache()
+
+
+def test_ext_pillar_concurrent_reads(read_kv):
+    """
+    Test that the paths are read concurrently and that the secrets are merged
+    in the order of the paths, whichever read finishes first
+    """
+    roles = ["r{}".format(idx) for idx in range(8)]
+    lock = threading.Lock()
+    running = {"current": 0, "peak": 0}
+
+    def _read_kv(path, *args, **kwargs):
+        with lock:
+            running["current"] += 1
+            running["peak"] = max(running["peak"], running["current"])
+        try:
+            # The first paths take the longest to read
+            idx = int(path.rsplit("r", 1)[1])
+            time.sleep(0.03 * (len(roles) - idx))
+            return {"pass": path, path: True}
+        finally:
+            with lock:
+                running["current"] -= 1
+
+    read_kv.side_effect = _read_kv
+    ext_pillar = vault.ext_pillar(
+        "test-minion",
+        {"roles": roles},
+        conf="path=salt/roles/{pillar[roles]}",
+        workers=8,
+    )
+    # The reads overlapped instead of running one after another
+    assert running["peak"] > 1
+    assert ext_pillar["pass"] == "salt/roles/r7"
+    assert sorted(ext_pillar) == ["pass"] + ["salt/roles/" + role for role in roles]
+    assert read_kv.call_count == 8
+
+
+@pytest.mark.usefixtures("vault_cache")
+def test_ext_pillar_shared_cache(read_kv, data):
+    """
+    Test that the secrets of the paths which are not templated are shared by
+    all the minions until they expire
+    """
+    for minion_id in ("minion1", "minion2"):
+        ext_pillar = vault.ext_pillar(minion_id, {}, "path=secret/path", cache_ttl=60)
+        assert ext_pillar == data
+    read_kv.assert_called_once()
+    assert vault.cache_stats() == {"hits": 1, "misses": 1, "paths": 1}
+
+    # The cached secret cannot be modified by the merging
+    ext_pillar["foo"] = "baz"
+    assert vault.ext_pillar("minion3", {}, "path=secret/path", cache_ttl=60) == data
+
+    with patch("time.time", Mock(return_value=time.time() + 120)):
+        vault.ext_pillar("minion1", {}, "path=secret/path", cache_ttl=60)
+    assert read_kv.call_count == 2
+
+    # The templated paths are not cached
+    for minion_id in ("minion1", "minion2"):
+        vault.ext_pillar(minion_id, {}, "path=secret/{minion}", cache_ttl=60)
+    assert read_kv.call_count == 4
+    assert vault.cache_stats()["paths"] == 1
+
+
+@pytest.mark.usefixtures("vault_cache")
+def test_ext_pillar_shared_cache_lease_ttl(read_kv):
+    """
+    Test that a secret is not cached for longer than its ttl lease hint
+    """
+    read_kv.return_value = {"foo": "bar", "ttl": "1m"}
+    vault.ext_pillar("minion1", {}, "path=secret/path", cache_ttl=300)
+    with patch("time.time", Mock(return_value=time.time() + 90)):
+        vault.ext_pillar("minion2", {}, "path=secret/path", cache_ttl=300)
+    assert read_kv.call_count == 2
@@ -0,0 +1,77 @@
+"""
+Tests for the pgjsonb queue backend
+"""
+
+import pytest
+
+import salt.queues.pgjsonb_queue as pgjsonb_queue
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {pgjsonb_queue: {"__opts__": {}}}
+
+
+@pytest.fixture(autouse=True)
+def clean_caches():
+    pgjsonb_queue._CONNECTIONS.clear()
+    pgjsonb_queue._KNOWN_QUEUES.clear()
+
+
+@pytest.fixture
+def mock_psycopg2():
+    conn = MagicMock()
+    conn.closed = 0
+    cursor = conn.cursor.return_value
+    psycopg2 = MagicMock()
+    psycopg2.connect.return_value = conn
+    psycopg2.DatabaseError = type("DatabaseError", (Exception,), {})
+    psycopg2.OperationalError = type(
+        "OperationalError", (psycopg2.DatabaseError,), {}
+    )
+    psycopg2.InterfaceError = type("InterfaceError", (psycopg2.DatabaseError,), {})
+    with patch.object(pgjsonb_queue, "psycopg2", psycopg2, create=True):
+        yield psycopg2, conn, cursor
+
+
+def test_connection_is_reused(mock_psycopg2):
+    psycopg2, conn, cursor = mock_psycopg2
+    cursor.fetchone.return_value = (3,)
+    assert pgjsonb_queue.list_length("jobs") == 3
+    assert pgjsonb_queue.list_length("jobs") == 3
+    psycopg2.connect.assert_called_once()
+    conn.close.assert_not_called()
+
+
+def test_pop_claims_rows_with_skip_locked(mock_psycopg2):
+    _, conn, cursor = mock_psycopg2
+    cursor.fetchall.return_value = [(2, {"b": 2}), (1, {"a": 1})]
+    assert pgjsonb_queue.pop("jobs", 2) == [{"a": 1}, {"b": 2}]
+    cursor.execute.assert_called_once_with(
+        "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs ORDER BY id LIMIT %s"
+        " FOR UPDATE SKIP LOCKED) RETURNING id, data;",
+        (2,),
+    )
+    conn.commit.assert_called_once()
+
+
+def test_pop_all_without_skip_locked(mock_psycopg2):
+    _, _, cursor = mock_psycopg2
+    cursor.fetchall.return_value = []
+    with patch.dict(pgjsonb_queue.__opts__, {"queue.pgjsonb.skip_locked": False}):
+        assert pgjsonb_queue.pop("jobs", "all") == []
+    cursor.execute.assert_called_once_with(
+        "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs ORDER BY id"
+        " FOR UPDATE) RETURNING id, data;",
+        (),
+    )
+
+
+def test_queue_creation_is_checked_once(mock_psycopg2):
+    with patch.object(
+        pgjsonb_queue, "_queue_exists", return_value=True
+    ) as mock_exists:
+        pgjsonb_queue.insert("jobs", {"a": 1})
+        pgjsonb_queue.insert("jobs", {"a": 2})
+    mock_exists.assert_called_once_with("jobs")
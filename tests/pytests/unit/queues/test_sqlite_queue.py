@@ -0,0 +1,82 @@
+"""
+Tests for the sqlite queue backend
+"""
+
+import pytest
+
+import salt.queues.sqlite_queue as sqlite_queue
+
+
+@pytest.fixture
+def configure_loader_modules(tmp_path):
+    return {sqlite_queue: {"__opts__": {"sqlite_queue_dir": str(tmp_path)}}}
+
+
+@pytest.fixture(autouse=True)
+def clean_connections():
+    # Connections are cached per process, make sure every test starts over
+    sqlite_queue._CONNECTIONS.__dict__.clear()
+    yield
+    for con in getattr(sqlite_queue._CONNECTIONS, "cache", {}).values():
+        con.close()
+    sqlite_queue._CONNECTIONS.__dict__.clear()
+
+
+def test_pop_is_fifo():
+    sqlite_queue.insert("jobs", ["one", "two", "three"])
+    sqlite_queue.insert("jobs", "four")
+    assert sqlite_queue.pop("jobs") == ["one"]
+    assert sqlite_queue.pop("jobs", 2) == ["two", "three"]
+    assert sqlite_queue.pop("jobs", "all") == ["four"]
+    assert sqlite_queue.pop("jobs") == []
+
+
+def test_list_length():
+    assert sqlite_queue.list_length("jobs") == 0
+    sqlite_queue.insert("jobs", ["{}".format(idx) for idx in range(50)])
+    assert sqlite_queue.list_length("jobs") == 50
+    sqlite_queue.pop("jobs", 10)
+    assert sqlite_queue.list_length("jobs") == 40
+
+
+def test_items_with_quotes_are_bound():
+    items = ["it's", 'say "hi"', "'); DROP TABLE jobs; --"]
+    sqlite_queue.insert("jobs", items)
+    assert sqlite_queue.list_items("jobs") == items
+    sqlite_queue.delete("jobs", "it's")
+    assert sqlite_queue.pop("jobs", "all") == items[1:]
+
+
+def test_insert_duplicate_rolls_back_batch():
+    sqlite_queue.insert("jobs", "one")
+    ret = sqlite_queue.insert("jobs", ["two", "one"])
+    assert ret.startswith("One or more items already exists")
+    assert sqlite_queue.list_items("jobs") == ["one"]
+
+
+def test_pop_runner_decodes_dicts():
+    sqlite_queue.insert("jobs", {"name": "redis", "port": 6379})
+    assert sqlite_queue.pop("jobs", is_runner=True) == [
+        {"name": "redis", "port": 6379}
+    ]
+
+
+def test_pop_invalid_quantity():
+    with pytest.raises(sqlite_queue.SaltInvocationError):
+        sqlite_queue.pop("jobs", "some")
+
+
+def test_connection_is_cached_and_uses_wal():
+    con = sqlite_queue._conn("jobs")
+    assert sqlite_queue._conn("jobs") is con
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_pop_does_not_sort_the_queue():
+    # Popping must walk the rowid index from the front rather than sorting
+    # the whole table, which keeps pop latency flat as the queue grows.
+    con = sqlite_queue._conn("jobs")
+    plan = con.execute(
+        "EXPLAIN QUERY PLAN SELECT id, name FROM jobs ORDER BY id LIMIT ?", (1,)
+    ).fetchall()
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
@@ -0,0 +1,183 @@
+"""
+Test the carbon returner
+"""
+
+import pickle
+import socket
+import struct
+import threading
+
+import pytest
+
+import salt.returners.carbon_return as carbon_return
+from tests.support.mock import patch
+
+
+class CarbonSink:
+    """
+    Local TCP server recording connections and received bytes
+    """
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        self.connections = 0
+        self.data = bytearray()
+        self.lock = threading.Lock()
+        self.readers = []
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            reader = threading.Thread(target=self._read, args=(conn,), daemon=True)
+            reader.start()
+            self.readers.append(reader)
+
+    def _read(self, conn):
+        with conn:
+            for chunk in iter(lambda: conn.recv(65536), b""):
+                with self.lock:
+                    self.data.extend(chunk)
+
+    def pickled_payloads(self):
+        payloads = []
+        offset = 0
+        while offset < len(self.data):
+            (length,) = struct.unpack("!L", self.data[offset : offset + 4])
+            offset += 4
+            payloads.append(pickle.loads(self.data[offset : offset + length]))
+            offset += length
+        return payloads
+
+    def close(self):
+        self.server.close()
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {carbon_return: {"__opts__": {}}}
+
+
+@pytest.fixture
+def sink():
+    sink = CarbonSink()
+    yield sink
+    sink.close()
+
+
+@pytest.fixture
+def options(sink):
+    opts = {
+        "host": "127.0.0.1",
+        "port": sink.port,
+        "skip": True,
+        "mode": "pickle",
+        "chunk_size": 3,
+        "buffer_size": None,
+        "buffer_age": None,
+    }
+    carbon_return._SENDERS.clear()
+    with patch.object(carbon_return, "_get_options", return_value=opts):
+        yield opts
+    for sender in carbon_return._SENDERS.values():
+        sender.close()
+    carbon_return._SENDERS.clear()
+
+
+def _wait_for(sink, count):
+    for _ in range(100):
+        if sum(len(payload) for payload in sink.pickled_payloads()) >= count:
+            return
+        threading.Event().wait(0.05)
+
+
+def test_walk_preserves_order():
+    metrics = []
+    carbon_return._walk(
+        "base", {"a": {"b": 1, "c": [2, 3]}, "d": "skipped"}, metrics, 10, True
+    )
+    assert metrics == [
+        ("base.a.b", 1.0, 10),
+        ("base.a.c.2", 2.0, 10),
+        ("base.a.c.3", 3.0, 10),
+    ]
+
+
+def test_returns_share_one_connection(sink, options):
+    for idx in range(5):
+        carbon_return.returner(
+            {"fun": "status.loadavg", "id": "minion{}".format(idx), "return": 1}
+        )
+    _wait_for(sink, 5)
+    assert sink.connections == 1
+    assert sum(len(payload) for payload in sink.pickled_payloads()) == 5
+
+
+def test_pickle_payloads_are_chunked(sink, options):
+    carbon_return.returner(
+        {"fun": "disk.usage", "id": "minion", "return": list(range(1, 8))}
+    )
+    _wait_for(sink, 7)
+    assert [len(payload) for payload in sink.pickled_payloads()] == [3, 3, 1]
+
+
+def test_event_return_sends_once(sink, options):
+    events = [
+        {"tag": "salt/beacon/{}".format(idx), "data": {"data": {"load": idx}}}
+        for idx in range(2)
+    ]
+    with patch.object(
+        carbon_return._CarbonSender, "flush", autospec=True
+    ) as mock_flush:
+        carbon_return.event_return(events)
+    mock_flush.assert_called_once()
+
+
+def test_buffer_size_holds_metrics(sink, options):
+    options["buffer_size"] = 10
+    with patch.dict(carbon_return.__opts__, {"__role": "master"}), patch.object(
+        carbon_return._CarbonSender, "start_flusher", autospec=True
+    ):
+        carbon_return.returner({"fun": "test.fib", "id": "minion", "return": 1})
+    sender = next(iter(carbon_return._SENDERS.values()))
+    assert len(sender._pending) == 1
+    assert sink.connections == 0
+    sender.flush()
+    _wait_for(sink, 1)
+    (payload,) = sink.pickled_payloads()
+    assert [(name, value) for name, (_, value) in payload] == [
+        ("test.fib.minion", 1.0)
+    ]
+
+
+def test_buffer_size_is_ignored_on_minions(sink, options, caplog):
+    options["buffer_size"] = 10
+    with patch.dict(carbon_return.__opts__, {"__role": "minion"}), patch.object(
+        carbon_return._CarbonSender, "start_flusher", autospec=True
+    ) as start_flusher:
+        carbon_return.returner({"fun": "test.fib", "id": "minion", "return": 1})
+    start_flusher.assert_not_called()
+    _wait_for(sink, 1)
+    assert sink.connections == 1
+    assert "only supported on the master" in caplog.text
+
+
+def test_flush_requeues_unsent_metrics():
+    sender = carbon_return._CarbonSender("127.0.0.1", 2003, "text", chunk_size=2)
+    sender.max_pending = 2
+    sender.add([("metric{}".format(idx), 1.0, 10) for idx in range(5)])
+    sendall_effects = [None, OSError("connection refused")]
+    with patch.object(
+        sender, "_sendall", autospec=True, side_effect=sendall_effects
+    ) as mock_sendall:
+        with pytest.raises(OSError):
+            sender.flush()
+    assert mock_sendall.call_count == 2
+    assert [metric[0] for metric in sender._pending] == ["metric3", "metric4"]
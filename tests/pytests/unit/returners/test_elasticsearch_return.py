@@ -1,6 +1,9 @@
 """
 Test the elasticsearch returner
 """
+import json
+import logging
+
 import pytest
 
 import salt.returners.elasticsearch_return as elasticsearch_return
@@ -37,3 +40,128 @@ def test__virtual_with_elasticsearch():
         result = elasticsearch_return.__virtual__()
         expected = "elasticsearch"
         assert expected == result
+
+
+@pytest.fixture
+def es_salt():
+    """
+    Stand-in for the elasticsearch execution module, recording _bulk bodies
+    """
+    bulk_bodies = []
+    funcs = {
+        "elasticsearch.index_exists": MagicMock(return_value=True),
+        "elasticsearch.index_create": MagicMock(),
+        "elasticsearch.alias_create": MagicMock(),
+        "elasticsearch.document_create": MagicMock(),
+        "elasticsearch.document_bulk": MagicMock(side_effect=bulk_bodies.append),
+    }
+    elasticsearch_return._KNOWN_INDICES.clear()
+    elasticsearch_return._BULK_BUFFER.clear()
+    with patch.dict(elasticsearch_return.__salt__, funcs), patch.dict(
+        elasticsearch_return.__opts__, {}
+    ):
+        yield funcs, bulk_bodies
+    elasticsearch_return._KNOWN_INDICES.clear()
+    elasticsearch_return._BULK_BUFFER.clear()
+
+
+def _parse_ndjson(body):
+    assert body.endswith("\n")
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_event_return_sends_every_event_in_one_bulk_request(es_salt):
+    funcs, bulk_bodies = es_salt
+    events = [{"tag": "salt/event/{}".format(idx), "data": {}} for idx in range(3)]
+    elasticsearch_return.event_return(events)
+    assert len(bulk_bodies) == 1
+    lines = _parse_ndjson(bulk_bodies[0])
+    assert len(lines) == 6
+    assert [doc["tag"] for doc in lines[1::2]] == [
+        "salt/event/0",
+        "salt/event/1",
+        "salt/event/2",
+    ]
+    assert lines[0]["index"]["_index"] == "salt-master-event-cache"
+    funcs["elasticsearch.document_create"].assert_not_called()
+
+
+def test_index_existence_is_checked_once(es_salt):
+    funcs, _ = es_salt
+    elasticsearch_return.event_return([{"tag": "a", "data": {}}])
+    elasticsearch_return.event_return([{"tag": "b", "data": {}}])
+    funcs["elasticsearch.index_exists"].assert_called_once_with(
+        "salt-master-event-cache"
+    )
+
+
+def test_returner_bulk_size_groups_returns(es_salt):
+    funcs, bulk_bodies = es_salt
+    ret = {"fun": "test.ping", "jid": "1234", "id": "minion", "return": True}
+    with patch.dict(
+        elasticsearch_return.__opts__,
+        {"__role": "master", "elasticsearch.bulk_size": 2},
+    ), patch.object(elasticsearch_return, "_start_flusher"):
+        elasticsearch_return.returner(dict(ret))
+        assert bulk_bodies == []
+        elasticsearch_return.returner(dict(ret, id="other"))
+    assert len(bulk_bodies) == 1
+    docs = _parse_ndjson(bulk_bodies[0])[1::2]
+    assert [doc["minion"] for doc in docs] == ["minion", "other"]
+    funcs["elasticsearch.document_create"].assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "role,extra",
+    [("minion", {}), ("master", {"ret_kwargs": {"bulk_size": 2}})],
+)
+def test_returner_bulk_size_is_ignored(es_salt, role, extra):
+    """
+    Test that returns are sent immediately on minions, and for returns using
+    per-call options
+    """
+    funcs, bulk_bodies = es_salt
+    ret = {"fun": "test.ping", "jid": "1234", "id": "minion", "return": True}
+    ret.update(extra)
+    with patch.dict(
+        elasticsearch_return.__opts__,
+        {"__role": role, "elasticsearch.bulk_size": 2},
+    ), patch.object(elasticsearch_return, "_start_flusher") as start_flusher:
+        elasticsearch_return.returner(ret)
+    funcs["elasticsearch.document_create"].assert_called_once()
+    start_flusher.assert_not_called()
+    assert bulk_bodies == []
+    assert elasticsearch_return._BULK_BUFFER == []
+
+
+def test_bulk_item_failures_are_logged(es_salt, caplog):
+    funcs, _ = es_salt
+    funcs["elasticsearch.document_bulk"].side_effect = None
+    funcs["elasticsearch.document_bulk"].return_value = {
+        "took": 3,
+        "errors": True,
+        "items": [
+            {"index": {"_index": "salt-master-event-cache", "status": 201}},
+            {
+                "index": {
+                    "_index": "salt-master-event-cache",
+                    "status": 400,
+                    "error": {
+                        "type": "mapper_parsing_exception",
+                        "reason": "failed to parse field [data]",
+                    },
+                }
+            },
+        ],
+    }
+    events = [{"tag": "salt/event/{}".format(idx), "data": {}} for idx in range(2)]
+    with caplog.at_level(logging.ERROR):
+        elasticsearch_return.event_return(events)
+    errors = [
+        record.getMessage()
+        for record in caplog.records
+        if record.levelno == logging.ERROR
+    ]
+    assert len(errors) == 1
+    assert "status 400" in errors[0]
+    assert "mapper_parsing_exception" in errors[0]
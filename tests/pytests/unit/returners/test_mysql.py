@@ -1,7 +1,12 @@
 import pytest
 
 from salt.returners import mysql
-from tests.support.mock import patch
+from tests.support.mock import MagicMock, patch
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {mysql: {"__opts__": {}}}
 
 
 def test_returner_with_bytes():
@@ -35,3 +40,138 @@ def test_save_load_with_bytes():
             mysql.save_load(load["jid"], load)
         except TypeError:
             pytest.fail("Data not decoded properly")
+
+
+@pytest.fixture
+def batch_opts():
+    mysql._BATCH.clear()
+    with patch.dict(
+        mysql.__opts__, {"id": "master", "__role": "master", "mysql.batch_size": 2}
+    ):
+        yield
+    mysql._BATCH.clear()
+
+
+def _ret(minion):
+    return {
+        "success": True,
+        "return": True,
+        "retcode": 0,
+        "jid": "20221101172203459989",
+        "fun": "test.ping",
+        "id": minion,
+    }
+
+
+def test_returner_batches_returns(batch_opts):
+    with patch.object(mysql, "_get_serv") as mock_serv, patch.object(
+        mysql, "_start_flusher"
+    ):
+        cur = mock_serv.return_value.__enter__.return_value
+        mysql.returner(_ret("minion-1"))
+        cur.executemany.assert_not_called()
+        mysql.returner(_ret("minion-2"))
+    cur.execute.assert_not_called()
+    cur.executemany.assert_called_once()
+    sql, rows = cur.executemany.call_args[0]
+    assert sql == mysql._RETURNS_SQL
+    assert [row[3] for row in rows] == ["minion-1", "minion-2"]
+    assert mysql._BATCH == []
+
+
+def test_returner_with_ret_config_is_not_batched(batch_opts):
+    ret = _ret("minion-1")
+    ret["ret_config"] = "alternative"
+    with patch.object(mysql, "_get_serv") as mock_serv:
+        cur = mock_serv.return_value.__enter__.return_value
+        mysql.returner(ret)
+    cur.execute.assert_called_once()
+    assert mysql._BATCH == []
+
+
+def test_batch_options_are_read_from_returner_config():
+    config = {"mysql.batch_size": "2", "mysql.async_writes": "False"}
+    mysql._BATCH.clear()
+    with patch.dict(
+        mysql.__salt__, {"config.option": MagicMock(side_effect=config.get)}
+    ), patch.dict(mysql.__opts__, {"id": "master", "__role": "master"}), patch.object(
+        mysql, "_get_serv"
+    ) as mock_serv, patch.object(
+        mysql, "_start_flusher"
+    ) as start_flusher:
+        cur = mock_serv.return_value.__enter__.return_value
+        mysql.returner(_ret("minion-1"))
+        cur.executemany.assert_not_called()
+        mysql.returner(_ret("minion-2"))
+    cur.executemany.assert_called_once()
+    start_flusher.assert_called_with(1.0)
+    assert mysql._BATCH == []
+
+
+def test_returner_is_not_batched_on_minions(caplog):
+    mysql._BATCH.clear()
+    with patch.dict(
+        mysql.__opts__, {"id": "minion", "__role": "minion", "mysql.batch_size": 2}
+    ), patch.object(mysql, "_get_serv") as mock_serv, patch.object(
+        mysql, "_start_flusher"
+    ) as start_flusher:
+        cur = mock_serv.return_value.__enter__.return_value
+        mysql.returner(_ret("minion-1"))
+    cur.execute.assert_called_once()
+    start_flusher.assert_not_called()
+    assert mysql._BATCH == []
+    assert "only supported on the master" in caplog.text
+
+
+def test_event_return_uses_executemany():
+    events = [{"tag": "salt/event/{}".format(idx), "data": {}} for idx in range(3)]
+    with patch.dict(mysql.__opts__, {"id": "master"}), patch.object(
+        mysql, "_get_serv"
+    ) as mock_serv:
+        cur = mock_serv.return_value.__enter__.return_value
+        mysql.event_return(events)
+    cur.execute.assert_not_called()
+    sql, rows = cur.executemany.call_args[0]
+    assert sql == mysql._EVENTS_SQL
+    assert [row[0] for row in rows] == [event["tag"] for event in events]
+
+
+def test_purge_jobs_deletes_in_chunks():
+    with patch.dict(mysql.__opts__, {"mysql.purge_chunk_size": 2}), patch.object(
+        mysql, "_get_serv"
+    ) as mock_serv:
+        cur = mock_serv.return_value.__enter__.return_value
+        cur.fetchall.return_value = [("1",), ("2",), ("3",)]
+        cur.fetchone.return_value = (10, 13)
+        assert mysql._purge_jobs("2022-11-01 00:00:00") is True
+    statements = [
+        (call[0][0], call[0][1] if len(call[0]) > 1 else None)
+        for call in cur.execute.call_args_list
+        if call[0][0] != "COMMIT"
+    ]
+    assert statements[1:] == [
+        ("delete from `jids` where jid in (%s, %s)", ["1", "2"]),
+        ("delete from `jids` where jid in (%s)", ["3"]),
+        (
+            "delete from `salt_returns` where jid in (%s, %s) and alter_time < %s",
+            ["1", "2", "2022-11-01 00:00:00"],
+        ),
+        (
+            "delete from `salt_returns` where jid in (%s) and alter_time < %s",
+            ["3", "2022-11-01 00:00:00"],
+        ),
+        (
+            "select min(id), max(id) from `salt_events` where alter_time < %s",
+            ("2022-11-01 00:00:00",),
+        ),
+        (
+            "delete from `salt_events` where id between %s and %s"
+            " and alter_time < %s",
+            (10, 11, "2022-11-01 00:00:00"),
+        ),
+        (
+            "delete from `salt_events` where id between %s and %s"
+            " and alter_time < %s",
+            (12, 13, "2022-11-01 00:00:00"),
+        ),
+    ]
@@ -108,3 +108,79 @@ def test_when_platform_is_not_proxy_it_should_use_returner_opts(
         password="super secret!",
         decode_responses=True,
     )
+
+
+@pytest.fixture
+def clean_buffer():
+    redis_return._BUFFER.clear()
+    yield
+    redis_return._BUFFER.clear()
+
+
+def _ret(minion, jid="20240101010101000000"):
+    return {"id": minion, "jid": jid, "fun": "test.ping", "return": True}
+
+
+def test_returner_without_buffer_executes_a_pipeline_per_return(
+    proxy_platform, mock_strict_redis
+):
+    pipeline = mock_strict_redis.return_value.pipeline.return_value
+    redis_return.returner(_ret("minion1"))
+    redis_return.returner(_ret("minion2"))
+    assert pipeline.execute.call_count == 2
+
+
+def test_returner_buffer_coalesces_returns_into_one_pipeline(
+    proxy_platform, mock_strict_redis, clean_buffer
+):
+    pipeline = mock_strict_redis.return_value.pipeline.return_value
+    with patch.dict(
+        redis_return.__opts__, {"__role": "master", "redis.buffer_size": 3}
+    ), patch.object(redis_return, "_start_flusher", autospec=True):
+        redis_return.returner(_ret("minion1"))
+        redis_return.returner(_ret("minion2"))
+        pipeline.execute.assert_not_called()
+        redis_return.returner(_ret("minion3"))
+    pipeline.execute.assert_called_once()
+    assert pipeline.hset.call_count == 3
+    assert redis_return._BUFFER == []
+
+
+@pytest.mark.parametrize(
+    "role,extra",
+    [("minion", {}), ("master", {"ret_kwargs": {"db": "1"}})],
+)
+def test_returner_buffer_is_ignored(
+    proxy_platform, mock_strict_redis, clean_buffer, role, extra
+):
+    pipeline = mock_strict_redis.return_value.pipeline.return_value
+    ret = dict(_ret("minion1"), **extra)
+    with patch.dict(
+        redis_return.__opts__, {"__role": role, "redis.buffer_size": 3}
+    ), patch.object(redis_return, "_start_flusher", autospec=True) as start_flusher:
+        redis_return.returner(ret)
+    pipeline.execute.assert_called_once()
+    start_flusher.assert_not_called()
+    assert redis_return._BUFFER == []
+
+
+def test_get_fun_uses_mget_and_one_pipeline(proxy_platform, mock_strict_redis):
+    serv = mock_strict_redis.return_value
+    serv.smembers.return_value = {"minion1"}
+    serv.mget.return_value = ["1234"]
+    serv.pipeline.return_value.execute.return_value = ['{"id": "minion1"}']
+    assert redis_return.get_fun("test.ping") == {"minion1": {"id": "minion1"}}
+    serv.mget.assert_called_once_with(["minion1:test.ping"])
+    serv.pipeline.return_value.hget.assert_called_once_with("ret:1234", "minion1")
+    serv.get.assert_not_called()
+
+
+def test_clean_old_jobs_scans_instead_of_keys(proxy_platform, mock_strict_redis):
+    serv = mock_strict_redis.return_value
+    serv.scan_iter.side_effect = lambda match, count: {
+        "load:*": iter(["load:1"]),
+        "ret:*": iter(["ret:1", "ret:2"]),
+    }[match]
+    redis_return.clean_old_jobs()
+    serv.keys.assert_not_called()
+    serv.delete.assert_called_once_with("ret:2")
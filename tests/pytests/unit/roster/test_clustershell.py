@@ -2,6 +2,10 @@
 unit tests for clustershell roster
 """
 
+import socket
+import threading
+import time
+
 import pytest
 
 from tests.support.mock import MagicMock, patch
@@ -47,3 +51,120 @@ def test_targets():
             mock_socket.gethostbyname.assert_any_call("foo")
             assert "foo" in ret
             assert ret["foo"]["port"] == 3
+
+
+@pytest.fixture
+def clustershell():
+    import salt.roster.clustershell
+
+    # test_targets imports the module with a mocked socket module
+    with patch.object(salt.roster.clustershell, "socket", socket):
+        yield salt.roster.clustershell
+
+
+@pytest.fixture
+def listening_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(512)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _opts(clustershell, ports, **kwargs):
+    opts = {"ssh_scan_ports": ports, "ssh_scan_timeout": 1, "roster_defaults": {}}
+    opts.update(kwargs)
+    return patch.object(clustershell, "__opts__", opts, create=True)
+
+
+def test_targets_local_sockets(clustershell, listening_port, closed_port):
+    """
+    Test that the open ports of the hosts are found by the scanner
+    """
+    hosts = ["node1", "node2"]
+    with _opts(clustershell, [listening_port, closed_port]), patch.object(
+        clustershell, "NodeSet", MagicMock(return_value=hosts), create=True
+    ), patch.object(socket, "gethostbyname", MagicMock(return_value="127.0.0.1")):
+        ret = clustershell.targets("node[1-2]")
+        assert ret == {
+            host: {"host": "127.0.0.1", "port": listening_port} for host in hosts
+        }
+
+    with _opts(clustershell, str(closed_port)), patch.object(
+        clustershell, "NodeSet", MagicMock(return_value=hosts), create=True
+    ), patch.object(socket, "gethostbyname", MagicMock(return_value="127.0.0.1")):
+        assert clustershell.targets("node[1-2]") == {"node1": {}, "node2": {}}
+
+
+def test_targets_scan_cache(clustershell, listening_port, tmp_path):
+    """
+    Test that the results of the scan are reused until they expire
+    """
+    hosts = ["node1", "node2"]
+    probe = MagicMock(side_effect=clustershell._probe)
+    with _opts(
+        clustershell,
+        [listening_port],
+        ssh_scan_cache_ttl=60,
+        cachedir=str(tmp_path),
+    ), patch.object(
+        clustershell, "NodeSet", MagicMock(return_value=hosts), create=True
+    ), patch.object(
+        socket, "gethostbyname", MagicMock(return_value="127.0.0.1")
+    ), patch.object(
+        clustershell, "_probe", probe
+    ):
+        first = clustershell.targets("node[1-2]")
+        assert probe.call_count == 2
+        assert clustershell.targets("node[1-2]") == first
+        assert probe.call_count == 2
+
+        with patch("time.time", MagicMock(return_value=time.time() + 120)):
+            assert clustershell.targets("node[1-2]") == first
+        assert probe.call_count == 4
+
+
+@pytest.mark.slow_test
+def test_targets_scan_benchmark(clustershell, listening_port):
+    """
+    Benchmark the scan of 200 hosts with a latency of 50ms per probe, which
+    takes 10 seconds when the hosts are probed one after another
+    """
+    hosts = ["node{}".format(idx) for idx in range(200)]
+    lock = threading.Lock()
+    running = {"current": 0, "peak": 0}
+
+    def _slow_probe(addr, port, timeout):
+        with lock:
+            running["current"] += 1
+            running["peak"] = max(running["peak"], running["current"])
+        try:
+            time.sleep(0.05)
+            with socket.create_connection((addr, port), timeout):
+                return True
+        finally:
+            with lock:
+                running["current"] -= 1
+
+    with _opts(clustershell, [listening_port]), patch.object(
+        clustershell, "NodeSet", MagicMock(return_value=hosts), create=True
+    ), patch.object(
+        socket, "gethostbyname", MagicMock(return_value="127.0.0.1")
+    ), patch.object(
+        clustershell, "_probe", _slow_probe
+    ):
+        ret = clustershell.targets("node[0-199]")
+
+    assert len(ret) == 200
+    assert all(target["port"] == listening_port for target in ret.values())
+    # The probes overlapped instead of running one after another
+    assert running["peak"] > 1
@@ -0,0 +1,191 @@
+"""
+Tests for salt.states.boto3_route53
+"""
+
+import pytest
+
+import salt.states.boto3_route53 as boto3_route53
+import salt.utils.state
+from tests.support.mock import MagicMock, patch
+
+ZONE = {"HostedZone": {"Id": "/hostedzone/Z1234", "Name": "example.com."}}
+
+
+@pytest.fixture
+def configure_loader_modules():
+    return {
+        boto3_route53: {
+            "__opts__": {"test": False},
+            "__utils__": {"state.gen_tag": salt.utils.state.gen_tag},
+        }
+    }
+
+
+@pytest.fixture
+def route53():
+    records = [
+        {
+            "Name": "www.example.com.",
+            "Type": "A",
+            "TTL": 300,
+            "ResourceRecords": [{"Value": "192.0.2.10"}],
+        },
+        {
+            "Name": "old.example.com.",
+            "Type": "CNAME",
+            "TTL": 300,
+            "ResourceRecords": [{"Value": "www.example.com."}],
+        },
+    ]
+    salt_mock = {
+        "config.option": MagicMock(return_value=True),
+        "boto3_route53.find_hosted_zone": MagicMock(return_value=[ZONE]),
+        "boto3_route53.get_resource_records": MagicMock(return_value=records),
+        "boto3_route53.change_resource_record_sets": MagicMock(return_value=True),
+    }
+    with patch.dict(boto3_route53.__salt__, salt_mock):
+        yield salt_mock
+
+
+def _chunk(fun, id_, **kwargs):
+    chunk = {
+        "state": "boto3_route53",
+        "__id__": id_,
+        "name": kwargs.pop("name", id_),
+        "fun": fun,
+        "DomainName": "example.com.",
+        "order": 1,
+    }
+    chunk.update(kwargs)
+    return chunk
+
+
+def test_rr_present_zone_snapshot(route53):
+    """
+    Test that the zone is listed only once per run in snapshot mode
+    """
+    ret = boto3_route53.rr_present(
+        "api.example.com.",
+        DomainName="example.com.",
+        Type="A",
+        TTL=300,
+        ResourceRecords=["192.0.2.20"],
+    )
+    assert ret["result"] is True
+    assert ret["changes"]["old"] is None
+
+    ret = boto3_route53.rr_present(
+        "www.example.com.",
+        DomainName="example.com.",
+        Type="A",
+        TTL=300,
+        ResourceRecords=["192.0.2.10"],
+    )
+    assert ret["result"] is True
+    assert ret["changes"] == {}
+
+    # The snapshot knows about the created record
+    ret = boto3_route53.rr_present(
+        "api.example.com.",
+        DomainName="example.com.",
+        Type="A",
+        TTL=300,
+        ResourceRecords=["192.0.2.20"],
+    )
+    assert ret["changes"] == {}
+
+    route53["boto3_route53.find_hosted_zone"].assert_called_once()
+    route53["boto3_route53.get_resource_records"].assert_called_once_with(
+        HostedZoneId="/hostedzone/Z1234",
+        region=None,
+        key=None,
+        keyid=None,
+        profile=None,
+    )
+    route53["boto3_route53.change_resource_record_sets"].assert_called_once()
+
+
+def test_mod_aggregate_batches_changes(route53):
+    """
+    Test that the changes of the states of a zone are submitted in a single
+    change batch
+    """
+    chunks = [
+        _chunk(
+            "rr_present",
+            "api",
+            name="api.example.com.",
+            Type="A",
+            TTL=60,
+            ResourceRecords=["192.0.2.20"],
+        ),
+        _chunk(
+            "rr_present",
+            "www",
+            name="www.example.com.",
+            Type="A",
+            TTL=300,
+            ResourceRecords=["192.0.2.10"],
+        ),
+        _chunk("rr_absent", "old", name="old.example.com.", Type="CNAME"),
+        _chunk(
+            "rr_present",
+            "mail",
+            name="mail.example.com.",
+            Type="A",
+            TTL=60,
+            ResourceRecords=["192.0.2.30"],
+            require=[{"test": "foo"}],
+        ),
+    ]
+
+    low = boto3_route53.mod_aggregate(chunks[0], chunks, {})
+    assert low is chunks[0]
+
+    change_mock = route53["boto3_route53.change_resource_record_sets"]
+    change_mock.assert_called_once()
+    changes = change_mock.call_args.kwargs["ChangeBatch"]["Changes"]
+    assert [(c["Action"], c["ResourceRecordSet"]["Name"]) for c in changes] == [
+        ("UPSERT", "api.example.com."),
+        ("DELETE", "old.example.com."),
+    ]
+    assert all("__agg__" in chunk for chunk in chunks[1:3])
+    assert "__agg__" not in chunks[3]
+
+    # The aggregated states return their own results without any API call
+    ret = boto3_route53.rr_absent(
+        "old.example.com.", DomainName="example.com.", Type="CNAME"
+    )
+    assert ret["result"] is True
+    assert ret["changes"]["new"] is None
+    ret = boto3_route53.rr_present(
+        "api.example.com.",
+        DomainName="example.com.",
+        Type="A",
+        TTL=60,
+        ResourceRecords=["192.0.2.20"],
+    )
+    assert ret["changes"]["new"]["ResourceRecords"] == [{"Value": "192.0.2.20"}]
+    change_mock.assert_called_once()
+    route53["boto3_route53.get_resource_records"].assert_called_once()
+
+
+def test_change_batches_limits():
+    """
+    Test that UPSERT changes count twice against the batch size limit
+    """
+    items = [
+        {
+            "change": {
+                "Action": "UPSERT",
+                "ResourceRecordSet": {
+                    "Name": f"host{idx}.example.com.",
+                    "Type": "A",
+                    "ResourceRecords": [{"Value": "192.0.2.1"}],
+                },
+            }
+        }
+        for idx in range(1200)
+    ]
+    batches = list(boto3_route53._change_batches(items))
+    assert [len(batch) for batch in batches] == [500, 500, 200]
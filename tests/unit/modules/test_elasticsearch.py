@@ -674,6 +674,32 @@ class ElasticsearchTestCase(TestCase):
                 CommandExecutionError, elasticsearch.document_create, "foo", "bar"
             )
 
+    # 'document_bulk' function tests: 1
+
+    def test_document_bulk(self):
+        """
+        Test if several documents can be sent in a single request
+        """
+
+        class MockElastic:
+            """
+            Mock of Elasticsearch client
+            """
+
+            def bulk(self, body=None, index=None, doc_type=None):
+                """
+                Mock of bulk method
+                """
+                return {"errors": False, "items": body.splitlines()}
+
+        with patch.object(
+            elasticsearch, "_get_instance", MagicMock(return_value=MockElastic())
+        ):
+            self.assertDictEqual(
+                elasticsearch.document_bulk('{"index": {}}\n{"a": 1}\n'),
+                {"errors": False, "items": ['{"index": {}}', '{"a": 1}']},
+            )
+
     # 'document_delete' function tests: 2
 
     def test_document_delete(self):
@@ -6836,7 +6836,8 @@ class VirtTestCase(TestCase, LoaderModuleMockMixin):
         self.mock_conn.lookupByID.return_value = mock_vms[0]
         self.mock_conn.listDefinedDomains.return_value = ["vm1", "vm2"]
 
-        self.mock_conn.lookupByName.side_effect = mock_vms
+        # The active VM is not looked up again by name
+        self.mock_conn.lookupByName.side_effect = mock_vms[1:]
         self.assertEqual(mock_vms, virt._get_domain(self.mock_conn))
 
         self.mock_conn.lookupByName.side_effect = None